@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from capstan.jsonl import iter_objects
+from scripts.synth import write_synthetic_books
+
+LOG = logging.getLogger("capstan.bench")
+
+
+def stdlib_records(path: Path) -> Iterator[dict[str, Any]]:
+	"""The per-line ``str.strip`` + ``json.loads`` path the adapters used before."""
+	with path.open("r") as f:
+		for line in f:
+			line = line.strip()
+			if not line:
+				continue
+			try:
+				data = json.loads(line)
+			except Exception:
+				continue
+			if isinstance(data, dict):
+				yield data
+
+
+def orjson_records(path: Path) -> Iterator[dict[str, Any]]:
+	for _offset, data in iter_objects(path, LOG, venue="bench", stream="books"):
+		yield data
+
+
+def _time(fn: Any, path: Path) -> tuple[float, int]:
+	t0 = time.perf_counter()
+	n = sum(1 for _ in fn(path))
+	return time.perf_counter() - t0, n
+
+
+def main(argv: list[str] | None = None) -> None:
+	parser = argparse.ArgumentParser(description="stdlib json vs orjson bulk jsonl decode")
+	parser.add_argument("--lines", type=int, default=1_000_000)
+	parser.add_argument("--levels", type=int, default=10)
+	parser.add_argument("--file", type=Path, default=None, help="reuse an existing books.jsonl")
+	args = parser.parse_args(argv)
+	with tempfile.TemporaryDirectory(prefix="capstan-bench-") as tmp:
+		path = args.file or write_synthetic_books(Path(tmp) / "books.jsonl", args.lines, levels=args.levels)
+		size_mb = path.stat().st_size / 1e6
+		results = {name: _time(fn, path) for name, fn in (("stdlib", stdlib_records), ("orjson", orjson_records))}
+	for name, (secs, n) in results.items():
+		print(f"{name:8s} {n:>10d} lines {secs:8.3f}s {n / secs:12.0f} lines/s {size_mb / secs:8.1f} MB/s")
+	print(f"speedup  {results['stdlib'][0] / results['orjson'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+	main()
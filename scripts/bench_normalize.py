@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from capstan.normalizer import (
+	normalize_orderbook,
+	normalize_orderbook_compact,
+	normalize_orderbooks_batch,
+)
+from capstan.validation import SampledValidator
+from scripts.synth import write_synthetic_books
+
+
+def _as_strings(raw: dict[str, Any]) -> dict[str, Any]:
+	"""The string-encoded levels most venue REST/WS payloads use."""
+	side = lambda levels: [{"price": str(lv["price"]), "qty": str(lv["qty"])} for lv in levels]  # noqa: E731
+	return {**raw, "bids": side(raw["bids"]), "asks": side(raw["asks"])}
+
+
+def _time(fn: Callable[[list[dict[str, Any]]], Any], raws: list[dict[str, Any]]) -> float:
+	# like timeit: keep cyclic GC passes over the retained results out of the numbers
+	gc.collect()
+	gc.disable()
+	try:
+		t0 = time.perf_counter()
+		fn(raws)
+		return time.perf_counter() - t0
+	finally:
+		gc.enable()
+
+
+def main(argv: list[str] | None = None) -> None:
+	parser = argparse.ArgumentParser(description="per-record vs batched order book normalization")
+	parser.add_argument("--books", type=int, default=100_000)
+	parser.add_argument("--levels", type=int, default=20)
+	parser.add_argument("--top-n", type=int, default=10)
+	parser.add_argument("--batch", type=int, default=1000, help="records per normalize_orderbooks_batch call")
+	args = parser.parse_args(argv)
+	with tempfile.TemporaryDirectory(prefix="capstan-bench-") as tmp:
+		path = write_synthetic_books(Path(tmp) / "books.jsonl", args.books, levels=args.levels)
+		floats = [json.loads(line) for line in path.open()]
+	strings = [_as_strings(r) for r in floats]
+	top_n, size = args.top_n, args.batch
+	validator = SampledValidator()
+	paths: dict[str, Callable[[list[dict[str, Any]]], Any]] = {
+		"normalize_orderbook": lambda raws: [normalize_orderbook(r, top_n=top_n) for r in raws],
+		"normalize_orderbook_compact": lambda raws: [normalize_orderbook_compact(r, top_n=top_n) for r in raws],
+		"normalize_orderbooks_batch": lambda raws: [
+			normalize_orderbooks_batch(raws[i : i + size], top_n=top_n) for i in range(0, len(raws), size)
+		],
+		"normalize_orderbooks_batch trusted": lambda raws: [
+			normalize_orderbooks_batch(raws[i : i + size], top_n=top_n, skip_invalid=True, validator=validator)
+			for i in range(0, len(raws), size)
+		],
+	}
+	for label, raws in (("float levels", floats), ("string levels", strings)):
+		print(f"{label}: {len(raws)} books, top_n={top_n}")
+		base = None
+		for name, fn in paths.items():
+			secs = _time(fn, raws)
+			base = base or secs
+			print(f"  {name:36s} {secs:8.3f}s {len(raws) / secs:12.0f} books/s {base / secs:6.2f}x")
+
+
+if __name__ == "__main__":
+	main()
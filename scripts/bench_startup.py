@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Cold-start budgets (cumulative import time, ms) for the entry points short-lived
+# jobs import. Heavier modules (numpy, pydantic, duckdb backends) are reported
+# but only checked when given a budget here.
+BUDGETS_MS = {
+	"capstan": 20.0,
+	"capstan.core": 50.0,
+	"capstan.streaming": 50.0,
+	"capstan.metrics": 20.0,
+	"capstan.latency": 20.0,
+}
+REPORT_ONLY = (
+	"capstan.compact",
+	"capstan.batch",
+	"capstan.normalizer",
+	"capstan.venue_adapters",
+	"capstan.parquet_store",
+	"capstan.ws_adapter",
+	"capstan.metrics_exporter",
+)
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def importtime(module: str) -> tuple[float, list[tuple[int, int, str]]]:
+	"""Cumulative ms for ``import module`` in a fresh interpreter, plus the raw (self_us, cumulative_us, name) rows."""
+	env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")]))}
+	proc = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		env=env,
+		capture_output=True,
+		text=True,
+		check=True,
+	)
+	rows: list[tuple[int, int, str]] = []
+	for line in proc.stderr.splitlines():
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+		self_us, cum_us, name = line.removeprefix("import time:").split("|", 2)
+		rows.append((int(self_us), int(cum_us), name.strip()))
+	total = sum(cum for _self, cum, name in rows if name == module.split(".")[0])
+	if module != module.split(".")[0]:
+		total += next((cum for _self, cum, name in rows if name == module), 0)
+	return total / 1e3, rows
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="cold import time of capstan entry points (python -X importtime)")
+	parser.add_argument("--repeat", type=int, default=5, help="runs per module; the best is reported")
+	parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports of each module")
+	args = parser.parse_args(argv)
+	failed = []
+	print(f"{'module':28s} {'best ms':>9s} {'budget':>8s}")
+	for module in (*BUDGETS_MS, *REPORT_ONLY):
+		runs = [importtime(module) for _ in range(args.repeat)]
+		best, rows = min(runs, key=lambda r: r[0])
+		budget = BUDGETS_MS.get(module)
+		over = budget is not None and best > budget
+		failed += [module] if over else []
+		print(f"{module:28s} {best:9.1f} {'-' if budget is None else f'{budget:.0f}':>8s}{'  OVER' if over else ''}")
+		for self_us, _cum, name in sorted(rows, reverse=True)[: args.top]:
+			print(f"    {self_us / 1e3:7.1f} ms  {name}")
+	if failed:
+		print(f"over startup budget: {', '.join(failed)}")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import asdict, dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+
+from capstan import core
+from capstan.config import load_config
+from capstan.jsonl_index import JsonlIndex
+from capstan.normalizer import (
+	normalize_funding,
+	normalize_indexmark,
+	normalize_oi,
+	normalize_orderbook,
+)
+from capstan.replay import run_replay, shards_from_config
+from capstan.schemas import Funding, IndexMark, OpenInterest, OrderBook
+from capstan.venue_adapters import FixtureRO
+from scripts.synth import write_synthetic_venue
+
+BENCH_VERSION = 2
+DEFAULT_BOOKS = 20_000
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_OUTPUT = Path("bench_output.json")
+DEFAULT_BASELINE = Path("benchmarks/baseline.json")
+LLCA_WINDOW = 64
+HFH_WINDOW = 8
+
+
+@dataclass(frozen=True)
+class BenchResult:
+	name: str
+	n: int
+	seconds: float
+	ops_per_s: float
+	p50_us: float
+	p99_us: float
+
+
+def peak_rss_mb() -> float:
+	"""Peak RSS of this process so far; a running maximum, not attributable to one benchmark."""
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# bytes on macOS, KiB elsewhere
+	return rss / (1 << 20) if sys.platform == "darwin" else rss / (1 << 10)
+
+
+def _result(name: str, lat_ns: list[int], seconds: float) -> BenchResult:
+	lat = np.asarray(lat_ns, dtype=np.float64) if lat_ns else np.zeros(1)
+	p50, p99 = np.percentile(lat, [50, 99]) / 1e3
+	n = len(lat_ns)
+	return BenchResult(name, n, seconds, n / seconds if seconds > 0 else 0.0, float(p50), float(p99))
+
+
+def bench_iter(name: str, make: Callable[[], Iterable[Any]]) -> BenchResult:
+	"""Time how long each item of ``make()`` takes to produce."""
+	clock = time.perf_counter_ns
+	lat: list[int] = []
+	t_start = time.perf_counter()
+	items = iter(make())
+	while True:
+		t0 = clock()
+		try:
+			next(items)
+		except StopIteration:
+			break
+		lat.append(clock() - t0)
+	return _result(name, lat, time.perf_counter() - t_start)
+
+
+def bench_calls(name: str, fn: Callable[..., Any], calls: Sequence[tuple[Any, ...]]) -> BenchResult:
+	clock = time.perf_counter_ns
+	lat: list[int] = []
+	t_start = time.perf_counter()
+	for args in calls:
+		t0 = clock()
+		fn(*args)
+		lat.append(clock() - t0)
+	return _result(name, lat, time.perf_counter() - t_start)
+
+
+def _load(path: Path) -> list[dict[str, Any]]:
+	with path.open("rb") as f:
+		return [orjson.loads(line) for line in f if line.strip()]
+
+
+def _pairs(ob: OrderBook) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
+	return [(lv.price, lv.qty) for lv in ob.bids], [(lv.price, lv.qty) for lv in ob.asks]
+
+
+def _mid(ob: OrderBook) -> float:
+	return 0.5 * (ob.bids[0].price + ob.asks[0].price) if ob.bids and ob.asks else 0.0
+
+
+def run_benchmark(root: Path, venue: str, symbols: Sequence[str], *, signal_calls: int = DEFAULT_BOOKS) -> list[BenchResult]:
+	"""Time ingest, normalization, schema construction and every ``capstan.core`` signal over ``root``."""
+	logger = f"capstan.adapters.{venue}"
+	plain = FixtureRO(root, logger, use_index=False)
+	trusted = FixtureRO(root, logger, use_index=False, trusted=True)
+	indexed = FixtureRO(root, logger)
+	indexed_trusted = FixtureRO(root, logger, trusted=True)
+	streams = [("books.jsonl", "books"), ("oi.jsonl", "oi"), ("funding.jsonl", "funding"), ("index.jsonl", "index")]
+	index_log = logging.getLogger(logger)
+
+	def every(adapter: FixtureRO, method: str) -> Callable[[], Iterator[Any]]:
+		return lambda: chain.from_iterable(getattr(adapter, method)(s) for s in symbols)
+
+	results = [
+		bench_iter("ingest.books", every(plain, "books")),
+		bench_iter("ingest.compact_books", every(plain, "compact_books")),
+		bench_iter("ingest.compact_books_trusted", every(trusted, "compact_books")),
+		bench_iter("ingest.oi", every(plain, "oi")),
+		bench_iter("ingest.funding", every(plain, "funding")),
+		bench_iter("ingest.index", every(plain, "indexmark")),
+		bench_calls(
+			"ingest.index_build",
+			lambda name, stream: JsonlIndex.load_or_build(root / name, index_log, venue=venue, stream=stream),
+			streams,
+		),
+	]
+	# the indexed adapters load the sidecars built above before the rows below are timed
+	for adapter in (indexed, indexed_trusted):
+		for method in ("books", "oi", "funding", "indexmark"):
+			next(iter(getattr(adapter, method)(symbols[0])), None)
+	results += [
+		bench_iter("ingest.books_indexed", every(indexed, "books")),
+		bench_iter("ingest.compact_books_indexed", every(indexed, "compact_books")),
+		bench_iter("ingest.compact_books_trusted_indexed", every(indexed_trusted, "compact_books")),
+		bench_iter("ingest.oi_indexed", every(indexed, "oi")),
+		bench_iter("ingest.funding_indexed", every(indexed, "funding")),
+		bench_iter("ingest.index_indexed", every(indexed, "indexmark")),
+	]
+
+	raw_books = _load(root / "books.jsonl")
+	raw_oi = _load(root / "oi.jsonl")
+	raw_funding = _load(root / "funding.jsonl")
+	raw_index = _load(root / "index.jsonl")
+	results += [
+		bench_calls("normalize.orderbook", normalize_orderbook, [(r,) for r in raw_books]),
+		bench_calls("normalize.oi", normalize_oi, [(r,) for r in raw_oi]),
+		bench_calls("normalize.funding", normalize_funding, [(r,) for r in raw_funding]),
+		bench_calls("normalize.indexmark", normalize_indexmark, [(r,) for r in raw_index]),
+		bench_calls("schema.OrderBook", lambda r: OrderBook(**r), [(r,) for r in raw_books]),
+		bench_calls("schema.OpenInterest", lambda r: OpenInterest(**r), [(r,) for r in raw_oi]),
+		bench_calls("schema.Funding", lambda r: Funding(**r), [(r,) for r in raw_funding]),
+		bench_calls("schema.IndexMark", lambda r: IndexMark(**r), [(r,) for r in raw_index]),
+	]
+
+	books_a = list(plain.books(symbols[0]))[:signal_calls]
+	books_b = list(plain.books(symbols[-1]))[: len(books_a)]
+	levels = [_pairs(ob) for ob in books_a]
+	steps = list(zip(levels, levels[1:], strict=False))
+	mids = [(_mid(a), _mid(b)) for a, b in zip(books_a, books_b, strict=True)]
+	oi_vals = [r["open_interest"] for r in raw_oi if r["symbol"] == symbols[0]]
+	funding = list(plain.funding(symbols[0]))
+	est = [f.est_rate for f in funding] or [0.0]
+	windows = range(LLCA_WINDOW, len(books_a) + 1)
+	results += [
+		bench_calls("signal.spread_z", core.spread_z, [(a, b, 0.5) for a, b in mids]),
+		bench_calls("signal.depth_weighted_sigma", core.depth_weighted_sigma, levels),
+		bench_calls("signal.lob10_imbalance", core.lob10_imbalance, levels),
+		bench_calls("signal.cancel_velocity", core.cancel_velocity, [(p[0], c[0]) for p, c in steps]),
+		bench_calls("signal.sweep_detector", core.sweep_detector, [(p[0], c[0], p[1], c[1]) for p, c in steps]),
+		bench_calls("signal.oi_delta", core.oi_delta, [(p, c, 1.0) for p, c in zip(oi_vals, oi_vals[1:], strict=False)]),
+		bench_calls(
+			"signal.funding_nowcast",
+			core.funding_nowcast,
+			[(est[i % len(est)], est[max(0, i % len(est) - 4) : i % len(est) + 1], 1e-5, 0.0) for i in range(len(books_a))],
+		),
+		bench_calls(
+			"signal.half_life_pred",
+			core.half_life_pred,
+			[({"z": (a - b) * 10.0, "depth": 20.0, "health": 80.0},) for a, b in mids],
+		),
+		bench_calls(
+			"signal.make_llca_features",
+			core.make_llca_features,
+			[(books_a[i - LLCA_WINDOW : i], books_b[i - LLCA_WINDOW : i], 80.0, 90.0) for i in windows],
+		),
+		bench_calls(
+			"signal.make_hfh_features",
+			core.make_hfh_features,
+			[(funding[max(0, i - HFH_WINDOW) : i], 0.02, 1e-5) for i in range(1, len(funding) + 1)],
+		),
+	]
+	return results
+
+
+def compare(current: Mapping[str, Any], baseline: Mapping[str, Any], threshold: float) -> list[str]:
+	"""Names whose throughput fell more than ``threshold`` (a fraction) below the baseline."""
+	base = {r["name"]: r for r in baseline["results"]}
+	regressions = []
+	for r in current["results"]:
+		ref = base.get(r["name"])
+		if ref and ref["ops_per_s"] > 0 and r["ops_per_s"] < ref["ops_per_s"] * (1.0 - threshold):
+			regressions.append(r["name"])
+	return regressions
+
+
+def _report(results: Sequence[BenchResult], baseline: Mapping[str, Any] | None) -> str:
+	base = {r["name"]: r for r in baseline["results"]} if baseline else {}
+	lines = [f"{'benchmark':38s} {'n':>8s} {'ops/s':>12s} {'p50 us':>9s} {'p99 us':>9s} {'vs base':>8s}"]
+	for r in results:
+		ref = base.get(r.name)
+		delta = f"{r.ops_per_s / ref['ops_per_s'] - 1.0:+8.1%}" if ref and ref["ops_per_s"] > 0 else f"{'-':>8s}"
+		lines.append(f"{r.name:38s} {r.n:8d} {r.ops_per_s:12.0f} {r.p50_us:9.2f} {r.p99_us:9.2f} {delta}")
+	return "\n".join(lines)
+
+
+def benchmark(config: Mapping[str, Any], args: argparse.Namespace) -> int:
+	venue = str(config["venues"][0])
+	symbols = [str(s) for s in config["pairs"]][: args.symbols]
+	with tempfile.TemporaryDirectory(prefix="capstan-bench-") as tmp:
+		root = write_synthetic_venue(Path(tmp) / venue, venue=venue, symbols=symbols, books=args.books, levels=args.levels, seed=args.seed)
+		results = run_benchmark(root, venue, symbols, signal_calls=args.books)
+	out = {
+		"version": BENCH_VERSION,
+		"meta": {
+			"python": platform.python_version(),
+			"numpy": np.__version__,
+			"machine": platform.machine(),
+			"platform": platform.platform(),
+			"books": args.books,
+			"symbols": symbols,
+			"levels": args.levels,
+			"seed": args.seed,
+			"peak_rss_mb": peak_rss_mb(),
+		},
+		"results": [asdict(r) for r in results],
+	}
+	baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+	print(_report(results, baseline))
+	print(f"process peak RSS {out['meta']['peak_rss_mb']:.1f} MB (whole run, includes synthetic data)")
+	args.out.write_text(json.dumps(out, indent=2) + "\n")
+	print(f"wrote {args.out}")
+	if args.save_baseline:
+		args.baseline.parent.mkdir(parents=True, exist_ok=True)
+		args.baseline.write_text(json.dumps(out, indent=2) + "\n")
+		print(f"saved baseline {args.baseline}")
+		return 0
+	if baseline is None:
+		print(f"no baseline at {args.baseline}: regression check skipped (record one with make bench-baseline)")
+		return 0
+	if baseline.get("meta", {}).get("books") != args.books:
+		print("warning: baseline was recorded with a different --books size")
+	regressions = compare(out, baseline, args.threshold)
+	if regressions:
+		print(f"REGRESSION (> {args.threshold:.0%} slower than baseline): {', '.join(regressions)}")
+		return 1
+	return 0
+
+
+def simulate(config: Mapping[str, Any], args: argparse.Namespace) -> int:
+	shards = shards_from_config(config, args.fixtures)
+	results = run_replay(shards, max_workers=args.workers)
+	for (venue, symbol), res in sorted(results.items()):
+		if not len(res):
+			continue
+		cols = res.columns
+		print(
+			f"{venue:8s} {symbol:10s} books={len(res):8d} "
+			f"sigma={float(np.mean(cols['sigma'])):.5f} imbalance={float(np.mean(cols['imbalance'])):+.4f} "
+			f"sweeps={int(np.sum(cols['sweep']))}"
+		)
+	return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="replay fixtures through the signal pipeline, or benchmark it")
+	parser.add_argument("config", type=Path, nargs="?", default=Path("configs/config.yaml"))
+	parser.add_argument("--benchmark", action="store_true", help="run the benchmark suite on synthetic data")
+	parser.add_argument("--books", type=int, default=DEFAULT_BOOKS, help="book ticks per symbol")
+	parser.add_argument("--symbols", type=int, default=2, help="number of config pairs to generate")
+	parser.add_argument("--levels", type=int, default=10)
+	parser.add_argument("--seed", type=int, default=7)
+	parser.add_argument("--out", type=Path, default=DEFAULT_OUTPUT)
+	parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+	parser.add_argument("--save-baseline", action="store_true")
+	parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed throughput drop, as a fraction")
+	parser.add_argument("--fixtures", type=Path, default=Path("tests/fixtures"))
+	parser.add_argument("--workers", type=int, default=None, help="replay processes; 0 runs in-process")
+	args = parser.parse_args(argv)
+	config = load_config(args.config)
+	return benchmark(config, args) if args.benchmark else simulate(config, args)
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import random
+from collections.abc import Sequence
+from pathlib import Path
+
+import orjson
+
+STREAM_FILES = ("books.jsonl", "oi.jsonl", "funding.jsonl", "index.jsonl")
+BOOK_INTERVAL_MS = 100
+SLOW_EVERY = 10  # oi/index every 10th book tick, funding every 100th
+FUNDING_PERIOD_MS = 8 * 3_600_000
+
+
+def write_synthetic_books(
+	path: Path,
+	lines: int,
+	*,
+	levels: int = 10,
+	seed: int = 7,
+	venue: str = "bybit",
+	symbol: str = "BTCUSDT",
+) -> Path:
+	rng = random.Random(seed)
+	mid = 100.0
+	with path.open("w") as f:
+		for i in range(lines):
+			mid += rng.uniform(-0.05, 0.05)
+			rec = {
+				"ts": 1000 + i * BOOK_INTERVAL_MS,
+				"venue": venue,
+				"symbol": symbol,
+				"bids": [{"price": round(mid - 0.05 - 0.1 * k, 2), "qty": round(rng.uniform(0.1, 5.0), 3)} for k in range(levels)],
+				"asks": [{"price": round(mid + 0.05 + 0.1 * k, 2), "qty": round(rng.uniform(0.1, 5.0), 3)} for k in range(levels)],
+				"seq": i + 1,
+			}
+			f.write(json.dumps(rec))
+			f.write("\n")
+	return path
+
+
+def write_synthetic_venue(
+	root: Path,
+	*,
+	venue: str = "bybit",
+	symbols: Sequence[str] = ("BTCUSDT",),
+	books: int = 10_000,
+	levels: int = 10,
+	seed: int = 7,
+) -> Path:
+	"""Write books/oi/funding/index jsonl for ``venue`` under ``root``.
+
+	Output depends only on the arguments. ``books`` is the number of book ticks per
+	symbol; ticks of all symbols are interleaved in ts order like a live capture.
+	"""
+	root.mkdir(parents=True, exist_ok=True)
+	rng = random.Random(f"{seed}:{venue}")
+	mids = {s: 100.0 * (k + 1) for k, s in enumerate(symbols)}
+	ois = {s: 10_000.0 * (k + 1) for k, s in enumerate(symbols)}
+	files = {name: (root / name).open("wb") for name in STREAM_FILES}
+	try:
+		for i in range(books):
+			ts = 1000 + i * BOOK_INTERVAL_MS
+			for symbol in symbols:
+				mid = mids[symbol] = mids[symbol] * (1.0 + rng.gauss(0.0, 2e-4))
+				files["books.jsonl"].write(orjson.dumps(_book(rng, ts, venue, symbol, mid, i + 1, levels)) + b"\n")
+				if i % SLOW_EVERY == 0:
+					oi = ois[symbol] = max(ois[symbol] + rng.gauss(0.0, 25.0), 0.0)
+					oi_rec = {"ts": ts, "venue": venue, "symbol": symbol, "open_interest": round(oi, 2)}
+					files["oi.jsonl"].write(orjson.dumps(oi_rec) + b"\n")
+					spot = mid * (1.0 + rng.gauss(0.0, 1e-4))
+					index_rec = {"ts": ts, "venue": venue, "symbol": symbol, "index": round(spot, 4), "mark": round(mid, 4)}
+					files["index.jsonl"].write(orjson.dumps(index_rec) + b"\n")
+				if i % (SLOW_EVERY * SLOW_EVERY) == 0:
+					rate = round(rng.gauss(1e-4, 5e-5), 8)
+					funding_rec = {
+						"ts": ts,
+						"venue": venue,
+						"symbol": symbol,
+						"next_ts": ts + FUNDING_PERIOD_MS,
+						"est_rate": rate,
+						"term_structure": {"3600": round(rate * 1.1, 8), "28800": round(rate * 0.9, 8)},
+					}
+					files["funding.jsonl"].write(orjson.dumps(funding_rec) + b"\n")
+	finally:
+		for f in files.values():
+			f.close()
+	return root
+
+
+def _book(rng: random.Random, ts: int, venue: str, symbol: str, mid: float, seq: int, levels: int) -> dict[str, object]:
+	tick = mid * 1e-4
+	return {
+		"ts": ts,
+		"venue": venue,
+		"symbol": symbol,
+		"bids": [{"price": round(mid - tick * (k + 0.5), 4), "qty": round(rng.uniform(0.1, 5.0), 3)} for k in range(levels)],
+		"asks": [{"price": round(mid + tick * (k + 0.5), 4), "qty": round(rng.uniform(0.1, 5.0), 3)} for k in range(levels)],
+		"seq": seq,
+	}
@@ -1,5 +1,61 @@
 from __future__ import annotations
 
+import importlib
+from types import ModuleType
+
 __all__ = ["__version__"]
 
-__version__ = "0.1.0" 
\ No newline at end of file
+__version__ = "0.1.0"
+
+# Submodules are loaded on first attribute access (PEP 562) so `import capstan`
+# stays cheap for short-lived CLI and shadow jobs; the ones backed by an
+# optional dependency name the package to install when it is missing.
+_SUBMODULES = frozenset(
+	{
+		"batch",
+		"compact",
+		"config",
+		"conflation",
+		"core",
+		"jsonl",
+		"jsonl_index",
+		"l2book",
+		"latency",
+		"merge",
+		"metrics",
+		"metrics_exporter",
+		"normalizer",
+		"parquet_store",
+		"replay",
+		"scanner",
+		"schemas",
+		"signal_cache",
+		"streaming",
+		"tape",
+		"validation",
+		"venue_adapters",
+		"venue_parsers",
+		"ws_adapter",
+	}
+)
+_OPTIONAL_BACKENDS = {
+	"parquet_store": "duckdb",
+	"ws_adapter": "websockets",
+	"metrics_exporter": "prometheus-client",
+}
+
+
+def __getattr__(name: str) -> ModuleType:
+	if name not in _SUBMODULES:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	try:
+		return importlib.import_module(f"{__name__}.{name}")
+	except ModuleNotFoundError as exc:
+		backend = _OPTIONAL_BACKENDS.get(name)
+		if backend is None or (exc.name or "").startswith(__name__):
+			raise
+		raise ModuleNotFoundError(f"capstan.{name} needs the optional dependency {backend!r}: {exc}", name=exc.name) from exc
+
+
+def __dir__() -> list[str]:
+	return sorted({*globals(), *_SUBMODULES})
@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from capstan.compact import CompactBook
+from capstan.core import DEFAULT_HALF_LIFE, HalfLifeCoefficients
+
+if TYPE_CHECKING:
+	from capstan.schemas import OrderBook
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+BoolArray = npt.NDArray[np.bool_]
+IndexArray = npt.NDArray[np.intp]
+
+# Stacked level arrays are N x L; missing levels have NaN price and 0 qty.
+# Reductions use cumsum(...)[..., -1] so sums accumulate left to right like the
+# scalar functions in capstan.core and give bit-identical results.
+
+
+class BookStack:
+	__slots__ = ("ts", "seq", "bid_px", "bid_qty", "ask_px", "ask_qty")
+
+	def __init__(
+		self,
+		ts: IntArray,
+		seq: IntArray,
+		bid_px: FloatArray,
+		bid_qty: FloatArray,
+		ask_px: FloatArray,
+		ask_qty: FloatArray,
+	) -> None:
+		self.ts = ts
+		self.seq = seq
+		self.bid_px = bid_px
+		self.bid_qty = bid_qty
+		self.ask_px = ask_px
+		self.ask_qty = ask_qty
+
+	@classmethod
+	def from_books(cls, books: Sequence[CompactBook | OrderBook], depth: int | None = None) -> BookStack:
+		compact = [b if isinstance(b, CompactBook) else CompactBook.from_orderbook(b) for b in books]
+		if depth is None:
+			depth = max((max(b.n_bids, b.prices.shape[0] - b.n_bids) for b in compact), default=0)
+		n = len(compact)
+		bid_px = np.full((n, depth), np.nan)
+		ask_px = np.full((n, depth), np.nan)
+		bid_qty = np.zeros((n, depth))
+		ask_qty = np.zeros((n, depth))
+		for i, b in enumerate(compact):
+			nb = min(b.n_bids, depth)
+			na = min(b.prices.shape[0] - b.n_bids, depth)
+			bid_px[i, :nb] = b.bid_px[:nb]
+			bid_qty[i, :nb] = b.bid_qty[:nb]
+			ask_px[i, :na] = b.ask_px[:na]
+			ask_qty[i, :na] = b.ask_qty[:na]
+		ts = np.fromiter((b.ts for b in compact), dtype=np.int64, count=n)
+		seq = np.fromiter((b.seq for b in compact), dtype=np.int64, count=n)
+		return cls(ts, seq, bid_px, bid_qty, ask_px, ask_qty)
+
+	def __len__(self) -> int:
+		return int(self.ts.shape[0])
+
+
+def _seqsum(values: FloatArray) -> FloatArray:
+	if values.shape[-1] == 0:
+		return np.zeros(values.shape[:-1])
+	out: FloatArray = np.cumsum(values, axis=-1)[..., -1]
+	return out
+
+
+def _top(px: FloatArray, qty: FloatArray, top_n: int | None) -> tuple[FloatArray, FloatArray, BoolArray]:
+	px = px[:, :top_n]
+	qty = qty[:, :top_n]
+	return px, qty, ~np.isnan(px)
+
+
+def depth_weighted_sigma_batch(
+	bid_px: FloatArray,
+	bid_qty: FloatArray,
+	ask_px: FloatArray,
+	ask_qty: FloatArray,
+	top_n: int = 10,
+) -> FloatArray:
+	n = bid_px.shape[0]
+	if bid_px.shape[1] == 0 or ask_px.shape[1] == 0:
+		return np.zeros(n)
+	has_both = ~np.isnan(bid_px[:, 0]) & ~np.isnan(ask_px[:, 0])
+	mid = 0.5 * (bid_px[:, :1] + ask_px[:, :1])
+	bp, bq, bm = _top(bid_px, bid_qty, top_n)
+	ap, aq, am = _top(ask_px, ask_qty, top_n)
+	px = np.concatenate([bp, ap], axis=1)
+	mask = np.concatenate([bm, am], axis=1)
+	w = np.where(mask, np.maximum(np.concatenate([bq, aq], axis=1), 0.0), 0.0)
+	d = px - mid
+	with np.errstate(invalid="ignore"):
+		dev = np.where(mask, w * (d * d), 0.0)
+	weights_sum = _seqsum(w)
+	var_sum = _seqsum(dev)
+	ok = has_both & (weights_sum > 0.0)
+	out: FloatArray = np.zeros(n)
+	out[ok] = np.sqrt(var_sum[ok] / weights_sum[ok])
+	return out
+
+
+def lob10_imbalance_batch(
+	bid_px: FloatArray,
+	bid_qty: FloatArray,
+	ask_px: FloatArray,
+	ask_qty: FloatArray,
+) -> FloatArray:
+	_, bq, bm = _top(bid_px, bid_qty, 10)
+	_, aq, am = _top(ask_px, ask_qty, 10)
+	sum_bid = _seqsum(np.where(bm, np.maximum(bq, 0.0), 0.0))
+	sum_ask = _seqsum(np.where(am, np.maximum(aq, 0.0), 0.0))
+	den = sum_bid + sum_ask
+	ok = den > 0.0
+	out: FloatArray = np.zeros(bid_px.shape[0])
+	out[ok] = (sum_bid[ok] - sum_ask[ok]) / den[ok]
+	return out
+
+
+def _aggregate(px: FloatArray, w: FloatArray, valid: BoolArray) -> tuple[FloatArray, BoolArray]:
+	# Sum qty per distinct price (in level order) and flag each price's first level.
+	# Only rows that actually repeat a price need the L x L comparison.
+	agg = w.copy()
+	first = valid.copy()
+	srt = np.sort(px, axis=1)
+	rows = np.flatnonzero(np.any(srt[:, 1:] == srt[:, :-1], axis=1))
+	if rows.size:
+		sub_px, sub_valid = px[rows], valid[rows]
+		same = (sub_px[:, :, None] == sub_px[:, None, :]) & sub_valid[:, None, :]
+		agg[rows] = _seqsum(np.where(same, w[rows][:, None, :], 0.0))
+		earlier = np.tril(np.ones((px.shape[1], px.shape[1]), dtype=bool), k=-1)
+		first[rows] = sub_valid & ~np.any(same & earlier[None, :, :], axis=2)
+	return agg, first
+
+
+# The vectorized level match builds N x L x L temporaries. Rows are processed
+# in blocks of at most this many elements, and ladders deeper than
+# SORTED_CANCEL_DEPTH go through cancel_velocity_sorted row by row, which is
+# O(L log L) per row and faster from about 48 levels on.
+CANCEL_BLOCK_ELEMENTS = 1 << 21
+SORTED_CANCEL_DEPTH = 48
+
+
+def cancel_velocity_batch(
+	prev_px: FloatArray,
+	prev_qty: FloatArray,
+	curr_px: FloatArray,
+	curr_qty: FloatArray,
+	*,
+	price_tolerance: float = 1e-9,
+	top_n: int | None = None,
+) -> FloatArray:
+	n = prev_px.shape[0]
+	width = max(prev_px[:, :top_n].shape[1], curr_px[:, :top_n].shape[1])
+	if width > SORTED_CANCEL_DEPTH:
+		out: FloatArray = np.zeros(n)
+		n_prev = np.count_nonzero(~np.isnan(prev_px), axis=1)
+		n_curr = np.count_nonzero(~np.isnan(curr_px), axis=1)
+		for i in range(n):
+			a, b = int(n_prev[i]), int(n_curr[i])
+			out[i] = cancel_velocity_sorted(
+				prev_px[i, :a], prev_qty[i, :a], curr_px[i, :b], curr_qty[i, :b],
+				price_tolerance=price_tolerance, top_n=top_n,
+			)
+		return out
+	rows = max(1, CANCEL_BLOCK_ELEMENTS // max(1, width * width))
+	if n <= rows:
+		return _cancel_velocity_block(prev_px, prev_qty, curr_px, curr_qty, price_tolerance, top_n)
+	return np.concatenate([
+		_cancel_velocity_block(
+			prev_px[s : s + rows], prev_qty[s : s + rows], curr_px[s : s + rows], curr_qty[s : s + rows],
+			price_tolerance, top_n,
+		)
+		for s in range(0, n, rows)
+	])
+
+
+def _cancel_velocity_block(
+	prev_px: FloatArray,
+	prev_qty: FloatArray,
+	curr_px: FloatArray,
+	curr_qty: FloatArray,
+	price_tolerance: float,
+	top_n: int | None,
+) -> FloatArray:
+	n = prev_px.shape[0]
+	pp, pq, pm = _top(prev_px, prev_qty, top_n)
+	cp, cq, cm = _top(curr_px, curr_qty, top_n)
+	if pp.shape[1] == 0:
+		return np.zeros(n)
+	prev_agg, prev_first = _aggregate(pp, np.where(pm, np.maximum(pq, 0.0), 0.0), pm)
+	prev_total = _seqsum(np.where(prev_first, prev_agg, 0.0))
+	if cp.shape[1] == 0:
+		# nothing left on the curr side: all resting prev qty was removed
+		gone: FloatArray = np.where(prev_total > 0.0, 1.0, 0.0)
+		return gone
+	curr_agg, curr_first = _aggregate(cp, np.where(cm, np.maximum(cq, 0.0), 0.0), cm)
+
+	# An exact price hit wins; otherwise the first distinct curr price within
+	# tolerance, in level order, as cancel_velocity's dict scan does.
+	exact = (pp[:, :, None] == cp[:, None, :]) & curr_first[:, None, :]
+	has = np.any(exact, axis=2)
+	k = np.argmax(exact, axis=2)
+	need = prev_first & ~has
+	rows = np.flatnonzero(np.any(need, axis=1))
+	if rows.size:
+		with np.errstate(invalid="ignore"):
+			near = (np.abs(cp[rows][:, None, :] - pp[rows][:, :, None]) <= price_tolerance) & curr_first[rows][:, None, :]
+		has_near = np.any(near, axis=2) & need[rows]
+		k[rows] = np.where(has_near, np.argmax(near, axis=2), k[rows])
+		has[rows] |= has_near
+	q_curr = np.where(has, np.take_along_axis(curr_agg, k, axis=1), 0.0)
+	removed = _seqsum(np.where(prev_first, np.maximum(prev_agg - q_curr, 0.0), 0.0))
+
+	ok = prev_total > 0.0
+	out: FloatArray = np.zeros(n)
+	out[ok] = np.clip(removed[ok] / prev_total[ok], 0.0, 1.0)
+	return out
+
+
+def _unique_levels(px: FloatArray, qty: FloatArray) -> tuple[FloatArray, FloatArray, IndexArray]:
+	# Distinct prices (ascending), qty summed per price in level order, and the
+	# level index where each price first appears.
+	uniq, first, inverse = np.unique(px, return_index=True, return_inverse=True)
+	agg = np.bincount(inverse.reshape(-1), weights=np.maximum(qty, 0.0), minlength=uniq.shape[0]).astype(np.float64)
+	return uniq, agg, first
+
+
+def _in_tolerance(cu: FloatArray, idx: IndexArray, pu: FloatArray, tol: float) -> BoolArray:
+	ok = (idx >= 0) & (idx < cu.shape[0])
+	out: BoolArray = np.zeros(idx.shape[0], dtype=bool)
+	out[ok] = np.abs(cu[idx[ok]] - pu[ok]) <= tol
+	return out
+
+
+def cancel_velocity_sorted(
+	prev_px: FloatArray,
+	prev_qty: FloatArray,
+	curr_px: FloatArray,
+	curr_qty: FloatArray,
+	*,
+	price_tolerance: float = 1e-9,
+	top_n: int | None = None,
+) -> float:
+	"""``core.cancel_velocity`` for one side in O(n log n).
+
+	Levels are deduplicated with ``np.unique`` and each previous price is matched
+	by ``searchsorted`` instead of a scan over the current ladder. Ties are broken
+	the way the scalar version breaks them, so results are identical.
+	"""
+	pu, pa, pf = _unique_levels(np.asarray(prev_px, dtype=np.float64)[:top_n], np.asarray(prev_qty, dtype=np.float64)[:top_n])
+	if pu.shape[0] == 0:
+		return 0.0
+	order = np.argsort(pf, kind="stable")
+	prev_total = float(np.cumsum(pa[order])[-1])
+	if prev_total <= 0.0:
+		return 0.0
+	cu, ca, cf = _unique_levels(np.asarray(curr_px, dtype=np.float64)[:top_n], np.asarray(curr_qty, dtype=np.float64)[:top_n])
+
+	j = np.searchsorted(cu, pu)
+	hit = np.zeros(pu.shape[0], dtype=bool)
+	if cu.shape[0]:
+		hit = cu[np.minimum(j, cu.shape[0] - 1)] == pu
+	q_curr = np.zeros(pu.shape[0])
+	q_curr[hit] = ca[j[hit]]
+
+	miss = np.flatnonzero(~hit)
+	if miss.size and cu.shape[0] and price_tolerance >= 0.0:
+		p = pu[miss]
+		# fl(|c - p|) is monotone on each side of p, so the matches form a
+		# contiguous run [lo, hi) of cu; nudge the searchsorted bounds onto it.
+		lo = np.searchsorted(cu, p - price_tolerance, side="left")
+		hi = np.searchsorted(cu, p + price_tolerance, side="right")
+		while (step := _in_tolerance(cu, lo - 1, p, price_tolerance)).any():
+			lo -= step
+		while (step := _in_tolerance(cu, hi, p, price_tolerance)).any():
+			hi += step
+		while (step := (lo < hi) & ~_in_tolerance(cu, lo, p, price_tolerance)).any():
+			lo += step
+		while (step := (lo < hi) & ~_in_tolerance(cu, hi - 1, p, price_tolerance)).any():
+			hi -= step
+		for row in np.flatnonzero(hi > lo):
+			run = slice(int(lo[row]), int(hi[row]))
+			q_curr[miss[row]] = ca[run][np.argmin(cf[run])]
+
+	removed = float(np.cumsum(np.maximum(pa - q_curr, 0.0)[order])[-1])
+	vel = removed / prev_total
+	if vel < 0.0:
+		return 0.0
+	if vel > 1.0:
+		return 1.0
+	return vel
+
+
+def cancel_velocity_books(
+	prev: CompactBook,
+	curr: CompactBook,
+	*,
+	side: str = "bids",
+	price_tolerance: float = 1e-9,
+	top_n: int | None = None,
+) -> float:
+	if side == "bids":
+		return cancel_velocity_sorted(prev.bid_px, prev.bid_qty, curr.bid_px, curr.bid_qty, price_tolerance=price_tolerance, top_n=top_n)
+	if side == "asks":
+		return cancel_velocity_sorted(prev.ask_px, prev.ask_qty, curr.ask_px, curr.ask_qty, price_tolerance=price_tolerance, top_n=top_n)
+	raise ValueError(f"unknown side: {side!r}")
+
+
+def sweep_detector_batch(
+	prev_bid_px: FloatArray,
+	curr_bid_px: FloatArray,
+	prev_ask_px: FloatArray,
+	curr_ask_px: FloatArray,
+	*,
+	threshold_bps: float = 10.0,
+) -> BoolArray:
+	n = prev_bid_px.shape[0]
+	if 0 in (prev_bid_px.shape[1], curr_bid_px.shape[1], prev_ask_px.shape[1], curr_ask_px.shape[1]):
+		return np.zeros(n, dtype=bool)
+	pb, cb, pa, ca = prev_bid_px[:, 0], curr_bid_px[:, 0], prev_ask_px[:, 0], curr_ask_px[:, 0]
+	present = ~(np.isnan(pb) | np.isnan(cb) | np.isnan(pa) | np.isnan(ca))
+	prev_mid = 0.5 * (pb + pa)
+	prev_spread = np.maximum(pa - pb, 0.0)
+	curr_spread = np.maximum(ca - cb, 0.0)
+	widened = curr_spread > prev_spread
+	ok = present & (prev_mid > 0.0) & widened
+	out: BoolArray = np.zeros(n, dtype=bool)
+	out[ok] = (curr_spread[ok] - prev_spread[ok]) / prev_mid[ok] * 1e4 >= threshold_bps
+	return out
+
+
+def book_signals(
+	stack: BookStack,
+	*,
+	top_n: int = 10,
+	cancel_top_n: int | None = None,
+	price_tolerance: float = 1e-9,
+	threshold_bps: float = 10.0,
+) -> dict[str, FloatArray | BoolArray]:
+	"""Per-snapshot signals for a time-ordered stack of one symbol's books.
+
+	Change signals compare row i with row i - 1; row 0 gets 0.0 / False.
+	"""
+	n = len(stack)
+	cancel_bids = np.zeros(n)
+	cancel_asks = np.zeros(n)
+	sweep = np.zeros(n, dtype=bool)
+	if n > 1:
+		prev, curr = slice(0, -1), slice(1, None)
+		cancel_bids[1:] = cancel_velocity_batch(
+			stack.bid_px[prev], stack.bid_qty[prev], stack.bid_px[curr], stack.bid_qty[curr],
+			price_tolerance=price_tolerance, top_n=cancel_top_n,
+		)
+		cancel_asks[1:] = cancel_velocity_batch(
+			stack.ask_px[prev], stack.ask_qty[prev], stack.ask_px[curr], stack.ask_qty[curr],
+			price_tolerance=price_tolerance, top_n=cancel_top_n,
+		)
+		sweep[1:] = sweep_detector_batch(
+			stack.bid_px[prev], stack.bid_px[curr], stack.ask_px[prev], stack.ask_px[curr],
+			threshold_bps=threshold_bps,
+		)
+	return {
+		"sigma": depth_weighted_sigma_batch(stack.bid_px, stack.bid_qty, stack.ask_px, stack.ask_qty, top_n),
+		"imbalance": lob10_imbalance_batch(stack.bid_px, stack.bid_qty, stack.ask_px, stack.ask_qty),
+		"cancel_velocity_bids": cancel_bids,
+		"cancel_velocity_asks": cancel_asks,
+		"sweep": sweep,
+	}
+
+
+def funding_nowcast_batch(
+	venue_est: FloatArray,
+	mean_realized: FloatArray,
+	mark_spot_drift: FloatArray | float,
+	leader_momentum: FloatArray,
+	*,
+	w_est: float = 0.5,
+	w_realized: float = 0.2,
+	w_drift: float = 0.1,
+	w_momo: float = 0.2,
+	clamp_abs: float = 0.01,
+) -> FloatArray:
+	blend = w_est * venue_est + w_realized * mean_realized + w_drift * np.asarray(mark_spot_drift, dtype=np.float64) + w_momo * leader_momentum
+	out: FloatArray = np.where(blend > clamp_abs, clamp_abs, np.where(blend < -clamp_abs, -clamp_abs, blend))
+	return out
+
+
+# column order of the half_life_pred_batch features matrix
+HALF_LIFE_COLUMNS = ("z", "depth", "health")
+
+
+def half_life_pred_batch(features: FloatArray, coefs: HalfLifeCoefficients = DEFAULT_HALF_LIFE) -> FloatArray:
+	"""``half_life_pred`` for every row of an N x 3 (z, depth, health) matrix."""
+	x = np.asarray(features, dtype=np.float64)
+	if x.ndim != 2 or x.shape[1] != len(HALF_LIFE_COLUMNS):
+		raise ValueError(f"expected an N x {len(HALF_LIFE_COLUMNS)} {HALF_LIFE_COLUMNS} matrix, got shape {x.shape}")
+	z = _py_min(np.abs(x[:, 0]), coefs.z_cap)
+	depth_thin = 1.0 / (1.0 + _py_max(x[:, 1], 0.0))
+	health_low = 1.0 - _py_max(0.0, _py_min(x[:, 2], 100.0)) / 100.0
+	pred = coefs.base - coefs.z_weight * z + coefs.health_weight * health_low + coefs.depth_weight * depth_thin
+	return _py_max(coefs.floor, _py_min(coefs.cap, pred))
+
+
+# Python's min(a, b)/max(a, b) keep ``a`` unless ``b`` compares smaller/larger,
+# so a NaN ``a`` wins and a NaN ``b`` is ignored; np.minimum/np.fmin would not
+# match that on NaN rows.
+def _py_min(a: FloatArray | float, b: FloatArray | float) -> FloatArray:
+	out: FloatArray = np.where(np.less(b, a), b, a)
+	return out
+
+
+def _py_max(a: FloatArray | float, b: FloatArray | float) -> FloatArray:
+	out: FloatArray = np.where(np.greater(b, a), b, a)
+	return out
+
+
+def hfh_features_series(
+	est_rates: FloatArray,
+	window: int,
+	vol_est: FloatArray | float,
+	mark_spot_drift: FloatArray | float,
+	*,
+	realized_n: int = 5,
+) -> dict[str, FloatArray]:
+	"""``make_hfh_features`` for every prefix-window of one funding series.
+
+	Row i matches ``make_hfh_features(window_i, ...)`` where ``window_i`` is the
+	last ``window`` estimates up to and including i.
+	"""
+	rates = np.asarray(est_rates, dtype=np.float64)
+	n = rates.shape[0]
+	idx = np.arange(n)
+	first = np.maximum(idx - window + 1, 0)
+	count = np.minimum(idx - first + 1, realized_n)
+	acc = np.zeros(n)
+	for back in range(realized_n - 1, -1, -1):
+		src = idx - back
+		take = back < count
+		acc += np.where(take, rates[np.maximum(src, 0)], 0.0)
+	mean_realized = np.zeros(n)
+	np.divide(acc, count, out=mean_realized, where=count > 0)
+	momentum = np.where(idx - first >= 1, rates - rates[first], 0.0) if n else np.zeros(0)
+	return {
+		"E_funding_T": funding_nowcast_batch(rates, mean_realized, mark_spot_drift, momentum),
+		"sigma_T": np.broadcast_to(np.asarray(vol_est, dtype=np.float64), (n,)).copy(),
+	}
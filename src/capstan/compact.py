@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+	from capstan.schemas import OrderBook
+
+FloatArray = npt.NDArray[np.float64]
+
+
+class CompactBook:
+	"""Columnar order book: one float64 array of prices and one of quantities.
+
+	Bids come first (best to worst) followed by asks (best to worst); ``n_bids``
+	marks the split. ``bid_px``/``ask_qty``/... are views, not copies.
+	"""
+
+	__slots__ = ("ts", "venue", "symbol", "seq", "prices", "qtys", "n_bids")
+
+	def __init__(
+		self,
+		ts: int,
+		venue: str,
+		symbol: str,
+		seq: int,
+		prices: FloatArray,
+		qtys: FloatArray,
+		n_bids: int,
+	) -> None:
+		self.ts = ts
+		self.venue = venue
+		self.symbol = symbol
+		self.seq = seq
+		self.prices = prices
+		self.qtys = qtys
+		self.n_bids = n_bids
+
+	@classmethod
+	def from_levels(
+		cls,
+		ts: int,
+		venue: str,
+		symbol: str,
+		seq: int,
+		bids: Sequence[tuple[float, float]],
+		asks: Sequence[tuple[float, float]],
+	) -> CompactBook:
+		levels = np.array([*bids, *asks], dtype=np.float64).reshape(-1, 2)
+		book = cls(ts, venue, symbol, seq, np.ascontiguousarray(levels[:, 0]), np.ascontiguousarray(levels[:, 1]), len(bids))
+		book.check()
+		return book
+
+	@classmethod
+	def from_record(cls, rec: Mapping[str, Any]) -> CompactBook:
+		bids = [(lv["price"], lv["qty"]) for lv in rec["bids"]]
+		asks = [(lv["price"], lv["qty"]) for lv in rec["asks"]]
+		return cls.from_levels(int(rec["ts"]), str(rec["venue"]), str(rec["symbol"]), int(rec["seq"]), bids, asks)
+
+	@classmethod
+	def from_orderbook(cls, ob: OrderBook) -> CompactBook:
+		n = len(ob.bids) + len(ob.asks)
+		prices = np.empty(n, dtype=np.float64)
+		qtys = np.empty(n, dtype=np.float64)
+		for i, level in enumerate((*ob.bids, *ob.asks)):
+			prices[i] = level.price
+			qtys[i] = level.qty
+		return cls(ob.ts, ob.venue, ob.symbol, ob.seq, prices, qtys, len(ob.bids))
+
+	def to_orderbook(self) -> OrderBook:
+		# schemas pulls in pydantic; keep it off the import path of numpy-only users
+		from capstan.schemas import OrderBook, PriceLevel
+
+		return OrderBook(
+			ts=self.ts,
+			venue=self.venue,
+			symbol=self.symbol,
+			bids=[PriceLevel(price=p, qty=q) for p, q in self.bids()],
+			asks=[PriceLevel(price=p, qty=q) for p, q in self.asks()],
+			seq=self.seq,
+		)
+
+	def check(self) -> None:
+		if self.ts < 0 or self.seq < 0:
+			raise ValueError("ts and seq must be >= 0")
+		if self.prices.shape != self.qtys.shape or not 0 <= self.n_bids <= self.prices.shape[0]:
+			raise ValueError("inconsistent level arrays")
+		if not bool(np.all(self.prices > 0.0)):
+			raise ValueError("price must be > 0")
+		if not bool(np.all(self.qtys >= 0.0)):
+			raise ValueError("qty must be >= 0")
+
+	@property
+	def bid_px(self) -> FloatArray:
+		return self.prices[: self.n_bids]
+
+	@property
+	def bid_qty(self) -> FloatArray:
+		return self.qtys[: self.n_bids]
+
+	@property
+	def ask_px(self) -> FloatArray:
+		return self.prices[self.n_bids :]
+
+	@property
+	def ask_qty(self) -> FloatArray:
+		return self.qtys[self.n_bids :]
+
+	def bids(self) -> list[tuple[float, float]]:
+		return list(zip(self.bid_px.tolist(), self.bid_qty.tolist(), strict=True))
+
+	def asks(self) -> list[tuple[float, float]]:
+		return list(zip(self.ask_px.tolist(), self.ask_qty.tolist(), strict=True))
+
+	@property
+	def nbytes(self) -> int:
+		return int(self.prices.nbytes + self.qtys.nbytes)
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, CompactBook):
+			return NotImplemented
+		return (
+			self.ts == other.ts
+			and self.venue == other.venue
+			and self.symbol == other.symbol
+			and self.seq == other.seq
+			and self.n_bids == other.n_bids
+			and np.array_equal(self.prices, other.prices)
+			and np.array_equal(self.qtys, other.qtys)
+		)
+
+	__hash__ = None  # type: ignore[assignment]
+
+	def __repr__(self) -> str:
+		return (
+			f"CompactBook(ts={self.ts}, venue={self.venue!r}, symbol={self.symbol!r}, seq={self.seq}, "
+			f"bids={self.n_bids}, asks={self.prices.shape[0] - self.n_bids})"
+		)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field
+
+from capstan.core import HalfLifeCoefficients
+
+DEFAULT_CONFIG = Path("configs/config.yaml")
+DEFAULT_VENUES = Path("configs/venues.yaml")
+
+
+class RateLimits(BaseModel):
+	model_config = ConfigDict(frozen=True)
+	rest_rps: int = Field(..., gt=0)
+	ws_subs: int = Field(..., gt=0)
+
+
+class VenueConfig(BaseModel):
+	model_config = ConfigDict(frozen=True)
+	name: str
+	rest_base: str
+	ws_base: str
+	taker_fee_bps: float = Field(..., ge=0.0)
+	rate_limits: RateLimits
+
+
+def _read_yaml(path: Path | str) -> Mapping[str, Any]:
+	with Path(path).open("r") as f:
+		data = yaml.safe_load(f)
+	if not isinstance(data, Mapping):
+		raise ValueError(f"{path}: expected a mapping at top level")
+	return data
+
+
+def load_config(path: Path | str = DEFAULT_CONFIG) -> Mapping[str, Any]:
+	return _read_yaml(path)
+
+
+def load_venues(path: Path | str = DEFAULT_VENUES) -> dict[str, VenueConfig]:
+	return {str(name): VenueConfig(name=str(name), **raw) for name, raw in _read_yaml(path).items()}
+
+
+def load_half_life(config: Mapping[str, Any] | None = None) -> HalfLifeCoefficients:
+	"""Coefficients from the ``half_life`` block; missing keys keep their defaults."""
+	if config is None:
+		config = load_config()
+	raw = config.get("half_life") or {}
+	if not isinstance(raw, Mapping):
+		raise ValueError("half_life: expected a mapping")
+	unknown = set(raw) - set(HalfLifeCoefficients.__dataclass_fields__)
+	if unknown:
+		raise ValueError(f"half_life: unknown coefficients {sorted(unknown)}")
+	return HalfLifeCoefficients(**{str(k): float(v) for k, v in raw.items()})
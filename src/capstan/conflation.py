@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Iterator
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+from capstan import metrics
+from capstan.compact import CompactBook
+
+if TYPE_CHECKING:
+	from capstan.schemas import OrderBook
+
+B = TypeVar("B", "OrderBook", CompactBook)
+
+DEFAULT_TOP_N = 10
+
+
+def ladder_key(book: OrderBook | CompactBook, top_n: int | None = DEFAULT_TOP_N) -> Hashable:
+	"""Exact key of the top ``top_n`` bid and ask levels; ``ts`` and ``seq`` are ignored."""
+	if isinstance(book, CompactBook):
+		return (
+			book.bid_px[:top_n].tobytes(),
+			book.bid_qty[:top_n].tobytes(),
+			book.ask_px[:top_n].tobytes(),
+			book.ask_qty[:top_n].tobytes(),
+		)
+	return (
+		tuple((lv.price, lv.qty) for lv in book.bids[:top_n]),
+		tuple((lv.price, lv.qty) for lv in book.asks[:top_n]),
+	)
+
+
+class BookDeduper:
+	"""Drops books whose top-N ladder equals the previous one for the same venue/symbol.
+
+	Drops are counted in ``books_deduped_total``.
+	"""
+
+	def __init__(self, top_n: int | None = DEFAULT_TOP_N) -> None:
+		self.top_n = top_n
+		self._last: dict[tuple[str, str], Hashable] = {}
+
+	def accept(self, book: OrderBook | CompactBook) -> bool:
+		key = (book.venue, book.symbol)
+		ladder = ladder_key(book, self.top_n)
+		if self._last.get(key) == ladder:
+			metrics.inc("books_deduped_total", book.venue, "books")
+			return False
+		self._last[key] = ladder
+		return True
+
+	def reset(self) -> None:
+		self._last.clear()
+
+
+class BookConflator(Generic[B]):
+	"""Keeps only the latest book per ``interval_ms`` bucket of ts, per venue/symbol.
+
+	A bucket's book is released once the clock passes the end of the bucket:
+	``tick(now_ms)`` advances the clock explicitly and ``push`` advances it to the
+	pushed book's ts, so a quiet venue/symbol is released by traffic on any other
+	one. Released books come out in ts order, and for ts-ordered input the output
+	is ts-ordered across venue/symbols. ``flush`` drains what is left. Replaced
+	books are counted in ``books_conflated_total``.
+	"""
+
+	def __init__(self, interval_ms: int) -> None:
+		if interval_ms <= 0:
+			raise ValueError("interval_ms must be > 0")
+		self.interval_ms = interval_ms
+		self._pending: dict[tuple[str, str], tuple[int, B]] = {}
+		# smallest bucket end among pending books, so tick() is O(1) until one is due
+		self._next_end: int | None = None
+
+	def push(self, book: B) -> list[B]:
+		"""Add ``book``; returns the books it released, oldest first."""
+		out = self.tick(book.ts)
+		key = (book.venue, book.symbol)
+		bucket = book.ts // self.interval_ms
+		pending = self._pending.get(key)
+		if pending is not None:
+			if pending[0] == bucket:
+				metrics.inc("books_conflated_total", book.venue, "books")
+			else:
+				# only reachable when book is older than the pending one
+				out.append(pending[1])
+		self._pending[key] = (bucket, book)
+		end = (bucket + 1) * self.interval_ms
+		if self._next_end is None or end < self._next_end:
+			self._next_end = end
+		return out
+
+	def tick(self, now_ms: int) -> list[B]:
+		"""Release every pending book whose bucket ended at or before ``now_ms``, oldest first."""
+		if self._next_end is None or now_ms < self._next_end:
+			return []
+		interval = self.interval_ms
+		due = [key for key, (bucket, _book) in self._pending.items() if (bucket + 1) * interval <= now_ms]
+		out = sorted((self._pending.pop(key)[1] for key in due), key=lambda b: b.ts)
+		self._next_end = min(((bucket + 1) * interval for bucket, _book in self._pending.values()), default=None)
+		return out
+
+	def flush(self) -> list[B]:
+		out = sorted((book for _bucket, book in self._pending.values()), key=lambda b: b.ts)
+		self._pending.clear()
+		self._next_end = None
+		return out
+
+
+def dedup_books(books: Iterable[B], *, top_n: int | None = DEFAULT_TOP_N) -> Iterator[B]:
+	deduper = BookDeduper(top_n)
+	for book in books:
+		if deduper.accept(book):
+			yield book
+
+
+def conflate_books(books: Iterable[B], *, interval_ms: int) -> Iterator[B]:
+	conflator: BookConflator[B] = BookConflator(interval_ms)
+	for book in books:
+		yield from conflator.push(book)
+	yield from conflator.flush()
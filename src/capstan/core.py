@@ -2,9 +2,15 @@ from __future__ import annotations
 
 import math
 from collections.abc import Sequence
+from dataclasses import dataclass
 from statistics import pstdev
+from typing import TYPE_CHECKING
 
-from capstan.schemas import Funding, OrderBook
+from capstan import latency
+
+if TYPE_CHECKING:
+    from capstan.schemas import Funding, OrderBook
+    from capstan.signal_cache import BookSignalCache
 
 
 def spread_z(price_a: float, price_b: float, sigma_spread: float) -> float:
@@ -13,6 +19,7 @@ def spread_z(price_a: float, price_b: float, sigma_spread: float) -> float:
     return (price_a - price_b) / sigma_spread
 
 
+@latency.timed("signal", "depth_weighted_sigma")
 def depth_weighted_sigma(
     bids: Sequence[tuple[float, float]],
     asks: Sequence[tuple[float, float]],
@@ -25,19 +32,24 @@ def depth_weighted_sigma(
     mid = 0.5 * (best_bid + best_ask)
     weights_sum = 0.0
     var_sum = 0.0
+    # d * d rather than d ** 2: pow() is not always correctly rounded, and the
+    # numpy batch version squares by multiplication
     for price, qty in list(bids)[:top_n]:
         w = max(float(qty), 0.0)
         weights_sum += w
-        var_sum += w * (float(price) - mid) ** 2
+        d = float(price) - mid
+        var_sum += w * (d * d)
     for price, qty in list(asks)[:top_n]:
         w = max(float(qty), 0.0)
         weights_sum += w
-        var_sum += w * (float(price) - mid) ** 2
+        d = float(price) - mid
+        var_sum += w * (d * d)
     if weights_sum <= 0.0:
         return 0.0
     return math.sqrt(var_sum / weights_sum)
 
 
+@latency.timed("signal", "lob10_imbalance")
 def lob10_imbalance(
     bids: Sequence[tuple[float, float]],
     asks: Sequence[tuple[float, float]],
@@ -50,6 +62,7 @@ def lob10_imbalance(
     return (sum_bid - sum_ask) / den
 
 
+@latency.timed("signal", "cancel_velocity")
 def cancel_velocity(
     prev: Sequence[tuple[float, float]],
     curr: Sequence[tuple[float, float]],
@@ -89,6 +102,7 @@ def cancel_velocity(
     return vel
 
 
+@latency.timed("signal", "sweep_detector")
 def sweep_detector(
     prev_bids: Sequence[tuple[float, float]],
     curr_bids: Sequence[tuple[float, float]],
@@ -118,6 +132,7 @@ def sweep_detector(
     return widened and widen_bps >= threshold_bps
 
 
+@latency.timed("signal", "oi_delta")
 def oi_delta(prev_oi: float, curr_oi: float, dt_sec: float) -> tuple[float, float]:
     delta = float(curr_oi) - float(prev_oi)
     if dt_sec <= 0.0:
@@ -125,6 +140,7 @@ def oi_delta(prev_oi: float, curr_oi: float, dt_sec: float) -> tuple[float, floa
     return delta, delta / float(dt_sec)
 
 
+@latency.timed("signal", "funding_nowcast")
 def funding_nowcast(
     venue_est: float,
     recent_realized: Sequence[float],
@@ -155,23 +171,51 @@ def funding_nowcast(
     return blend
 
 
-def half_life_pred(features: dict[str, float]) -> float:
+@dataclass(frozen=True, slots=True)
+class HalfLifeCoefficients:
+    """Weights of the ``half_life_pred`` linear model; defaults are the original constants."""
+
+    base: float = 3.0
+    z_weight: float = 0.8
+    z_cap: float = 5.0
+    health_weight: float = 2.0
+    depth_weight: float = 2.0
+    default_health: float = 80.0
+    floor: float = 0.1
+    cap: float = 10.0
+
+
+DEFAULT_HALF_LIFE = HalfLifeCoefficients()
+
+
+@latency.timed("signal", "half_life_pred")
+def half_life_pred(
+    features: dict[str, float], coefs: HalfLifeCoefficients = DEFAULT_HALF_LIFE
+) -> float:
     z = abs(float(features.get("z", 0.0)))
     depth = max(float(features.get("depth", 0.0)), 0.0)
-    health = float(features.get("health", 80.0))
+    health = float(features.get("health", coefs.default_health))
 
     health_low = 1.0 - max(0.0, min(health, 100.0)) / 100.0
     depth_thin = 1.0 / (1.0 + depth)
-    base = 3.0
-    pred = base - 0.8 * min(z, 5.0) + 2.0 * health_low + 2.0 * depth_thin
-    return max(0.1, min(10.0, pred))
+    pred = (
+        coefs.base
+        - coefs.z_weight * min(z, coefs.z_cap)
+        + coefs.health_weight * health_low
+        + coefs.depth_weight * depth_thin
+    )
+    return max(coefs.floor, min(coefs.cap, pred))
 
 
+@latency.timed("signal", "make_llca_features")
 def make_llca_features(
     books_a: Sequence[OrderBook],
     books_b: Sequence[OrderBook],
     health_a: float,
     health_b: float,
+    *,
+    cache: BookSignalCache | None = None,
+    live: bool = False,
 ) -> dict[str, float]:
     if not books_a or not books_b:
         return {
@@ -191,27 +235,37 @@ def make_llca_features(
             else 0.0
         )
 
-    spreads: list[float] = []
-    for ob_a, ob_b in zip(books_a, books_b, strict=False):
-        spreads.append(_mid(ob_a) - _mid(ob_b))
-    sigma = pstdev(spreads) if len(spreads) > 1 else 0.0
-    z = spread_z(_mid(books_a[-1]), _mid(books_b[-1]), sigma)
-
     def _depth(ob: OrderBook) -> float:
         bid_qty_sum = sum(level.qty for level in ob.bids[:10])
         ask_qty_sum = sum(level.qty for level in ob.asks[:10])
         return float(bid_qty_sum + ask_qty_sum)
 
-    depth_a = _depth(books_a[-1])
-    depth_b = _depth(books_b[-1])
-    depth_ratio = depth_a / depth_b if depth_b > 0.0 else 0.0
-
     def _imb(ob: OrderBook) -> float:
         b = [(level.price, level.qty) for level in ob.bids]
         a = [(level.price, level.qty) for level in ob.asks]
         return lob10_imbalance(b, a)
 
-    imbalance = 0.5 * (_imb(books_a[-1]) + _imb(books_b[-1]))
+    if cache is not None:
+        # window mids are shared by every pair that reads the same venue window
+        mids_a = cache.mids(books_a)
+        mids_b = cache.mids(books_b)
+        spreads = [a - b for a, b in zip(mids_a, mids_b, strict=False)]
+        sigma = pstdev(spreads) if len(spreads) > 1 else 0.0
+        z = spread_z(mids_a[-1], mids_b[-1], sigma)
+        last_a = cache.get(books_a[-1])
+        last_b = cache.get(books_b[-1])
+        depth_a, depth_b = last_a.depth, last_b.depth
+        imbalance = 0.5 * (last_a.imbalance + last_b.imbalance)
+    else:
+        spreads = []
+        for ob_a, ob_b in zip(books_a, books_b, strict=False):
+            spreads.append(_mid(ob_a) - _mid(ob_b))
+        sigma = pstdev(spreads) if len(spreads) > 1 else 0.0
+        z = spread_z(_mid(books_a[-1]), _mid(books_b[-1]), sigma)
+        depth_a = _depth(books_a[-1])
+        depth_b = _depth(books_b[-1])
+        imbalance = 0.5 * (_imb(books_a[-1]) + _imb(books_b[-1]))
+    depth_ratio = depth_a / depth_b if depth_b > 0.0 else 0.0
 
     def _rate(books: Sequence[OrderBook]) -> float:
         if len(books) < 2:
@@ -221,6 +275,10 @@ def make_llca_features(
 
     update_rate = 0.5 * (_rate(books_a) + _rate(books_b))
     health_min = float(min(health_a, health_b))
+    if live:
+        # book age at signal time; meaningless on replayed history
+        latency.record_age(books_a[-1].venue, "books", books_a[-1].ts)
+        latency.record_age(books_b[-1].venue, "books", books_b[-1].ts)
     return {
         "z": float(z),
         "depth_ratio": float(depth_ratio),
@@ -230,10 +288,13 @@ def make_llca_features(
     }
 
 
+@latency.timed("signal", "make_hfh_features")
 def make_hfh_features(
     funding_window: Sequence[Funding],
     vol_est: float,
     mark_spot_drift: float,
+    *,
+    live: bool = False,
 ) -> dict[str, float]:
     venue_est = float(funding_window[-1].est_rate) if funding_window else 0.0
     realized = (
@@ -248,4 +309,6 @@ def make_hfh_features(
         mark_spot_drift=mark_spot_drift,
         leader_momentum=momo,
     )
+    if live and funding_window:
+        latency.record_age(funding_window[-1].venue, "funding", funding_window[-1].ts)
     return {"E_funding_T": float(E_funding_T), "sigma_T": float(vol_est)}
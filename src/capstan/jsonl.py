@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+from capstan import metrics
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def iter_lines(path: Path, *, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[tuple[int, int, memoryview]]:
+	"""Yield ``(line_no, offset, line)`` for every line of ``path``.
+
+	The file is read in binary blocks of ``block_size`` bytes and lines are
+	memoryview slices of the block (without the trailing newline), so no str or
+	per-line bytes copies are made. A view is only valid until the next item.
+	"""
+	line_no = 0
+	base = 0
+	tail = b""
+	with path.open("rb") as f:
+		while True:
+			chunk = f.read(block_size)
+			if not chunk:
+				break
+			buf = tail + chunk if tail else chunk
+			view = memoryview(buf)
+			start = 0
+			while True:
+				end = buf.find(b"\n", start)
+				if end < 0:
+					break
+				line_no += 1
+				yield line_no, base + start, view[start:end]
+				start = end + 1
+			tail = buf[start:]
+			base += start
+	if tail:
+		yield line_no + 1, base, memoryview(tail)
+
+
+def iter_objects(
+	path: Path,
+	logger: logging.Logger,
+	*,
+	venue: str,
+	stream: str,
+	block_size: int = DEFAULT_BLOCK_SIZE,
+	skipped: list[int] | None = None,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+	"""Decode every line of ``path`` with orjson, yielding ``(offset, record)``.
+
+	Blank lines are ignored; lines that are not a JSON object are logged, counted
+	in ``records_skipped_total`` (and in ``skipped[0]`` when given) and skipped.
+	"""
+	for line_no, offset, line in iter_lines(path, block_size=block_size):
+		try:
+			data = orjson.loads(line)
+		except orjson.JSONDecodeError as exc:
+			if not bytes(line).strip():
+				continue
+			logger.warning("skip invalid jsonl at %s:%s: %s", path, line_no, exc)
+			metrics.inc("records_skipped_total", venue, stream)
+			if skipped is not None:
+				skipped[0] += 1
+			continue
+		if not isinstance(data, dict):
+			logger.warning("skip invalid jsonl at %s:%s: %s", path, line_no, "expected object")
+			metrics.inc("records_skipped_total", venue, stream)
+			if skipped is not None:
+				skipped[0] += 1
+			continue
+		yield offset, data
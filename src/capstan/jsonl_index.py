@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+import os
+from bisect import bisect_left
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+from capstan import metrics
+from capstan.jsonl import iter_objects
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 2
+
+
+class JsonlIndex:
+	"""Per-symbol (ts, byte offset) index of a jsonl file, kept in a sidecar.
+
+	Entries for each symbol are sorted by ts (file order for equal ts), so a range
+	lookup is a bisect plus one seek per matching line. The sidecar records the
+	size and mtime of the file it was built from and is rebuilt when either changes.
+	It also keeps how many lines the build skipped, so ``load_or_build`` reports
+	them in ``records_skipped_total`` whether it builds or loads the index.
+	"""
+
+	def __init__(
+		self,
+		path: Path,
+		size: int,
+		mtime_ns: int,
+		symbols: dict[str, tuple[list[int], list[int]]],
+		skipped: int = 0,
+	) -> None:
+		self.path = path
+		self.size = size
+		self.mtime_ns = mtime_ns
+		self.symbols = symbols
+		self.skipped = skipped
+
+	@staticmethod
+	def sidecar(path: Path) -> Path:
+		return path.with_name(path.name + INDEX_SUFFIX)
+
+	@classmethod
+	def build(cls, path: Path, logger: logging.Logger, *, venue: str, stream: str) -> JsonlIndex:
+		st = path.stat()
+		entries: dict[str, list[tuple[int, int]]] = {}
+		skipped = [0]
+		for offset, data in iter_objects(path, logger, venue=venue, stream=stream, skipped=skipped):
+			try:
+				ts = int(data.get("ts", 0))
+			except (TypeError, ValueError) as exc:
+				logger.warning("skip invalid jsonl at %s@%s: %s", path, offset, exc)
+				metrics.inc("records_skipped_total", venue, stream)
+				skipped[0] += 1
+				continue
+			symbol = data.get("symbol")
+			if isinstance(symbol, str):
+				entries.setdefault(symbol, []).append((ts, offset))
+		symbols: dict[str, tuple[list[int], list[int]]] = {}
+		for symbol, pairs in entries.items():
+			pairs.sort()
+			symbols[symbol] = ([ts for ts, _ in pairs], [off for _, off in pairs])
+		return cls(path, st.st_size, st.st_mtime_ns, symbols, skipped[0])
+
+	@classmethod
+	def load(cls, path: Path) -> JsonlIndex | None:
+		try:
+			raw = orjson.loads(cls.sidecar(path).read_bytes())
+			st = path.stat()
+			if raw.get("version") != INDEX_VERSION or raw["size"] != st.st_size or raw["mtime_ns"] != st.st_mtime_ns:
+				return None
+			symbols = {sym: (list(v["ts"]), list(v["offsets"])) for sym, v in raw["symbols"].items()}
+			skipped = int(raw["skipped"])
+		except (OSError, ValueError, KeyError, TypeError, AttributeError):
+			return None
+		return cls(path, raw["size"], raw["mtime_ns"], symbols, skipped)
+
+	@classmethod
+	def load_or_build(cls, path: Path, logger: logging.Logger, *, venue: str, stream: str) -> JsonlIndex:
+		index = cls.load(path)
+		if index is not None:
+			if index.skipped:
+				metrics.inc("records_skipped_total", venue, stream, index.skipped)
+			return index
+		index = cls.build(path, logger, venue=venue, stream=stream)
+		try:
+			index.save()
+		except OSError as exc:
+			logger.warning("could not write jsonl index for %s: %s", path, exc)
+		return index
+
+	def save(self) -> None:
+		raw: dict[str, Any] = {
+			"version": INDEX_VERSION,
+			"size": self.size,
+			"mtime_ns": self.mtime_ns,
+			"skipped": self.skipped,
+			"symbols": {sym: {"ts": ts, "offsets": offs} for sym, (ts, offs) in self.symbols.items()},
+		}
+		dest = self.sidecar(self.path)
+		tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+		tmp.write_bytes(orjson.dumps(raw))
+		os.replace(tmp, dest)
+
+	def is_current(self) -> bool:
+		try:
+			st = self.path.stat()
+		except OSError:
+			return False
+		return st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+	def offsets(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> list[int]:
+		entry = self.symbols.get(symbol)
+		if entry is None:
+			return []
+		ts, offs = entry
+		lo = 0 if start_ts is None else bisect_left(ts, start_ts)
+		hi = len(ts) if end_ts is None else bisect_left(ts, end_ts)
+		return offs[lo:hi]
+
+	def iter_records(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[dict[str, Any]]:
+		offsets = self.offsets(symbol, start_ts, end_ts)
+		if not offsets:
+			return
+		with self.path.open("rb") as f:
+			for off in offsets:
+				f.seek(off)
+				yield orjson.loads(f.readline())
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left, insort
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from itertools import chain, islice
+from typing import Any, overload
+
+from capstan import metrics
+from capstan.compact import CompactBook
+from capstan.schemas import OrderBook, PriceLevel
+
+ResyncCallback = Callable[[str, str, int, int], None]
+
+# ladder keys live in sorted blocks of _LOAD to 2 * _LOAD keys
+_LOAD = 64
+
+
+def _pair(level: Any) -> tuple[float, float]:
+	if isinstance(level, Mapping):
+		return float(level["price"]), float(level["qty"])
+	price, qty = level[0], level[1]
+	return float(price), float(qty)
+
+
+def _levels(levels: Iterable[Any]) -> list[tuple[float, float]]:
+	out = [_pair(level) for level in levels]
+	for price, qty in out:
+		if not price > 0.0 or qty != qty:
+			raise ValueError(f"invalid level ({price}, {qty})")
+	return out
+
+
+class _Ladder:
+	# Keys are sorted best-first (asks by price, bids by negated price) and split
+	# into blocks; maxes[b] is the last key of blocks[b]. A lookup bisects maxes
+	# and then one block, and an insert or delete shifts only that block.
+	__slots__ = ("sign", "blocks", "maxes", "qty")
+
+	def __init__(self, sign: float) -> None:
+		self.sign = sign
+		self.blocks: list[list[float]] = []
+		self.maxes: list[float] = []
+		self.qty: dict[float, float] = {}
+
+	def __len__(self) -> int:
+		return len(self.qty)
+
+	def set(self, price: float, qty: float) -> None:
+		key = self.sign * price
+		if qty <= 0.0:
+			if self.qty.pop(price, None) is not None:
+				self._remove(key)
+			return
+		if price not in self.qty:
+			self._insert(key)
+		self.qty[price] = qty
+
+	def _insert(self, key: float) -> None:
+		blocks, maxes = self.blocks, self.maxes
+		if not maxes:
+			blocks.append([key])
+			maxes.append(key)
+			return
+		b = bisect_left(maxes, key)
+		if b == len(maxes):
+			b -= 1
+			blocks[b].append(key)
+			maxes[b] = key
+		else:
+			insort(blocks[b], key)
+		block = blocks[b]
+		if len(block) > 2 * _LOAD:
+			blocks.insert(b + 1, block[_LOAD:])
+			del block[_LOAD:]
+			maxes.insert(b, block[-1])
+
+	def _remove(self, key: float) -> None:
+		b = bisect_left(self.maxes, key)
+		block = self.blocks[b]
+		del block[bisect_left(block, key)]
+		if block:
+			self.maxes[b] = block[-1]
+		else:
+			del self.blocks[b]
+			del self.maxes[b]
+
+	def clear(self) -> None:
+		self.blocks.clear()
+		self.maxes.clear()
+		self.qty.clear()
+
+	def level(self, i: int) -> tuple[float, float]:
+		for block in self.blocks:
+			if i < len(block):
+				price = self.sign * block[i]
+				return price, self.qty[price]
+			i -= len(block)
+		raise IndexError(i)
+
+	def head(self, n: int) -> Iterator[tuple[float, float]]:
+		sign, qty = self.sign, self.qty
+		for key in islice(chain.from_iterable(self.blocks), n):
+			price = sign * key
+			yield price, qty[price]
+
+
+class LadderView(Sequence[tuple[float, float]]):
+	"""Best-first ``(price, qty)`` view of one side, capped at ``top_n`` levels.
+
+	Reads the live ladder without copying it, so it can be passed straight to the
+	``capstan.core`` signals. The view is invalidated by the next update to its
+	book; using it afterwards raises ``RuntimeError``.
+	"""
+
+	__slots__ = ("_book", "_ladder", "_top_n", "_version")
+
+	def __init__(self, book: LocalBook, ladder: _Ladder, top_n: int | None) -> None:
+		self._book = book
+		self._ladder = ladder
+		self._top_n = top_n
+		self._version = book.version
+
+	def _check(self) -> None:
+		if self._book.version != self._version:
+			raise RuntimeError("ladder view used after its book changed")
+
+	def __len__(self) -> int:
+		self._check()
+		n = len(self._ladder)
+		return n if self._top_n is None else min(n, self._top_n)
+
+	@overload
+	def __getitem__(self, i: int) -> tuple[float, float]: ...
+
+	@overload
+	def __getitem__(self, i: slice) -> list[tuple[float, float]]: ...
+
+	def __getitem__(self, i: int | slice) -> tuple[float, float] | list[tuple[float, float]]:
+		n = len(self)
+		if isinstance(i, slice):
+			start, stop, step = i.indices(n)
+			if step > 0:
+				return list(islice(self._ladder.head(stop), start, None, step))
+			return [self._ladder.level(k) for k in range(start, stop, step)]
+		if i < 0:
+			i += n
+		if not 0 <= i < n:
+			raise IndexError(i)
+		return self._ladder.level(i)
+
+	def __iter__(self) -> Iterator[tuple[float, float]]:
+		return self._ladder.head(len(self))
+
+
+class LocalBook:
+	"""Sorted bid/ask ladders for one (venue, symbol), maintained from L2 deltas.
+
+	A qty change on an existing level is a dict write. Adding or removing a
+	level bisects the block index and one block of at most 128 sorted keys, so
+	it is O(log n) in the ladder depth plus a bounded shift. Every level of an
+	update is parsed and checked (price > 0, qty not NaN) before either ladder
+	changes, so a bad level raises and leaves the book as it was. Snapshots are
+	only materialised when asked for and are cached until the next update.
+	"""
+
+	def __init__(self, venue: str, symbol: str) -> None:
+		self.venue = venue
+		self.symbol = symbol
+		self.ts = 0
+		self.seq = -1
+		self.synced = False
+		# set once a resync was requested for the current out-of-sync episode
+		self.resync_pending = False
+		self.version = 0
+		self._bids = _Ladder(-1.0)
+		self._asks = _Ladder(1.0)
+		self._snapshots: dict[int | None, OrderBook] = {}
+		self._compacts: dict[int | None, CompactBook] = {}
+
+	def apply_snapshot(self, ts: int, seq: int, bids: Iterable[Any], asks: Iterable[Any]) -> None:
+		self._update(ts, seq, bids, asks, clear=True)
+		self.synced = True
+		self.resync_pending = False
+
+	def apply_delta(self, ts: int, seq: int, bids: Iterable[Any], asks: Iterable[Any]) -> bool:
+		"""Apply one delta; returns False when it was not applied.
+
+		A delta is applied only if it continues the sequence (``seq == self.seq + 1``).
+		Older deltas are ignored; a gap marks the book out of sync until the next
+		snapshot. Deltas reaching an out-of-sync book, including one that never
+		had a snapshot, are counted in ``deltas_unsynced_total``.
+		"""
+		if not self.synced:
+			metrics.inc("deltas_unsynced_total", self.venue, "books")
+			return False
+		if seq <= self.seq:
+			metrics.inc("deltas_stale_total", self.venue, "books")
+			return False
+		if seq != self.seq + 1:
+			metrics.inc("seq_gaps_total", self.venue, "books")
+			self.synced = False
+			return False
+		self._update(ts, seq, bids, asks)
+		return True
+
+	def _update(self, ts: int, seq: int, bids: Iterable[Any], asks: Iterable[Any], *, clear: bool = False) -> None:
+		bid_levels = _levels(bids)
+		ask_levels = _levels(asks)
+		if clear:
+			self._bids.clear()
+			self._asks.clear()
+		for price, qty in bid_levels:
+			self._bids.set(price, qty)
+		for price, qty in ask_levels:
+			self._asks.set(price, qty)
+		self.ts = ts
+		self.seq = seq
+		self.version += 1
+		self._snapshots.clear()
+		self._compacts.clear()
+
+	def bids(self, top_n: int | None = None) -> LadderView:
+		return LadderView(self, self._bids, top_n)
+
+	def asks(self, top_n: int | None = None) -> LadderView:
+		return LadderView(self, self._asks, top_n)
+
+	def snapshot(self, top_n: int | None = None) -> OrderBook:
+		ob = self._snapshots.get(top_n)
+		if ob is None:
+			ob = self._snapshots[top_n] = OrderBook(
+				ts=max(self.ts, 0),
+				venue=self.venue,
+				symbol=self.symbol,
+				bids=[PriceLevel(price=p, qty=q) for p, q in self.bids(top_n)],
+				asks=[PriceLevel(price=p, qty=q) for p, q in self.asks(top_n)],
+				seq=max(self.seq, 0),
+			)
+		return ob
+
+	def compact(self, top_n: int | None = None) -> CompactBook:
+		book = self._compacts.get(top_n)
+		if book is None:
+			book = self._compacts[top_n] = CompactBook.from_levels(
+				max(self.ts, 0), self.venue, self.symbol, max(self.seq, 0), list(self.bids(top_n)), list(self.asks(top_n))
+			)
+		return book
+
+
+class BookEngine:
+	"""Routes snapshot/delta messages to a ``LocalBook`` per (venue, symbol).
+
+	Messages carry ``type`` ("snapshot" or "delta"), ``venue``, ``symbol``, ``ts``,
+	``seq`` and ``bids``/``asks`` as ``{"price", "qty"}`` mappings or
+	``[price, qty]`` pairs; qty 0 deletes a level. On a sequence gap
+	``on_resync(venue, symbol, expected_seq, got_seq)`` is called once and the
+	book ignores deltas until a fresh snapshot arrives. A delta for a book that
+	has never had a snapshot also calls it once, with ``expected_seq`` -1.
+	A message with a malformed level raises before its book is changed.
+	"""
+
+	def __init__(self, on_resync: ResyncCallback | None = None) -> None:
+		self.on_resync = on_resync
+		self.logger = logging.getLogger("capstan.l2book")
+		self._books: dict[tuple[str, str], LocalBook] = {}
+
+	def book(self, venue: str, symbol: str) -> LocalBook:
+		key = (venue, symbol)
+		book = self._books.get(key)
+		if book is None:
+			book = self._books[key] = LocalBook(venue, symbol)
+		return book
+
+	def __iter__(self) -> Iterator[LocalBook]:
+		return iter(self._books.values())
+
+	def apply(self, msg: Mapping[str, Any]) -> LocalBook:
+		book = self.book(str(msg["venue"]), str(msg["symbol"]))
+		ts = int(msg["ts"])
+		seq = int(msg["seq"])
+		bids = msg.get("bids") or ()
+		asks = msg.get("asks") or ()
+		if msg.get("type", "delta") == "snapshot":
+			book.apply_snapshot(ts, seq, bids, asks)
+			return book
+		was_synced = book.synced
+		expected = book.seq + 1 if was_synced else -1
+		if book.apply_delta(ts, seq, bids, asks) or book.synced or book.resync_pending:
+			return book
+		if was_synced:
+			self.logger.warning("seq gap on %s/%s: expected %s, got %s", book.venue, book.symbol, expected, seq)
+		else:
+			self.logger.warning("delta before snapshot on %s/%s: seq %s", book.venue, book.symbol, seq)
+		book.resync_pending = True
+		if self.on_resync is not None:
+			self.on_resync(book.venue, book.symbol, expected, seq)
+		return book
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+T = TypeVar("T")
+
+Key = tuple[str, str, str]
+
+# Bits kept per bucket: 7 -> values are recorded within 2**-6 (about 1.6%).
+DEFAULT_SIGNIFICANT_BITS = 7
+REPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+ALL_VENUES = "all"
+
+_enabled = os.environ.get("CAPSTAN_LATENCY", "") not in ("", "0")
+
+
+class LatencyHistogram:
+	"""HDR-style log-linear histogram of integer nanosecond values.
+
+	A value keeps its top ``significant_bits`` bits, so the relative error is at
+	most ``2**-(significant_bits - 1)`` at any magnitude and the range is unbounded.
+	Buckets are kept sparse, keyed by their lowest value.
+	"""
+
+	__slots__ = ("significant_bits", "counts", "count", "total", "max")
+
+	def __init__(self, significant_bits: int = DEFAULT_SIGNIFICANT_BITS) -> None:
+		self.significant_bits = significant_bits
+		self.counts: dict[int, int] = {}
+		self.count = 0
+		self.total = 0
+		self.max = 0
+
+	def record(self, ns: int) -> None:
+		if ns < 0:
+			ns = 0
+		shift = ns.bit_length() - self.significant_bits
+		key = (ns >> shift) << shift if shift > 0 else ns
+		self.counts[key] = self.counts.get(key, 0) + 1
+		self.count += 1
+		self.total += ns
+		if ns > self.max:
+			self.max = ns
+
+	def quantile(self, q: float) -> int:
+		"""Highest value equivalent to the ``q`` quantile (0 when empty)."""
+		if not self.count:
+			return 0
+		rank = max(1, int(q * self.count + 0.5))
+		seen = 0
+		for key in sorted(self.counts):
+			seen += self.counts[key]
+			if seen >= rank:
+				shift = key.bit_length() - self.significant_bits
+				top = key + (1 << shift) - 1 if shift > 0 else key
+				return min(top, self.max)
+		return self.max
+
+	def mean(self) -> float:
+		return self.total / self.count if self.count else 0.0
+
+	def merge(self, other: LatencyHistogram) -> None:
+		if other.significant_bits != self.significant_bits:
+			raise ValueError("cannot merge histograms with different precision")
+		for key, c in other.counts.copy().items():
+			self.counts[key] = self.counts.get(key, 0) + c
+		self.count += other.count
+		self.total += other.total
+		self.max = max(self.max, other.max)
+
+
+# Same layout as capstan.metrics: each thread records into its own shard.
+_local = threading.local()
+_shards: list[dict[Key, LatencyHistogram]] = []
+_shards_lock = threading.Lock()
+
+
+def _hist(stage: str, venue: str, stream: str) -> LatencyHistogram:
+	try:
+		shard: dict[Key, LatencyHistogram] = _local.shard
+	except AttributeError:
+		shard = {}
+		with _shards_lock:
+			_shards.append(shard)
+		_local.shard = shard
+	key = (stage, venue, stream)
+	hist = shard.get(key)
+	if hist is None:
+		hist = shard[key] = LatencyHistogram()
+	return hist
+
+
+def enable() -> None:
+	"""Turn recording on; ``@timed`` functions imported while disabled stay unwrapped."""
+	global _enabled
+	_enabled = True
+
+
+def disable() -> None:
+	global _enabled
+	_enabled = False
+
+
+def is_enabled() -> bool:
+	return _enabled
+
+
+def record(stage: str, venue: str, stream: str, ns: int) -> None:
+	if _enabled:
+		_hist(stage, venue, stream).record(ns)
+
+
+def record_age(venue: str, stream: str, exchange_ts_ms: int, stage: str = "signal_ready") -> None:
+	"""Record wall clock now minus an exchange timestamp (ms) as ``stage``."""
+	if _enabled:
+		_hist(stage, venue, stream).record(time.time_ns() - exchange_ts_ms * 1_000_000)
+
+
+def timed_iter(stage: str, venue: str, stream: str, items: Iterable[T]) -> Iterator[T]:
+	"""Time how long each item of ``items`` takes to produce.
+
+	The flag is read once, when called: a disabled run gets ``items`` back as is.
+	"""
+	if not _enabled:
+		return iter(items)
+	return _timed_iter(_hist(stage, venue, stream), iter(items))
+
+
+def _timed_iter(hist: LatencyHistogram, items: Iterator[T]) -> Iterator[T]:
+	clock = time.perf_counter_ns
+	while True:
+		t0 = clock()
+		try:
+			item = next(items)
+		except StopIteration:
+			return
+		hist.record(clock() - t0)
+		yield item
+
+
+def timed(
+	stage: str,
+	stream: str,
+	*,
+	venue: Callable[..., str] | None = None,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+	"""Decorator recording each call of the wrapped function under ``stage``.
+
+	``venue`` maps the call arguments to a venue label; without it calls are
+	recorded under ``ALL_VENUES``. Functions are only wrapped when latency is
+	enabled at decoration time (``CAPSTAN_LATENCY`` set before import); otherwise
+	``fn`` is returned as is, so disabled runs pay no extra call frame. A wrapped
+	function stops recording after ``disable()``.
+	"""
+
+	def deco(fn: Callable[P, R]) -> Callable[P, R]:
+		if not is_enabled():
+			return fn
+
+		@functools.wraps(fn)
+		def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+			if not _enabled:
+				return fn(*args, **kwargs)
+			t0 = time.perf_counter_ns()
+			try:
+				return fn(*args, **kwargs)
+			finally:
+				dt = time.perf_counter_ns() - t0
+				label = ALL_VENUES
+				if venue is not None:
+					try:
+						label = venue(*args, **kwargs)
+					except Exception:
+						pass
+				_hist(stage, label, stream).record(dt)
+
+		return wrapper
+
+	return deco
+
+
+def histograms() -> dict[Key, LatencyHistogram]:
+	out: dict[Key, LatencyHistogram] = {}
+	with _shards_lock:
+		shards = list(_shards)
+	for shard in shards:
+		for key, hist in shard.copy().items():
+			acc = out.get(key)
+			if acc is None:
+				acc = out[key] = LatencyHistogram(hist.significant_bits)
+			acc.merge(hist)
+	return out
+
+
+def reset() -> None:
+	with _shards_lock:
+		for shard in _shards:
+			shard.clear()
+
+
+def report(quantiles: Iterable[float] = REPORT_QUANTILES) -> list[dict[str, Any]]:
+	"""One row per (stage, venue, stream) with count, mean, quantiles and max in microseconds."""
+	qs = tuple(quantiles)
+	rows: list[dict[str, Any]] = []
+	for (stage, venue, stream), hist in sorted(histograms().items()):
+		row: dict[str, Any] = {"stage": stage, "venue": venue, "stream": stream, "count": hist.count, "mean_us": hist.mean() / 1e3}
+		for q in qs:
+			row[f"p{q * 100:g}_us"] = hist.quantile(q) / 1e3
+		row["max_us"] = hist.max / 1e3
+		rows.append(row)
+	return rows
+
+
+def format_report(rows: list[dict[str, Any]] | None = None) -> str:
+	rows = report() if rows is None else rows
+	if not rows:
+		return "no latency samples (enable with CAPSTAN_LATENCY=1 or capstan.latency.enable())"
+	headers = list(rows[0])
+	cells = [[f"{row[h]:.1f}" if isinstance(row[h], float) else str(row[h]) for h in headers] for row in rows]
+	widths = [max(len(h), *(len(c[i]) for c in cells)) for i, h in enumerate(headers)]
+	lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths, strict=True))]
+	lines += ["  ".join(c.ljust(w) for c, w in zip(cell, widths, strict=True)) for cell in cells]
+	return "\n".join(lines)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, Generic, Protocol, TypeVar
+
+from capstan.venue_adapters import VenueAdapter
+
+K = TypeVar("K")
+
+
+class Timestamped(Protocol):
+	@property
+	def ts(self) -> int: ...
+
+
+T = TypeVar("T", bound=Timestamped)
+StreamKey = tuple[str, str, str]
+
+_STREAM_METHODS = {"books": "books", "oi": "oi", "funding": "funding", "index": "indexmark"}
+
+
+def adapter_streams(
+	adapters: Mapping[str, VenueAdapter],
+	symbols: Iterable[str],
+	streams: Iterable[str] = ("books",),
+) -> dict[StreamKey, Iterator[Any]]:
+	"""One iterator per (venue, symbol, stream), keyed in that order."""
+	symbols = list(symbols)
+	streams = list(streams)
+	unknown = set(streams) - set(_STREAM_METHODS)
+	if unknown:
+		raise ValueError(f"unknown streams: {sorted(unknown)}")
+	out: dict[StreamKey, Iterator[Any]] = {}
+	for venue, adapter in adapters.items():
+		for symbol in symbols:
+			for stream in streams:
+				out[(venue, symbol, stream)] = getattr(adapter, _STREAM_METHODS[stream])(symbol)
+	return out
+
+
+def merge_streams(streams: Mapping[K, Iterable[T]]) -> Iterator[tuple[K, T]]:
+	"""Merge ts-ordered streams into one ts-ordered stream of ``(key, item)``.
+
+	Holds one pending item per stream. Equal timestamps come out in the order
+	the streams appear in ``streams``.
+	"""
+	heap: list[tuple[int, int, K, T, Iterator[T]]] = []
+	for order, (key, items) in enumerate(streams.items()):
+		it = iter(items)
+		for item in it:
+			heap.append((item.ts, order, key, item, it))
+			break
+	heapq.heapify(heap)
+	while heap:
+		_ts, order, key, item, it = heap[0]
+		yield key, item
+		for nxt in it:
+			heapq.heapreplace(heap, (nxt.ts, order, key, nxt, it))
+			break
+		else:
+			heapq.heappop(heap)
+
+
+class AsOfJoin(Generic[K, T]):
+	"""Latest item per key as of a time, over a merged ``(key, item)`` stream.
+
+	``at(t)`` consumes events with ``ts <= t``; query times must not decrease.
+	"""
+
+	def __init__(self, events: Iterable[tuple[K, T]]) -> None:
+		self._events = iter(events)
+		self._pending: tuple[K, T] | None = None
+		self._latest: dict[K, T] = {}
+		self._t: int | None = None
+
+	def at(self, t: int) -> dict[K, T]:
+		if self._t is not None and t < self._t:
+			raise ValueError(f"as-of time went backwards: {t} < {self._t}")
+		self._t = t
+		if self._pending is not None:
+			if self._pending[1].ts > t:
+				return dict(self._latest)
+			key, item = self._pending
+			self._latest[key] = item
+			self._pending = None
+		for key, item in self._events:
+			if item.ts > t:
+				self._pending = (key, item)
+				break
+			self._latest[key] = item
+		return dict(self._latest)
+
+
+def asof_join(streams: Mapping[K, Iterable[T]], times: Iterable[int]) -> Iterator[tuple[int, dict[K, T]]]:
+	join = AsOfJoin(merge_streams(streams))
+	for t in times:
+		yield t, join.at(t)
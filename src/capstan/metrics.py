@@ -1,16 +1,161 @@
 from __future__ import annotations
 
-_counters: dict[tuple[str, str, str], int] = {}
+import threading
+from bisect import bisect_left
+from collections.abc import Sequence
+
+# Latency buckets in seconds, 10us .. 10s.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+	1e-5,
+	5e-5,
+	1e-4,
+	5e-4,
+	1e-3,
+	5e-3,
+	0.01,
+	0.05,
+	0.1,
+	0.5,
+	1.0,
+	5.0,
+	10.0,
+)
+
+Key = tuple[str, str, str]
+
+
+class Histogram:
+	"""Fixed-bucket histogram; ``counts[i]`` is non-cumulative, the last slot is +Inf."""
+
+	__slots__ = ("buckets", "counts", "sum", "count")
+
+	def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+		self.buckets = tuple(buckets)
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def merge(self, other: Histogram) -> None:
+		if other.buckets != self.buckets:
+			raise ValueError("cannot merge histograms with different buckets")
+		for i, c in enumerate(other.counts):
+			self.counts[i] += c
+		self.sum += other.sum
+		self.count += other.count
+
+	def copy(self) -> Histogram:
+		out = Histogram(self.buckets)
+		out.merge(self)
+		return out
+
+
+class _Shard:
+	__slots__ = ("counters", "histograms")
+
+	def __init__(self) -> None:
+		self.counters: dict[Key, int] = {}
+		self.histograms: dict[Key, Histogram] = {}
+
+
+# Each thread only ever writes its own shard, so inc()/observe() take no lock;
+# readers aggregate over copies of every shard. Gauges are last-write-wins and
+# a single dict store is atomic.
+_local = threading.local()
+_shards: list[_Shard] = []
+_shards_lock = threading.Lock()
+_gauges: dict[Key, float] = {}
+_buckets: dict[str, tuple[float, ...]] = {}
+
+
+def _shard() -> _Shard:
+	try:
+		shard: _Shard = _local.shard
+	except AttributeError:
+		shard = _Shard()
+		with _shards_lock:
+			_shards.append(shard)
+		_local.shard = shard
+		_local.counters = shard.counters
+	return shard
 
 
 def inc(name: str, venue: str, stream: str, value: int = 1) -> None:
+	try:
+		counters: dict[Key, int] = _local.counters
+	except AttributeError:
+		counters = _shard().counters
 	key = (name, venue, stream)
-	_counters[key] = _counters.get(key, 0) + value
+	counters[key] = counters.get(key, 0) + value
 
 
 def get(name: str, venue: str, stream: str) -> int:
-	return _counters.get((name, venue, stream), 0)
+	key = (name, venue, stream)
+	with _shards_lock:
+		shards = list(_shards)
+	return sum(shard.counters.get(key, 0) for shard in shards)
+
+
+def set_gauge(name: str, venue: str, stream: str, value: float) -> None:
+	_gauges[(name, venue, stream)] = value
+
+
+def get_gauge(name: str, venue: str, stream: str) -> float | None:
+	return _gauges.get((name, venue, stream))
+
+
+def set_buckets(name: str, buckets: Sequence[float]) -> None:
+	"""Override the buckets for histogram ``name``; must be called before it is observed."""
+	_buckets[name] = tuple(sorted(buckets))
+
+
+def observe(name: str, venue: str, stream: str, value: float) -> None:
+	histograms = _shard().histograms
+	key = (name, venue, stream)
+	hist = histograms.get(key)
+	if hist is None:
+		hist = histograms[key] = Histogram(_buckets.get(name, DEFAULT_BUCKETS))
+	hist.observe(value)
+
+
+def get_histogram(name: str, venue: str, stream: str) -> Histogram | None:
+	return histograms().get((name, venue, stream))
+
+
+def counters() -> dict[Key, int]:
+	out: dict[Key, int] = {}
+	with _shards_lock:
+		shards = list(_shards)
+	for shard in shards:
+		for key, value in shard.counters.copy().items():
+			out[key] = out.get(key, 0) + value
+	return out
+
+
+def gauges() -> dict[Key, float]:
+	return _gauges.copy()
+
+
+def histograms() -> dict[Key, Histogram]:
+	out: dict[Key, Histogram] = {}
+	with _shards_lock:
+		shards = list(_shards)
+	for shard in shards:
+		for key, hist in shard.histograms.copy().items():
+			if key in out:
+				out[key].merge(hist)
+			else:
+				out[key] = hist.copy()
+	return out
 
 
 def reset() -> None:
-	_counters.clear()
+	with _shards_lock:
+		for shard in _shards:
+			shard.counters.clear()
+			shard.histograms.clear()
+	_gauges.clear()
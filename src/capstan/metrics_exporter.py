@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections.abc import Iterator
+from wsgiref.simple_server import WSGIServer
+
+from prometheus_client import CollectorRegistry, start_http_server
+from prometheus_client.core import (
+	CounterMetricFamily,
+	GaugeMetricFamily,
+	HistogramMetricFamily,
+	Metric,
+)
+from prometheus_client.registry import Collector
+
+from capstan import latency, metrics
+
+DEFAULT_PORT = 9108
+LABELS = ["venue", "stream"]
+
+
+class CapstanCollector(Collector):
+	"""Exposes ``capstan.metrics`` to prometheus_client, aggregating shards on scrape."""
+
+	def __init__(self, prefix: str = "capstan_") -> None:
+		self.prefix = prefix
+
+	def collect(self) -> Iterator[Metric]:
+		counters: dict[str, CounterMetricFamily] = {}
+		for (name, venue, stream), value in sorted(metrics.counters().items()):
+			family = counters.get(name)
+			if family is None:
+				# prometheus_client appends _total itself
+				base = name.removesuffix("_total")
+				family = counters[name] = CounterMetricFamily(self.prefix + base, base.replace("_", " "), labels=LABELS)
+			family.add_metric([venue, stream], value)
+		yield from counters.values()
+
+		gauges: dict[str, GaugeMetricFamily] = {}
+		for (name, venue, stream), gvalue in sorted(metrics.gauges().items()):
+			gfamily = gauges.get(name)
+			if gfamily is None:
+				gfamily = gauges[name] = GaugeMetricFamily(self.prefix + name, name.replace("_", " "), labels=LABELS)
+			gfamily.add_metric([venue, stream], gvalue)
+		yield from gauges.values()
+
+		histograms: dict[str, HistogramMetricFamily] = {}
+		for (name, venue, stream), hist in sorted(metrics.histograms().items()):
+			hfamily = histograms.get(name)
+			if hfamily is None:
+				hfamily = histograms[name] = HistogramMetricFamily(self.prefix + name, name.replace("_", " "), labels=LABELS)
+			cumulative = 0
+			buckets: list[tuple[str, float]] = []
+			for bound, count in zip((*hist.buckets, math.inf), hist.counts, strict=True):
+				cumulative += count
+				buckets.append(("+Inf" if math.isinf(bound) else repr(bound), cumulative))
+			hfamily.add_metric([venue, stream], buckets, hist.sum)
+		yield from histograms.values()
+
+
+class LatencyCollector(Collector):
+	"""Exposes ``capstan.latency`` stage histograms as quantile gauges plus a sample count."""
+
+	def __init__(self, prefix: str = "capstan_", quantiles: tuple[float, ...] = latency.REPORT_QUANTILES) -> None:
+		self.prefix = prefix
+		self.quantiles = quantiles
+
+	def collect(self) -> Iterator[Metric]:
+		labels = ["stage", *LABELS]
+		seconds = GaugeMetricFamily(self.prefix + "stage_latency_seconds", "per-stage latency quantiles", labels=[*labels, "quantile"])
+		samples = CounterMetricFamily(self.prefix + "stage_latency_samples", "per-stage latency samples", labels=labels)
+		for (stage, venue, stream), hist in sorted(latency.histograms().items()):
+			for q in self.quantiles:
+				seconds.add_metric([stage, venue, stream, repr(q)], hist.quantile(q) / 1e9)
+			samples.add_metric([stage, venue, stream], hist.count)
+		yield seconds
+		yield samples
+
+
+def make_registry(prefix: str = "capstan_") -> CollectorRegistry:
+	registry = CollectorRegistry(auto_describe=True)
+	registry.register(CapstanCollector(prefix))
+	registry.register(LatencyCollector(prefix))
+	return registry
+
+
+def start_exporter(
+	port: int = DEFAULT_PORT,
+	addr: str = "0.0.0.0",
+	*,
+	registry: CollectorRegistry | None = None,
+) -> tuple[WSGIServer, threading.Thread]:
+	"""Serve ``/metrics`` from a daemon thread; call ``server.shutdown()`` to stop."""
+	return start_http_server(port, addr, registry=registry or make_registry())
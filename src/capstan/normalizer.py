@@ -1,11 +1,24 @@
 from __future__ import annotations
 
 from collections.abc import Mapping, Sequence
+from itertools import chain
+from operator import itemgetter
+from typing import Any
 
+import numpy as np
+
+from capstan import latency, metrics
+from capstan.compact import CompactBook, FloatArray
 from capstan.schemas import Funding, IndexMark, OpenInterest, OrderBook, PriceLevel
+from capstan.validation import SampledValidator
+
+
+def _raw_venue(raw: Mapping[str, object], *args: Any, **kwargs: Any) -> str:
+	return str(raw.get("venue"))
 
 
-def _to_int(value: object) -> int:
+def to_int(value: object) -> int:
+	"""Strict int coercion for raw venue fields: int, float or numeric str, never bool."""
 	if isinstance(value, bool):
 		raise ValueError("bool not allowed")
 	if isinstance(value, int):
@@ -17,7 +30,8 @@ def _to_int(value: object) -> int:
 	raise ValueError("invalid int")
 
 
-def _to_float(value: object) -> float:
+def to_float(value: object) -> float:
+	"""Strict float coercion for raw venue fields: int, float or numeric str, never bool."""
 	if isinstance(value, bool):
 		raise ValueError("bool not allowed")
 	if isinstance(value, int | float):
@@ -27,71 +41,188 @@ def _to_float(value: object) -> float:
 	raise ValueError("invalid float")
 
 
-def _levels(obj: object, top_n: int | None) -> list[PriceLevel]:
-	out: list[PriceLevel] = []
+def _level_pairs(obj: object, top_n: int | None) -> list[tuple[float, float]]:
+	out: list[tuple[float, float]] = []
 	if isinstance(obj, Sequence) and not isinstance(obj, str | bytes):
 		for item in obj:
 			if not isinstance(item, Mapping):
 				continue
 			try:
-				price = _to_float(item.get("price"))
-				qty = _to_float(item.get("qty"))
+				price = to_float(item.get("price"))
+				qty = to_float(item.get("qty"))
 			except Exception:
 				continue
-			out.append(PriceLevel(price=price, qty=qty))
+			out.append((price, qty))
 			if top_n is not None and len(out) >= top_n:
 				break
 	return out
 
 
+def _levels(obj: object, top_n: int | None) -> list[PriceLevel]:
+	return [PriceLevel(price=p, qty=q) for p, q in _level_pairs(obj, top_n)]
+
+
+@latency.timed("normalize", "books", venue=_raw_venue)
 def normalize_orderbook(raw: Mapping[str, object], *, top_n: int | None = 10) -> OrderBook:
 	bids = _levels(raw.get("bids"), top_n)
 	asks = _levels(raw.get("asks"), top_n)
 	return OrderBook(
-		ts=_to_int(raw["ts"]),
+		ts=to_int(raw["ts"]),
 		venue=str(raw["venue"]),
 		symbol=str(raw["symbol"]),
 		bids=bids,
 		asks=asks,
-		seq=_to_int(raw.get("seq", 0)),
+		seq=to_int(raw.get("seq", 0)),
 	)
 
 
+@latency.timed("normalize", "books", venue=_raw_venue)
+def normalize_orderbook_compact(raw: Mapping[str, object], *, top_n: int | None = 10) -> CompactBook:
+	return CompactBook.from_levels(
+		ts=to_int(raw["ts"]),
+		venue=str(raw["venue"]),
+		symbol=str(raw["symbol"]),
+		seq=to_int(raw.get("seq", 0)),
+		bids=_level_pairs(raw.get("bids"), top_n),
+		asks=_level_pairs(raw.get("asks"), top_n),
+	)
+
+
+def normalize_orderbooks_batch(
+	raws: Sequence[Mapping[str, object]],
+	*,
+	top_n: int | None = 10,
+	skip_invalid: bool = False,
+	validator: SampledValidator | None = None,
+) -> list[CompactBook]:
+	"""Normalize many raw books at once; same output as ``normalize_orderbook_compact`` per record.
+
+	Levels of books whose sides are lists of mappings with str/int/float
+	``price`` and ``qty`` are converted together by a single ``np.array`` call and
+	the books share one price and one qty buffer. Anything else goes through the
+	per-record path, which skips bad levels. An invalid book raises, or with
+	``skip_invalid`` is counted in ``records_skipped_total`` and dropped.
+	``validator`` additionally runs full ``OrderBook`` validation on a sample of
+	the output; this is the trusted ingest path.
+	"""
+	kept: list[tuple[Mapping[str, object], tuple[int, str, str, int], tuple[int, int, int] | None]] = []
+	pairs: list[tuple[object, object]] = []
+	for raw in raws:
+		try:
+			head = (to_int(raw["ts"]), str(raw["venue"]), str(raw["symbol"]), to_int(raw.get("seq", 0)))
+		except (KeyError, TypeError, ValueError):
+			if not skip_invalid:
+				raise
+			metrics.inc("records_skipped_total", str(raw.get("venue")), "books")
+			continue
+		span: tuple[int, int, int] | None
+		try:
+			bids = list(map(_price_qty, _head_levels(raw.get("bids"), top_n)))
+			asks = list(map(_price_qty, _head_levels(raw.get("asks"), top_n)))
+		except (KeyError, TypeError):
+			span = None
+		else:
+			span = (len(pairs), len(bids), len(asks))
+			pairs += bids
+			pairs += asks
+		kept.append((raw, head, span))
+
+	batch = _fast_levels(pairs)
+	# one vectorized range check for the whole batch; books only re-check when it found something
+	suspect = None if batch is None else np.flatnonzero(~((batch[0] > 0.0) & (batch[1] >= 0.0)))
+	out: list[CompactBook] = []
+	for raw, head, span in kept:
+		try:
+			if span is None:
+				book = normalize_orderbook_compact(raw, top_n=top_n)
+			elif batch is None or suspect is None:
+				start, nb, na = span
+				levels = _fast_levels(pairs[start : start + nb + na])
+				if levels is None:
+					book = normalize_orderbook_compact(raw, top_n=top_n)
+				else:
+					book = CompactBook(*head, levels[0], levels[1], nb)
+					book.check()
+			else:
+				start, nb, na = span
+				end = start + nb + na
+				book = CompactBook(*head, batch[0][start:end], batch[1][start:end], nb)
+				if book.ts < 0 or book.seq < 0:
+					raise ValueError("ts and seq must be >= 0")
+				if suspect.size:
+					i = int(np.searchsorted(suspect, start))
+					if i < suspect.size and suspect[i] < end:
+						book.check()
+		except (KeyError, TypeError, ValueError):
+			if not skip_invalid:
+				raise
+			metrics.inc("records_skipped_total", head[1], "books")
+			continue
+		if validator is not None:
+			validator.check(book, head[1], "books")
+		out.append(book)
+	return out
+
+
+_price_qty = itemgetter("price", "qty")
+_FAST_TYPES = frozenset((float, int, str))
+
+
+def _head_levels(obj: object, top_n: int | None) -> list[Any]:
+	if type(obj) is not list:
+		raise TypeError("levels are not a list")
+	return obj if top_n is None else obj[:top_n]
+
+
+def _fast_levels(pairs: list[tuple[object, object]]) -> tuple[FloatArray, FloatArray] | None:
+	"""Prices and qtys of ``pairs`` as contiguous float64 arrays, or None if any value needs the slow path."""
+	if not set(map(type, chain.from_iterable(pairs))) <= _FAST_TYPES:
+		return None
+	try:
+		levels = np.array(pairs, dtype=np.float64).reshape(-1, 2)
+	except (TypeError, ValueError, OverflowError):
+		return None
+	return np.ascontiguousarray(levels[:, 0]), np.ascontiguousarray(levels[:, 1])
+
+
+@latency.timed("normalize", "oi", venue=_raw_venue)
 def normalize_oi(raw: Mapping[str, object]) -> OpenInterest:
 	return OpenInterest(
-		ts=_to_int(raw["ts"]),
+		ts=to_int(raw["ts"]),
 		venue=str(raw["venue"]),
 		symbol=str(raw["symbol"]),
-		open_interest=_to_float(raw["open_interest"]),
+		open_interest=to_float(raw["open_interest"]),
 	)
 
 
+@latency.timed("normalize", "funding", venue=_raw_venue)
 def normalize_funding(raw: Mapping[str, object]) -> Funding:
 	term_struct_raw = raw.get("term_structure", {})
 	term_struct: dict[int, float] = {}
 	if isinstance(term_struct_raw, Mapping):
 		for k, v in term_struct_raw.items():
 			try:
-				kk = _to_int(k) if not isinstance(k, int) else k
-				vv = _to_float(v)
+				kk = to_int(k) if not isinstance(k, int) else k
+				vv = to_float(v)
 			except Exception:
 				continue
 			term_struct[kk] = vv
 	return Funding(
-		ts=_to_int(raw["ts"]),
+		ts=to_int(raw["ts"]),
 		venue=str(raw["venue"]),
 		symbol=str(raw["symbol"]),
-		next_ts=_to_int(raw["next_ts"]),
-		est_rate=_to_float(raw.get("est_rate", 0.0)),
+		next_ts=to_int(raw["next_ts"]),
+		est_rate=to_float(raw.get("est_rate", 0.0)),
 		term_structure=term_struct,
 	)
 
 
+@latency.timed("normalize", "index", venue=_raw_venue)
 def normalize_indexmark(raw: Mapping[str, object]) -> IndexMark:
 	return IndexMark(
-		ts=_to_int(raw["ts"]),
+		ts=to_int(raw["ts"]),
 		venue=str(raw["venue"]),
 		symbol=str(raw["symbol"]),
-		index=_to_float(raw["index"]),
-		mark=_to_float(raw["mark"]),
+		index=to_float(raw["index"]),
+		mark=to_float(raw["mark"]),
 	)
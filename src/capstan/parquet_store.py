@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import numpy as np
+
+from capstan import metrics
+from capstan.batch import BookStack, FloatArray
+from capstan.compact import CompactBook
+from capstan.schemas import Funding, IndexMark, OpenInterest, OrderBook
+from capstan.venue_adapters import VenueAdapter
+
+DEFAULT_DEPTH = 20
+STREAM_FILES = {"books": "books.jsonl", "oi": "oi.jsonl", "funding": "funding.jsonl", "index": "index.jsonl"}
+
+_LEVEL = "STRUCT(price DOUBLE, qty DOUBLE)[]"
+_JSON_COLUMNS = {
+	"books": {"ts": "BIGINT", "venue": "VARCHAR", "symbol": "VARCHAR", "seq": "BIGINT", "bids": _LEVEL, "asks": _LEVEL},
+	"oi": {"ts": "BIGINT", "venue": "VARCHAR", "symbol": "VARCHAR", "open_interest": "DOUBLE"},
+	"funding": {
+		"ts": "BIGINT",
+		"venue": "VARCHAR",
+		"symbol": "VARCHAR",
+		"next_ts": "BIGINT",
+		"est_rate": "DOUBLE",
+		"term_structure": "MAP(VARCHAR, DOUBLE)",
+	},
+	"index": {"ts": "BIGINT", "venue": "VARCHAR", "symbol": "VARCHAR", "index": "DOUBLE", "mark": "DOUBLE"},
+}
+
+
+def _quote(path: Path) -> str:
+	return "'" + str(path).replace("'", "''") + "'"
+
+
+def _select_list(stream: str, depth: int) -> str:
+	if stream != "books":
+		return ", ".join(f'"{name}"' for name in _JSON_COLUMNS[stream])
+	cols = ["ts", "venue", "symbol", "seq"]
+	for side, src in (("bid", "bids"), ("ask", "asks")):
+		for i in range(depth):
+			cols.append(f"{src}[{i + 1}].price AS {side}_px_{i}")
+			cols.append(f"{src}[{i + 1}].qty AS {side}_qty_{i}")
+	return ", ".join(cols)
+
+
+def convert_jsonl_to_parquet(
+	src_root: Path | str,
+	dest_root: Path | str,
+	*,
+	depth: int = DEFAULT_DEPTH,
+	con: duckdb.DuckDBPyConnection | None = None,
+) -> dict[str, int]:
+	"""Convert the books/oi/funding/index jsonl files under ``src_root`` to Parquet.
+
+	Output goes to ``dest_root/<stream>/venue=../symbol=../date=YYYY-MM-DD/``, with
+	ts-sorted rows and, for books, the first ``depth`` levels per side flattened
+	into ``bid_px_i``/``bid_qty_i``/``ask_px_i``/``ask_qty_i`` columns (NULL past
+	the end of the ladder). Lines that do not parse are skipped. Returns the rows
+	written per stream.
+	"""
+	src = Path(src_root)
+	dest = Path(dest_root)
+	con = con or duckdb.connect()
+	written: dict[str, int] = {}
+	for stream, filename in STREAM_FILES.items():
+		path = src / filename
+		if not path.exists():
+			continue
+		out = dest / stream
+		out.mkdir(parents=True, exist_ok=True)
+		columns = "{" + ", ".join(f"{name}: '{typ}'" for name, typ in _JSON_COLUMNS[stream].items()) + "}"
+		rows = con.execute(
+			f"""
+			COPY (
+				SELECT {_select_list(stream, depth)}, strftime(epoch_ms(ts), '%Y-%m-%d') AS date
+				FROM read_json(?, format = 'newline_delimited', ignore_errors = true, columns = {columns})
+				WHERE ts IS NOT NULL AND venue IS NOT NULL AND symbol IS NOT NULL
+				ORDER BY ts
+			) TO {_quote(out)} (FORMAT PARQUET, PARTITION_BY (venue, symbol, date), OVERWRITE_OR_IGNORE)
+			""",
+			[str(path)],
+		).fetchone()
+		written[stream] = int(rows[0]) if rows else 0
+	return written
+
+
+class ParquetRO(VenueAdapter):
+	"""Reads a ``convert_jsonl_to_parquet`` tree for one venue.
+
+	Venue, symbol and the ts range select partition directories, and the ts range
+	is also pushed down to Parquet row-group statistics. Data is fetched one date
+	partition at a time straight into NumPy columns.
+	"""
+
+	def __init__(
+		self,
+		root: Path | str,
+		venue: str,
+		*,
+		con: duckdb.DuckDBPyConnection | None = None,
+	) -> None:
+		self.root = Path(root)
+		self.venue = venue
+		self.con = con or duckdb.connect()
+
+	def books(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[OrderBook]:
+		for book in self.compact_books(symbol, start_ts, end_ts):
+			yield book.to_orderbook()
+
+	def compact_books(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[CompactBook]:
+		for stack in self.book_stacks(symbol, start_ts, end_ts):
+			n_bids = (~np.isnan(stack.bid_px)).sum(axis=1).tolist()
+			n_asks = (~np.isnan(stack.ask_px)).sum(axis=1).tolist()
+			for i, (ts, seq) in enumerate(zip(stack.ts.tolist(), stack.seq.tolist(), strict=True)):
+				nb, na = n_bids[i], n_asks[i]
+				book = CompactBook(
+					ts,
+					self.venue,
+					symbol,
+					seq,
+					np.concatenate([stack.bid_px[i, :nb], stack.ask_px[i, :na]]),
+					np.concatenate([stack.bid_qty[i, :nb], stack.ask_qty[i, :na]]),
+					nb,
+				)
+				book.check()
+				yield book
+
+	def book_stacks(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[BookStack]:
+		"""One ``BookStack`` per date partition, for the batch signal engine."""
+		for cols in self._chunks("books", symbol, start_ts, end_ts):
+			yield BookStack(
+				np.asarray(cols["ts"], dtype=np.int64),
+				np.asarray(cols["seq"], dtype=np.int64),
+				_side(cols, "bid_px", np.nan),
+				_side(cols, "bid_qty", 0.0),
+				_side(cols, "ask_px", np.nan),
+				_side(cols, "ask_qty", 0.0),
+			)
+
+	def oi(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[OpenInterest]:
+		for row in self._rows("oi", symbol, start_ts, end_ts):
+			yield OpenInterest(**row)
+
+	def funding(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[Funding]:
+		for row in self._rows("funding", symbol, start_ts, end_ts):
+			row["term_structure"] = row["term_structure"] or {}
+			yield Funding(**row)
+
+	def indexmark(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[IndexMark]:
+		for row in self._rows("index", symbol, start_ts, end_ts):
+			yield IndexMark(**row)
+
+	def _rows(self, stream: str, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[dict[str, Any]]:
+		for cols in self._chunks(stream, symbol, start_ts, end_ts):
+			names = list(cols)
+			for values in zip(*(cols[name].tolist() for name in names), strict=True):
+				row = dict(zip(names, values, strict=True))
+				row["venue"] = self.venue
+				row["symbol"] = symbol
+				yield row
+
+	def _chunks(self, stream: str, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[dict[str, Any]]:
+		base = self.root / stream / f"venue={self.venue}" / f"symbol={symbol}"
+		if not base.exists():
+			return
+		first = None if start_ts is None else f"date={_date(start_ts)}"
+		last = None if end_ts is None else f"date={_date(end_ts)}"
+		where = ["TRUE"]
+		params: list[int] = []
+		if start_ts is not None:
+			where.append("ts >= ?")
+			params.append(start_ts)
+		if end_ts is not None:
+			where.append("ts < ?")
+			params.append(end_ts)
+		for part in sorted(p for p in base.iterdir() if p.name.startswith("date=")):
+			if (first is not None and part.name < first) or (last is not None and part.name > last):
+				continue
+			cols = self.con.execute(
+				f"""
+				SELECT * FROM read_parquet({_quote(part / "*.parquet")}, hive_partitioning = false)
+				WHERE {" AND ".join(where)}
+				ORDER BY ts
+				""",
+				params,
+			).fetchnumpy()
+			n = len(cols["ts"])
+			if n:
+				metrics.inc("records_read_total", self.venue, stream, n)
+				yield cols
+
+
+def _side(cols: dict[str, Any], prefix: str, fill: float) -> FloatArray:
+	depth = sum(1 for name in cols if name.startswith(f"{prefix}_"))
+	return np.column_stack([np.ma.filled(cols[f"{prefix}_{i}"].astype(np.float64), fill) for i in range(depth)])
+
+
+def _date(ts_ms: int) -> str:
+	return datetime.fromtimestamp(ts_ms / 1000.0, tz=UTC).strftime("%Y-%m-%d")
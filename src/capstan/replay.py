@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from capstan.batch import BookStack, book_signals
+from capstan.compact import CompactBook
+from capstan.venue_adapters import FixtureRO
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+@dataclass(frozen=True)
+class ReplayShard:
+	venue: str
+	symbol: str
+	root: Path
+	# levels kept per side; None keeps full ladders, which cancel velocity needs
+	# to match core.cancel_velocity (sigma and imbalance only read the top 10)
+	depth: int | None = None
+	trusted: bool = True
+
+
+@dataclass(frozen=True)
+class ShardResult:
+	venue: str
+	symbol: str
+	columns: dict[str, npt.NDArray[Any]] = field(default_factory=dict)
+
+	def __len__(self) -> int:
+		ts = self.columns.get("ts")
+		return 0 if ts is None else int(ts.shape[0])
+
+
+def shards_from_config(config: Mapping[str, Any], fixtures_root: Path | str, *, depth: int | None = None) -> list[ReplayShard]:
+	"""(venue, symbol) shards for ``config["venues"] x config["pairs"]`` that have data."""
+	root = Path(fixtures_root)
+	return [
+		ReplayShard(str(venue), str(symbol), root / str(venue), depth)
+		for venue in config["venues"]
+		for symbol in config["pairs"]
+		if (root / str(venue) / "books.jsonl").exists()
+	]
+
+
+def replay_shard(shard: ReplayShard, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ShardResult:
+	"""Per-book signals for one shard, as plain arrays.
+
+	Books are stacked ``chunk_size`` at a time; the last book of each chunk is
+	carried into the next so change signals are continuous across chunks.
+	"""
+	adapter = FixtureRO(shard.root, f"capstan.adapters.{shard.venue}", trusted=shard.trusted)
+	parts: list[dict[str, npt.NDArray[Any]]] = []
+	chunk: list[CompactBook] = []
+	carry: CompactBook | None = None
+	for book in adapter.compact_books(shard.symbol):
+		chunk.append(book)
+		if len(chunk) >= chunk_size:
+			parts.append(_chunk_signals(chunk, carry, shard.depth))
+			carry = chunk[-1]
+			chunk = []
+	if chunk:
+		parts.append(_chunk_signals(chunk, carry, shard.depth))
+	if not parts:
+		return ShardResult(shard.venue, shard.symbol, {})
+	columns = {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+	return ShardResult(shard.venue, shard.symbol, columns)
+
+
+def _chunk_signals(chunk: list[CompactBook], carry: CompactBook | None, depth: int | None) -> dict[str, npt.NDArray[Any]]:
+	books = chunk if carry is None else [carry, *chunk]
+	stack = BookStack.from_books(books, depth=depth)
+	out: dict[str, npt.NDArray[Any]] = {"ts": stack.ts, "seq": stack.seq, **book_signals(stack)}
+	if carry is not None:
+		out = {name: values[1:] for name, values in out.items()}
+	return out
+
+
+def run_replay(
+	shards: Iterable[ReplayShard],
+	*,
+	max_workers: int | None = None,
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[tuple[str, str], ShardResult]:
+	"""Replay shards on a process pool; ``max_workers=0`` runs in-process."""
+	shards = list(shards)
+	if max_workers == 0:
+		results = [replay_shard(s, chunk_size) for s in shards]
+	else:
+		with ProcessPoolExecutor(max_workers=max_workers) as pool:
+			results = list(pool.map(replay_shard, shards, [chunk_size] * len(shards)))
+	return {(r.venue, r.symbol): r for r in results}
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import numpy.typing as npt
+
+from capstan.compact import CompactBook
+from capstan.config import DEFAULT_VENUES, load_config, load_venues
+
+if TYPE_CHECKING:
+	from capstan.schemas import OrderBook
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+DEFAULT_HALFLIFE = 64.0
+
+
+@dataclass(frozen=True, slots=True)
+class Opportunity:
+	"""Sell ``symbol`` on ``sell_venue`` (rich mid) and buy it on ``buy_venue``."""
+
+	symbol: str
+	sell_venue: str
+	buy_venue: str
+	z: float
+	spread: float
+	fee_cost: float
+
+
+class _SymbolState:
+	__slots__ = ("books", "mid", "ts", "n", "mean", "var", "z")
+
+	def __init__(self, n_venues: int) -> None:
+		self.books: list[CompactBook | None] = [None] * n_venues
+		self.mid = np.zeros(n_venues)
+		self.ts = np.full(n_venues, -1, dtype=np.int64)
+		self.n: IntArray = np.zeros((n_venues, n_venues), dtype=np.int64)
+		self.mean = np.zeros((n_venues, n_venues))
+		self.var = np.zeros((n_venues, n_venues))
+		self.z = np.full((n_venues, n_venues), np.nan)
+
+
+class OpportunityScanner:
+	"""Venue x venue spread z-scores per symbol from the latest book of every venue.
+
+	``z[i, j] = (mid_i - mid_j - fee_cost) / sigma_ij`` where ``fee_cost`` is both
+	legs' taker fee on the average mid and ``sigma_ij`` is an EWMA (half-life in
+	pair updates) standard deviation of ``mid_i - mid_j``. A book from venue i
+	only refreshes row i and column i of its symbol's matrices. Pairs need two
+	spread observations before they get a z, like ``make_llca_features``.
+
+	With ``max_age_ms`` set, a venue whose latest book is more than
+	``max_age_ms`` older than the updating book is left out of that update, and
+	``top`` skips pairs with a venue that old relative to ``now_ms`` (by default
+	the newest ts the scanner has seen).
+	"""
+
+	def __init__(
+		self,
+		fees_bps: Mapping[str, float],
+		*,
+		halflife: float = DEFAULT_HALFLIFE,
+		max_age_ms: int | None = None,
+	) -> None:
+		if halflife <= 0.0:
+			raise ValueError("halflife must be > 0")
+		if max_age_ms is not None and max_age_ms < 0:
+			raise ValueError("max_age_ms must be >= 0")
+		self.venues = list(fees_bps)
+		self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+		self.max_age_ms = max_age_ms
+		self._now = -1
+		self._index = {venue: i for i, venue in enumerate(self.venues)}
+		self._fee = np.array([fees_bps[v] for v in self.venues], dtype=np.float64) * 1e-4
+		self._pair_fee = self._fee[:, None] + self._fee[None, :]
+		self._symbols: dict[str, _SymbolState] = {}
+
+	@classmethod
+	def from_config(
+		cls,
+		config: Mapping[str, Any] | None = None,
+		venues_path: Path | str = DEFAULT_VENUES,
+		*,
+		halflife: float = DEFAULT_HALFLIFE,
+		max_age_ms: int | None = None,
+	) -> OpportunityScanner:
+		config = load_config() if config is None else config
+		venues = load_venues(venues_path)
+		fees = {str(name): venues[str(name)].taker_fee_bps for name in config["venues"]}
+		return cls(fees, halflife=halflife, max_age_ms=max_age_ms)
+
+	def update(self, book: CompactBook | OrderBook) -> bool:
+		"""Take a new book; returns False (and changes nothing) for an older or empty one."""
+		if not isinstance(book, CompactBook):
+			book = CompactBook.from_orderbook(book)
+		try:
+			i = self._index[book.venue]
+		except KeyError:
+			raise KeyError(f"no taker fee for venue {book.venue!r}; have {self.venues}") from None
+		state = self._symbols.get(book.symbol)
+		if state is None:
+			state = self._symbols[book.symbol] = _SymbolState(len(self.venues))
+		if book.ts < state.ts[i] or book.n_bids == 0 or book.prices.shape[0] == book.n_bids:
+			return False
+		bid = float(book.prices[0])
+		ask = float(book.prices[book.n_bids])
+		if bid <= 0.0 or ask <= 0.0:
+			return False
+		state.books[i] = book
+		state.ts[i] = book.ts
+		if book.ts > self._now:
+			self._now = book.ts
+		state.mid[i] = 0.5 * (bid + ask)
+		self._refresh(state, i)
+		return True
+
+	def _refresh(self, state: _SymbolState, i: int) -> None:
+		mid = state.mid
+		live = mid > 0.0
+		if self.max_age_ms is not None:
+			live &= state.ts >= state.ts[i] - self.max_age_ms
+		live[i] = False
+		spread = mid[i] - mid
+		n = state.n[i]
+		first = live & (n == 0)
+		seen = live & (n > 0)
+		mean = state.mean[i]
+		var = state.var[i]
+		diff = spread - mean
+		incr = self.alpha * diff
+		var[seen] = (1.0 - self.alpha) * (var[seen] + diff[seen] * incr[seen])
+		mean[seen] += incr[seen]
+		mean[first] = spread[first]
+		n[live] += 1
+		state.mean[:, i] = -mean
+		state.var[:, i] = var
+		state.n[:, i] = n
+
+		sigma = np.sqrt(var)
+		cost = self._pair_fee[i] * 0.5 * (mid[i] + mid)
+		ok = live & (n > 1)
+		row = np.full(mid.shape[0], np.nan)
+		col = np.full(mid.shape[0], np.nan)
+		row[ok] = 0.0
+		col[ok] = 0.0
+		scored = ok & (sigma > 0.0)
+		row[scored] = (spread[scored] - cost[scored]) / sigma[scored]
+		col[scored] = (-spread[scored] - cost[scored]) / sigma[scored]
+		state.z[i] = row
+		state.z[:, i] = col
+
+	def matrix(self, symbol: str) -> FloatArray:
+		"""Copy of the z matrix for ``symbol`` in ``venues`` order; NaN where a pair has no score."""
+		state = self._symbols.get(symbol)
+		if state is None:
+			return np.full((len(self.venues), len(self.venues)), np.nan)
+		return state.z.copy()
+
+	def book(self, venue: str, symbol: str) -> CompactBook | None:
+		state = self._symbols.get(symbol)
+		return None if state is None else state.books[self._index[venue]]
+
+	def top(self, k: int, *, min_z: float = 0.0, now_ms: int | None = None) -> list[Opportunity]:
+		"""The ``k`` highest z-scores above ``min_z`` across all symbols, best first."""
+		if k <= 0 or not self._symbols:
+			return []
+		symbols = list(self._symbols)
+		z = np.stack([self._symbols[s].z for s in symbols])
+		skip = np.isnan(z)
+		if self.max_age_ms is not None:
+			cutoff = (self._now if now_ms is None else now_ms) - self.max_age_ms
+			fresh = np.stack([self._symbols[s].ts for s in symbols]) >= cutoff
+			skip |= ~(fresh[:, :, None] & fresh[:, None, :])
+		flat = np.where(skip, -np.inf, z).ravel()
+		k = min(k, flat.shape[0])
+		cand = np.argpartition(flat, -k)[-k:]
+		cand = cand[np.argsort(-flat[cand], kind="stable")]
+		n_venues = len(self.venues)
+		out: list[Opportunity] = []
+		for pos in cand.tolist():
+			z_val = float(flat[pos])
+			if not z_val > min_z:
+				break
+			s, rest = divmod(pos, n_venues * n_venues)
+			i, j = divmod(rest, n_venues)
+			state = self._symbols[symbols[s]]
+			mid_i = float(state.mid[i])
+			mid_j = float(state.mid[j])
+			out.append(
+				Opportunity(
+					symbol=symbols[s],
+					sell_venue=self.venues[i],
+					buy_venue=self.venues[j],
+					z=z_val,
+					spread=mid_i - mid_j,
+					fee_cost=float(self._pair_fee[i, j]) * 0.5 * (mid_i + mid_j),
+				)
+			)
+		return out
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from capstan import metrics
+from capstan.compact import CompactBook
+from capstan.core import depth_weighted_sigma, lob10_imbalance
+
+if TYPE_CHECKING:
+	from capstan.schemas import OrderBook
+
+DEFAULT_WINDOW = 256
+MID_WINDOWS = 4
+
+
+@dataclass(frozen=True, slots=True)
+class BookQuantities:
+	"""Per-book values as ``capstan.core`` computes them (top 10 levels)."""
+
+	mid: float
+	spread: float
+	depth: float
+	imbalance: float
+	sigma: float
+
+
+def _mid(book: OrderBook | CompactBook) -> float:
+	if isinstance(book, CompactBook):
+		bid = float(book.prices[0]) if book.n_bids else 0.0
+		ask = float(book.prices[book.n_bids]) if book.prices.shape[0] > book.n_bids else 0.0
+	else:
+		bid = book.bids[0].price if book.bids else 0.0
+		ask = book.asks[0].price if book.asks else 0.0
+	return 0.5 * (bid + ask) if bid > 0.0 and ask > 0.0 else 0.0
+
+
+def book_quantities(book: OrderBook | CompactBook) -> BookQuantities:
+	if isinstance(book, CompactBook):
+		bids = book.bids()
+		asks = book.asks()
+	else:
+		bids = [(lv.price, lv.qty) for lv in book.bids]
+		asks = [(lv.price, lv.qty) for lv in book.asks]
+	bid = bids[0][0] if bids else 0.0
+	ask = asks[0][0] if asks else 0.0
+	both = bid > 0.0 and ask > 0.0
+	return BookQuantities(
+		mid=0.5 * (bid + ask) if both else 0.0,
+		spread=ask - bid if both else 0.0,
+		depth=float(sum(q for _p, q in bids[:10]) + sum(q for _p, q in asks[:10])),
+		imbalance=lob10_imbalance(bids, asks),
+		sigma=depth_weighted_sigma(bids, asks),
+	)
+
+
+class BookSignalCache:
+	"""Bounded cache of ``BookQuantities`` keyed by (venue, symbol, seq, ts).
+
+	Each venue/symbol keeps the ``window`` books it was most recently asked about
+	and evicts the least recently used one, so books a rolling window keeps
+	returning to stay cached; a busy symbol cannot evict a quiet one. Lookups are counted in
+	``signal_cache_hits_total``/``signal_cache_misses_total``.
+	"""
+
+	def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+		if window < 1:
+			raise ValueError("window must be >= 1")
+		self.window = window
+		self.hits = 0
+		self.misses = 0
+		self._symbols: dict[tuple[str, str], dict[tuple[int, int], BookQuantities]] = {}
+		self._mids: dict[tuple[str, str], dict[tuple[int, int, int, int, int], list[float]]] = {}
+
+	def get(self, book: OrderBook | CompactBook) -> BookQuantities:
+		venue = book.venue
+		entries = self._symbols.get((venue, book.symbol))
+		if entries is None:
+			entries = self._symbols[(venue, book.symbol)] = {}
+		key = (book.seq, book.ts)
+		found = entries.pop(key, None)
+		if found is not None:
+			entries[key] = found
+			self.hits += 1
+			metrics.inc("signal_cache_hits_total", venue, "books")
+			return found
+		self.misses += 1
+		metrics.inc("signal_cache_misses_total", venue, "books")
+		found = entries[key] = book_quantities(book)
+		if len(entries) > self.window:
+			del entries[next(iter(entries))]
+		return found
+
+	def mids(self, books: Sequence[OrderBook | CompactBook]) -> list[float]:
+		"""Mids of a window of consecutive books from one venue/symbol.
+
+		A window is identified by its length and its first and last book, so
+		every pair that reads the same venue's window in a tick shares one list.
+		The last ``MID_WINDOWS`` windows per venue/symbol are kept.
+		"""
+		if not books:
+			return []
+		first, last = books[0], books[-1]
+		venue = first.venue
+		windows = self._mids.get((venue, first.symbol))
+		if windows is None:
+			windows = self._mids[(venue, first.symbol)] = {}
+		key = (len(books), first.seq, first.ts, last.seq, last.ts)
+		found = windows.pop(key, None)
+		if found is not None:
+			windows[key] = found
+			self.hits += 1
+			metrics.inc("signal_cache_hits_total", venue, "books")
+			return found
+		self.misses += 1
+		metrics.inc("signal_cache_misses_total", venue, "books")
+		found = windows[key] = [_mid(book) for book in books]
+		if len(windows) > MID_WINDOWS:
+			del windows[next(iter(windows))]
+		return found
+
+	def __len__(self) -> int:
+		return sum(len(entries) for entries in self._symbols.values())
+
+	def clear(self) -> None:
+		self._symbols.clear()
+		self._mids.clear()
+		self.hits = 0
+		self.misses = 0
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import TYPE_CHECKING
+
+from capstan.core import funding_nowcast, lob10_imbalance, spread_z
+
+if TYPE_CHECKING:
+	from capstan.schemas import Funding, OrderBook
+
+REALIZED_N = 5
+
+
+def _mid(ob: OrderBook) -> float:
+	bid_price = ob.bids[0].price if ob.bids else 0.0
+	ask_price = ob.asks[0].price if ob.asks else 0.0
+	return 0.5 * (bid_price + ask_price) if (bid_price > 0.0 and ask_price > 0.0) else 0.0
+
+
+def _depth(ob: OrderBook) -> float:
+	bid_qty_sum = sum(level.qty for level in ob.bids[:10])
+	ask_qty_sum = sum(level.qty for level in ob.asks[:10])
+	return float(bid_qty_sum + ask_qty_sum)
+
+
+def _imb(ob: OrderBook) -> float:
+	b = [(level.price, level.qty) for level in ob.bids[:10]]
+	a = [(level.price, level.qty) for level in ob.asks[:10]]
+	return lob10_imbalance(b, a)
+
+
+class _WindowedMoments:
+	"""Mean and population variance over the last ``window`` values (Welford).
+
+	A full window is updated by replacing the oldest value. The moments are
+	recomputed from the window once per ``window`` replacements, and whenever an
+	update cancels most of ``m2``, which keeps rounding error bounded at
+	amortised O(1) per update.
+	"""
+
+	def __init__(self, window: int) -> None:
+		self.window = window
+		self.values: deque[float] = deque()
+		self.mean = 0.0
+		self.m2 = 0.0
+		self._evictions = 0
+
+	def push(self, x: float) -> None:
+		if len(self.values) < self.window:
+			self.values.append(x)
+			d = x - self.mean
+			self.mean += d / len(self.values)
+			self.m2 += d * (x - self.mean)
+			return
+		y = self.values.popleft()
+		self.values.append(x)
+		old_mean = self.mean
+		self.mean += (x - y) / self.window
+		delta = (x - y) * (x - self.mean + y - old_mean)
+		self.m2 += delta
+		self._evictions += 1
+		if self._evictions >= self.window or self.m2 < 1e-6 * abs(delta):
+			self._evictions = 0
+			self.mean = math.fsum(self.values) / self.window
+			self.m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+
+	def pstdev(self) -> float:
+		n = len(self.values)
+		if n <= 1:
+			return 0.0
+		return math.sqrt(max(self.m2, 0.0) / n)
+
+
+class LLCAFeatureStream:
+	"""Incremental ``make_llca_features`` over the last ``window`` book pairs.
+
+	Each ``update`` is O(1) in the window length and returns the same features
+	``make_llca_features`` gives for the books currently in the window (up to
+	float rounding of the spread sigma).
+	"""
+
+	def __init__(self, window: int) -> None:
+		if window < 1:
+			raise ValueError("window must be >= 1")
+		self.window = window
+		self._spreads = _WindowedMoments(window)
+		self._ts_a: deque[int] = deque(maxlen=window)
+		self._ts_b: deque[int] = deque(maxlen=window)
+
+	def __len__(self) -> int:
+		return len(self._ts_a)
+
+	def update(self, ob_a: OrderBook, ob_b: OrderBook, health_a: float, health_b: float) -> dict[str, float]:
+		mid_a = _mid(ob_a)
+		mid_b = _mid(ob_b)
+		self._spreads.push(mid_a - mid_b)
+		self._ts_a.append(ob_a.ts)
+		self._ts_b.append(ob_b.ts)
+
+		z = spread_z(mid_a, mid_b, self._spreads.pstdev())
+		depth_a = _depth(ob_a)
+		depth_b = _depth(ob_b)
+		depth_ratio = depth_a / depth_b if depth_b > 0.0 else 0.0
+		imbalance = 0.5 * (_imb(ob_a) + _imb(ob_b))
+		update_rate = 0.5 * (self._rate(self._ts_a) + self._rate(self._ts_b))
+		return {
+			"z": float(z),
+			"depth_ratio": float(depth_ratio),
+			"imbalance": float(imbalance),
+			"update_rate": float(update_rate),
+			"health_min": float(min(health_a, health_b)),
+		}
+
+	@staticmethod
+	def _rate(ts: deque[int]) -> float:
+		if len(ts) < 2:
+			return 0.0
+		span_ms = max(1, ts[-1] - ts[0])
+		return len(ts) / (span_ms / 1000.0)
+
+
+class _FundingWindow:
+	__slots__ = ("rates",)
+
+	def __init__(self, window: int) -> None:
+		self.rates: deque[float] = deque(maxlen=window)
+
+
+class HFHFeatureStream:
+	"""Incremental ``make_hfh_features`` per (venue, symbol).
+
+	Keeps a ring buffer of the last ``window`` funding estimates for each key;
+	each ``update`` is O(1) and returns exactly what ``make_hfh_features`` returns
+	for that buffer.
+	"""
+
+	def __init__(self, window: int) -> None:
+		if window < 1:
+			raise ValueError("window must be >= 1")
+		self.window = window
+		self._state: dict[tuple[str, str], _FundingWindow] = {}
+
+	def update(self, funding: Funding, vol_est: float, mark_spot_drift: float) -> dict[str, float]:
+		key = (funding.venue, funding.symbol)
+		state = self._state.get(key)
+		if state is None:
+			state = self._state[key] = _FundingWindow(self.window)
+		state.rates.append(float(funding.est_rate))
+		return self._features(state, vol_est, mark_spot_drift)
+
+	def features(self, venue: str, symbol: str, vol_est: float, mark_spot_drift: float) -> dict[str, float]:
+		state = self._state.get((venue, symbol))
+		return self._features(state or _FundingWindow(self.window), vol_est, mark_spot_drift)
+
+	@staticmethod
+	def _features(state: _FundingWindow, vol_est: float, mark_spot_drift: float) -> dict[str, float]:
+		rates = state.rates
+		n = len(rates)
+		venue_est = rates[-1] if n else 0.0
+		realized = [rates[i] for i in range(max(0, n - REALIZED_N), n)]
+		momo = rates[-1] - rates[0] if n >= 2 else 0.0
+		E_funding_T = funding_nowcast(
+			venue_est=venue_est,
+			recent_realized=realized,
+			mark_spot_drift=mark_spot_drift,
+			leader_momentum=momo,
+		)
+		return {"E_funding_T": float(E_funding_T), "sigma_T": float(vol_est)}
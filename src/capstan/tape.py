@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import orjson
+
+from capstan.compact import CompactBook, FloatArray
+from capstan.schemas import OrderBook
+from capstan.venue_adapters import VenueAdapter
+
+TAPE_MAGIC = b"CAPTAPE\x00"
+TAPE_VERSION = 1
+DEFAULT_DEPTH = 20
+DEFAULT_CHUNK = 4096
+
+# magic, version, depth, n_records, trailer_offset, trailer_len; padded so records start 64-byte aligned
+_HEADER = struct.Struct("<8sIIQQQ")
+HEADER_SIZE = 64
+
+
+def record_dtype(depth: int) -> np.dtype[Any]:
+	"""Fixed-width tape record: bids then asks packed into ``prices``/``qtys``, zero padded."""
+	return np.dtype(
+		[
+			("ts", "<i8"),
+			("seq", "<i8"),
+			("symbol", "<u4"),
+			("n_bids", "<u2"),
+			("n_levels", "<u2"),
+			("prices", "<f8", (2 * depth,)),
+			("qtys", "<f8", (2 * depth,)),
+		]
+	)
+
+
+class TapeWriter:
+	"""Appends books for one venue to a binary tape.
+
+	Books must arrive in non-decreasing ts order so readers can binary search on
+	ts; sides deeper than ``depth`` are cut to the top ``depth`` levels. The file
+	is written under a temporary name and moved into place by ``close``, so a
+	reader never sees a partial tape.
+	"""
+
+	def __init__(self, path: Path | str, venue: str, *, depth: int = DEFAULT_DEPTH, chunk: int = DEFAULT_CHUNK) -> None:
+		if depth <= 0 or 2 * depth > np.iinfo(np.uint16).max:
+			raise ValueError(f"invalid depth: {depth}")
+		self.path = Path(path)
+		self.venue = venue
+		self.depth = depth
+		self.dtype = record_dtype(depth)
+		self.n_records = 0
+		self._symbols: dict[str, int] = {}
+		self._buf = np.zeros(chunk, dtype=self.dtype)
+		self._n_buf = 0
+		self._last_ts = -1
+		self._tmp = self.path.with_name(self.path.name + ".tmp")
+		self._fh = self._tmp.open("wb")
+		self._fh.write(bytes(HEADER_SIZE))
+
+	def __enter__(self) -> TapeWriter:
+		return self
+
+	def __exit__(
+		self,
+		exc_type: type[BaseException] | None,
+		exc: BaseException | None,
+		tb: TracebackType | None,
+	) -> None:
+		if exc_type is None:
+			self.close()
+		else:
+			self.abort()
+
+	def write(self, book: OrderBook | CompactBook) -> None:
+		if book.venue != self.venue:
+			raise ValueError(f"tape is for venue {self.venue!r}, got {book.venue!r}")
+		if book.ts < self._last_ts:
+			raise ValueError(f"ts went backwards: {book.ts} < {self._last_ts}")
+		if isinstance(book, OrderBook):
+			book = CompactBook.from_orderbook(book)
+		nb = min(book.n_bids, self.depth)
+		na = min(book.prices.shape[0] - book.n_bids, self.depth)
+		rec = self._buf[self._n_buf]
+		rec["ts"] = book.ts
+		rec["seq"] = book.seq
+		rec["symbol"] = self._symbols.setdefault(book.symbol, len(self._symbols))
+		rec["n_bids"] = nb
+		rec["n_levels"] = nb + na
+		rec["prices"][:nb] = book.bid_px[:nb]
+		rec["prices"][nb : nb + na] = book.ask_px[:na]
+		rec["qtys"][:nb] = book.bid_qty[:nb]
+		rec["qtys"][nb : nb + na] = book.ask_qty[:na]
+		self._last_ts = book.ts
+		self._n_buf += 1
+		self.n_records += 1
+		if self._n_buf == self._buf.shape[0]:
+			self._flush()
+
+	def write_all(self, books: Iterable[OrderBook | CompactBook]) -> None:
+		for book in books:
+			self.write(book)
+
+	def close(self) -> None:
+		if self._fh.closed:
+			return
+		self._flush()
+		trailer = orjson.dumps({"venue": self.venue, "symbols": sorted(self._symbols, key=self._symbols.__getitem__)})
+		trailer_offset = HEADER_SIZE + self.n_records * self.dtype.itemsize
+		self._fh.write(trailer)
+		self._fh.seek(0)
+		self._fh.write(_HEADER.pack(TAPE_MAGIC, TAPE_VERSION, self.depth, self.n_records, trailer_offset, len(trailer)))
+		self._fh.close()
+		os.replace(self._tmp, self.path)
+
+	def abort(self) -> None:
+		if not self._fh.closed:
+			self._fh.close()
+		self._tmp.unlink(missing_ok=True)
+
+	def _flush(self) -> None:
+		if self._n_buf:
+			self._fh.write(self._buf[: self._n_buf].tobytes())
+			self._buf[: self._n_buf] = 0
+			self._n_buf = 0
+
+
+def write_tape(path: Path | str, venue: str, books: Iterable[OrderBook | CompactBook], *, depth: int = DEFAULT_DEPTH) -> int:
+	with TapeWriter(path, venue, depth=depth) as writer:
+		writer.write_all(books)
+	return writer.n_records
+
+
+class TapeRO(VenueAdapter):
+	"""Zero-copy reader over a tape written by ``TapeWriter``.
+
+	``records`` is a structured ``np.memmap``; ``record(i)`` returns a CompactBook
+	whose arrays are views into the mapping, and ts lookups are a ``searchsorted``
+	on the ts column.
+	"""
+
+	def __init__(self, path: Path | str) -> None:
+		self.path = Path(path)
+		with self.path.open("rb") as fh:
+			head = fh.read(_HEADER.size)
+			if len(head) < _HEADER.size:
+				raise ValueError(f"truncated tape header: {self.path}")
+			magic, version, depth, n_records, trailer_offset, trailer_len = _HEADER.unpack(head)
+			if magic != TAPE_MAGIC or version != TAPE_VERSION:
+				raise ValueError(f"not a capstan tape (or unsupported version): {self.path}")
+			fh.seek(trailer_offset)
+			trailer = orjson.loads(fh.read(trailer_len))
+		self.depth: int = depth
+		self.venue: str = trailer["venue"]
+		self.symbols: list[str] = trailer["symbols"]
+		self._symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+		dtype = record_dtype(depth)
+		if trailer_offset != HEADER_SIZE + n_records * dtype.itemsize:
+			raise ValueError(f"corrupt tape (record area size mismatch): {self.path}")
+		self.records: np.ndarray[Any, np.dtype[Any]]
+		if n_records:
+			self.records = np.memmap(self.path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(n_records,))
+		else:
+			self.records = np.zeros(0, dtype=dtype)
+		self.ts: npt.NDArray[np.int64] = self.records["ts"]
+
+	def __len__(self) -> int:
+		return int(self.records.shape[0])
+
+	def record(self, i: int) -> CompactBook:
+		rec = self.records[i]
+		n = int(rec["n_levels"])
+		prices: FloatArray = rec["prices"][:n]
+		qtys: FloatArray = rec["qtys"][:n]
+		return CompactBook(int(rec["ts"]), self.venue, self.symbols[int(rec["symbol"])], int(rec["seq"]), prices, qtys, int(rec["n_bids"]))
+
+	def index_at(self, ts: int) -> int:
+		"""Index of the first record with ``ts >= ts``."""
+		return int(np.searchsorted(self.ts, ts, side="left"))
+
+	def span(self, start_ts: int | None = None, end_ts: int | None = None) -> slice:
+		lo = 0 if start_ts is None else self.index_at(start_ts)
+		hi = len(self) if end_ts is None else self.index_at(end_ts)
+		return slice(lo, max(lo, hi))
+
+	def books(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[OrderBook]:
+		for book in self.compact_books(symbol, start_ts, end_ts):
+			yield book.to_orderbook()
+
+	def compact_books(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[CompactBook]:
+		sid = self._symbol_ids.get(symbol)
+		if sid is None:
+			return
+		window = self.span(start_ts, end_ts)
+		hits = np.flatnonzero(self.records["symbol"][window] == sid)
+		for i in (hits + window.start).tolist():
+			yield self.record(i)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import logging
+
+from pydantic import BaseModel, ValidationError
+
+from capstan import metrics
+from capstan.compact import CompactBook
+
+DEFAULT_VALIDATE_EVERY = 1000
+
+
+class SampledValidator:
+	"""Fully validates the first and then every ``every``-th model it is shown.
+
+	A ``CompactBook`` is validated by building the ``OrderBook`` it stands for.
+
+	Failures are logged and counted in ``validation_violations_total`` instead of
+	raised; ``every <= 0`` disables checking.
+	"""
+
+	def __init__(self, every: int = DEFAULT_VALIDATE_EVERY, *, logger: logging.Logger | None = None) -> None:
+		self.every = every
+		self.logger = logger or logging.getLogger("capstan.validation")
+		self._seen = 0
+
+	def check(self, model: BaseModel | CompactBook, venue: str, stream: str) -> bool:
+		if self.every <= 0:
+			return True
+		self._seen += 1
+		if (self._seen - 1) % self.every:
+			return True
+		metrics.inc("records_validated_total", venue, stream)
+		try:
+			if isinstance(model, CompactBook):
+				model.to_orderbook()
+			else:
+				type(model).model_validate(model.model_dump())
+		except ValidationError as exc:
+			self.violation(venue, stream, exc)
+			return False
+		return True
+
+	def violation(self, venue: str, stream: str, exc: Exception) -> None:
+		self.logger.warning("validation violation on %s/%s: %s", venue, stream, exc)
+		metrics.inc("validation_violations_total", venue, stream)
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
-import json
+import heapq
 import logging
-from collections.abc import Iterator
+import tempfile
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from pathlib import Path
 from typing import Any
 
-from capstan import metrics
+import orjson
+
+from capstan import latency, metrics
+from capstan.compact import CompactBook
+from capstan.jsonl import iter_objects
+from capstan.jsonl_index import JsonlIndex
+from capstan.normalizer import normalize_orderbooks_batch
 from capstan.schemas import Funding, IndexMark, OpenInterest, OrderBook
+from capstan.validation import DEFAULT_VALIDATE_EVERY, SampledValidator
+
+DEFAULT_REORDER_WINDOW = 4096
+DEFAULT_RUN_SIZE = 100_000
+TRUSTED_BATCH_SIZE = 1024
 
 
 class VenueAdapter:
@@ -25,75 +38,233 @@ class VenueAdapter:
 
 
 class FixtureRO(VenueAdapter):
-	def __init__(self, root: Path | str, logger_name: str) -> None:
+	def __init__(
+		self,
+		root: Path | str,
+		logger_name: str,
+		*,
+		reorder_window: int | None = DEFAULT_REORDER_WINDOW,
+		run_size: int = DEFAULT_RUN_SIZE,
+		use_index: bool = True,
+		trusted: bool = False,
+		validate_every: int = DEFAULT_VALIDATE_EVERY,
+	) -> None:
 		self.root = Path(root)
 		self.logger = logging.getLogger(logger_name)
+		self.reorder_window = reorder_window
+		self.run_size = run_size
+		self.use_index = use_index
+		self.trusted = trusted
+		self._validator = SampledValidator(validate_every, logger=self.logger)
+		self._indexes: dict[str, JsonlIndex] = {}
 
-	def books(self, symbol: str) -> Iterator[OrderBook]:
+	def books(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[OrderBook]:
+		return latency.timed_iter("adapter", self.venue_name(), "books", self._books(symbol, start_ts, end_ts))
+
+	def _books(self, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[OrderBook]:
 		prev = -1
 		stream = "books"
-		for rec in _iter_sorted_jsonl(self.root / "books.jsonl", self.logger, venue=self.venue_name(), stream=stream):
-			if rec.get("symbol") != symbol:
-				continue
+		venue = self.venue_name()
+		for rec in self._records("books.jsonl", stream, symbol, start_ts, end_ts):
 			if prev >= 0 and int(rec.get("ts", 0)) - prev > 200:
-				metrics.inc("gaps_detected_total", self.venue_name(), stream)
+				metrics.inc("gaps_detected_total", venue, stream)
 			prev = int(rec.get("ts", 0))
 			yield OrderBook(**rec)
 
-	def oi(self, symbol: str) -> Iterator[OpenInterest]:
-		stream = "oi"
-		for rec in _iter_sorted_jsonl(self.root / "oi.jsonl", self.logger, venue=self.venue_name(), stream=stream):
-			if rec.get("symbol") != symbol:
-				continue
+	def compact_books(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[CompactBook]:
+		return latency.timed_iter("adapter", self.venue_name(), "books", self._compact_books(symbol, start_ts, end_ts))
+
+	def _compact_books(self, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[CompactBook]:
+		records = self._records("books.jsonl", "books", symbol, start_ts, end_ts)
+		if not self.trusted:
+			for rec in records:
+				yield CompactBook.from_record(rec)
+			return
+		while chunk := list(islice(records, TRUSTED_BATCH_SIZE)):
+			yield from normalize_orderbooks_batch(chunk, top_n=None, skip_invalid=True, validator=self._validator)
+
+	def oi(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[OpenInterest]:
+		return latency.timed_iter("adapter", self.venue_name(), "oi", self._oi(symbol, start_ts, end_ts))
+
+	def _oi(self, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[OpenInterest]:
+		for rec in self._records("oi.jsonl", "oi", symbol, start_ts, end_ts):
 			yield OpenInterest(**rec)
 
-	def funding(self, symbol: str) -> Iterator[Funding]:
-		stream = "funding"
-		for rec in _iter_sorted_jsonl(self.root / "funding.jsonl", self.logger, venue=self.venue_name(), stream=stream):
-			if rec.get("symbol") != symbol:
-				continue
+	def funding(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[Funding]:
+		return latency.timed_iter("adapter", self.venue_name(), "funding", self._funding(symbol, start_ts, end_ts))
+
+	def _funding(self, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[Funding]:
+		for rec in self._records("funding.jsonl", "funding", symbol, start_ts, end_ts):
 			yield Funding(**rec)
 
-	def indexmark(self, symbol: str) -> Iterator[IndexMark]:
-		stream = "index"
-		for rec in _iter_sorted_jsonl(self.root / "index.jsonl", self.logger, venue=self.venue_name(), stream=stream):
-			if rec.get("symbol") != symbol:
-				continue
+	def indexmark(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> Iterator[IndexMark]:
+		return latency.timed_iter("adapter", self.venue_name(), "index", self._indexmark(symbol, start_ts, end_ts))
+
+	def _indexmark(self, symbol: str, start_ts: int | None, end_ts: int | None) -> Iterator[IndexMark]:
+		for rec in self._records("index.jsonl", "index", symbol, start_ts, end_ts):
 			yield IndexMark(**rec)
 
 	def venue_name(self) -> str:
 		return self.logger.name.split(".")[-1]
 
+	def _records(
+		self,
+		filename: str,
+		stream: str,
+		symbol: str,
+		start_ts: int | None,
+		end_ts: int | None,
+	) -> Iterator[dict[str, Any]]:
+		path = self.root / filename
+		venue = self.venue_name()
+		if not path.exists():
+			return
+		if self.use_index:
+			index = self._index(path, stream)
+			for rec in latency.timed_iter("decode", venue, stream, index.iter_records(symbol, start_ts, end_ts)):
+				metrics.inc("records_read_total", venue, stream)
+				yield rec
+			return
+		for rec in _iter_sorted_jsonl(
+			path,
+			self.logger,
+			venue=venue,
+			stream=stream,
+			reorder_window=self.reorder_window,
+			run_size=self.run_size,
+		):
+			if rec.get("symbol") != symbol:
+				continue
+			ts = int(rec.get("ts", 0))
+			if start_ts is not None and ts < start_ts:
+				continue
+			if end_ts is not None and ts >= end_ts:
+				continue
+			yield rec
+
+	def _index(self, path: Path, stream: str) -> JsonlIndex:
+		index = self._indexes.get(path.name)
+		if index is None or not index.is_current():
+			index = JsonlIndex.load_or_build(path, self.logger, venue=self.venue_name(), stream=stream)
+			self._indexes[path.name] = index
+		return index
+
 
 class BybitRO(FixtureRO):
-	def __init__(self, root: Path | str = Path("tests/fixtures/bybit")) -> None:
-		super().__init__(root=root, logger_name="capstan.adapters.bybit")
+	def __init__(self, root: Path | str = Path("tests/fixtures/bybit"), **kwargs: Any) -> None:
+		super().__init__(root=root, logger_name="capstan.adapters.bybit", **kwargs)
 
 
 class BitgetRO(FixtureRO):
-	def __init__(self, root: Path | str = Path("tests/fixtures/bitget")) -> None:
-		super().__init__(root=root, logger_name="capstan.adapters.bitget")
+	def __init__(self, root: Path | str = Path("tests/fixtures/bitget"), **kwargs: Any) -> None:
+		super().__init__(root=root, logger_name="capstan.adapters.bitget", **kwargs)
+
 
+def _iter_sorted_jsonl(
+	path: Path,
+	logger: logging.Logger,
+	*,
+	venue: str,
+	stream: str,
+	reorder_window: int | None = DEFAULT_REORDER_WINDOW,
+	run_size: int = DEFAULT_RUN_SIZE,
+) -> Iterator[dict[str, Any]]:
+	"""Yield records of ``path`` in ts order without holding the whole file.
 
-def _iter_sorted_jsonl(path: Path, logger: logging.Logger, *, venue: str, stream: str) -> Iterator[dict[str, Any]]:
+	By default a heap of ``reorder_window`` records streams the file: input that
+	is sorted or only locally shuffled comes out fully ordered and the first
+	record is yielded after ``reorder_window`` reads, but records older than one
+	already yielded are dropped, counted in ``records_late_total`` and reported in
+	one warning per file. ``reorder_window=None`` opts into an external merge sort
+	that spills sorted runs of ``run_size`` records to disk and merges them; it
+	orders any input, including chunk-sorted files, without losing records, but
+	yields nothing until the whole file has been read.
+	"""
 	if not path.exists():
 		return
-	records: list[dict[str, Any]] = []
-	with path.open("r") as f:
-		for line_no, line in enumerate(f, 1):
-			line = line.strip()
-			if not line:
-				continue
-			try:
-				data = json.loads(line)
-				if not isinstance(data, dict):
-					raise ValueError("expected object")
-			except Exception as exc:
-				logger.warning("skip invalid jsonl at %s:%s: %s", path, line_no, exc)
-				metrics.inc("records_skipped_total", venue, stream)
-				continue
-			records.append(data)
-	records.sort(key=lambda r: int(r.get("ts", 0)))
-	for rec in records:
+	records = latency.timed_iter("decode", venue, stream, _iter_jsonl(path, logger, venue=venue, stream=stream))
+	if reorder_window is None:
+		ordered = _external_sort(records, run_size)
+	else:
+		ordered = _reorder(records, reorder_window, logger, path=path, venue=venue, stream=stream)
+	for rec in ordered:
 		metrics.inc("records_read_total", venue, stream)
 		yield rec
+
+
+def _iter_jsonl(path: Path, logger: logging.Logger, *, venue: str, stream: str) -> Iterator[dict[str, Any]]:
+	for _offset, data in iter_objects(path, logger, venue=venue, stream=stream):
+		yield data
+
+
+def _ts(rec: dict[str, Any]) -> int:
+	return int(rec.get("ts", 0))
+
+
+def _reorder(
+	records: Iterable[dict[str, Any]],
+	window: int,
+	logger: logging.Logger,
+	*,
+	path: Path,
+	venue: str,
+	stream: str,
+) -> Iterator[dict[str, Any]]:
+	heap: list[tuple[int, int, dict[str, Any]]] = []
+	last_ts: int | None = None
+	late = 0
+	try:
+		for n, rec in enumerate(records):
+			ts = _ts(rec)
+			if last_ts is not None and ts < last_ts:
+				late += 1
+				metrics.inc("records_late_total", venue, stream)
+				continue
+			heapq.heappush(heap, (ts, n, rec))
+			if len(heap) > window:
+				last_ts, _, out = heapq.heappop(heap)
+				yield out
+		while heap:
+			_, _, out = heapq.heappop(heap)
+			yield out
+	finally:
+		if late:
+			logger.warning(
+				"skipped %s late records in %s beyond reorder_window=%s; use reorder_window=None to sort the whole file",
+				late,
+				path,
+				window,
+			)
+
+
+def _external_sort(records: Iterable[dict[str, Any]], run_size: int) -> Iterator[dict[str, Any]]:
+	run: list[dict[str, Any]] = []
+	with tempfile.TemporaryDirectory(prefix="capstan-sort-") as tmp:
+		runs: list[Path] = []
+		for rec in records:
+			run.append(rec)
+			if len(run) >= run_size:
+				runs.append(_spill_run(run, Path(tmp) / f"run-{len(runs)}.jsonl"))
+				run = []
+		if not runs:
+			run.sort(key=_ts)
+			yield from run
+			return
+		if run:
+			runs.append(_spill_run(run, Path(tmp) / f"run-{len(runs)}.jsonl"))
+			run = []
+		yield from heapq.merge(*(_read_run(p) for p in runs), key=_ts)
+
+
+def _spill_run(run: list[dict[str, Any]], path: Path) -> Path:
+	run.sort(key=_ts)
+	with path.open("wb") as f:
+		for rec in run:
+			f.write(orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE))
+	return path
+
+
+def _read_run(path: Path) -> Iterator[dict[str, Any]]:
+	with path.open("rb") as f:
+		for line in f:
+			yield orjson.loads(line)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from itertools import chain
+from typing import Any
+
+import numpy as np
+import orjson
+
+from capstan.compact import CompactBook, FloatArray
+from capstan.normalizer import to_float, to_int
+from capstan.schemas import OrderBook, PriceLevel
+
+# (ts, symbol, seq, bids, asks) pulled out of a venue-native book message
+BookFields = tuple[int, str, int, Any, Any]
+
+
+class VenueParser:
+	"""Turns one venue's native order book message into capstan books.
+
+	Subclasses only locate the fields; levels are ``[price, size, ...]`` arrays of
+	strings or numbers and go straight to float64 arrays without per-level dicts.
+	Bad levels are skipped exactly as ``normalize_orderbook`` skips them. Only
+	full snapshots are books: an incremental update raises ``ValueError`` and
+	belongs in ``capstan.l2book.BookEngine``.
+	"""
+
+	venue: str = ""
+
+	def fields(self, msg: Mapping[str, Any]) -> BookFields:
+		raise NotImplementedError
+
+	def parse_compact(self, msg: Mapping[str, Any], *, top_n: int | None = 10) -> CompactBook:
+		ts, symbol, seq, bids, asks = self.fields(msg)
+		bid_px, bid_qty = parse_levels(bids, top_n)
+		ask_px, ask_qty = parse_levels(asks, top_n)
+		book = CompactBook(
+			ts,
+			self.venue,
+			symbol,
+			seq,
+			np.concatenate([bid_px, ask_px]),
+			np.concatenate([bid_qty, ask_qty]),
+			bid_px.shape[0],
+		)
+		book.check()
+		return book
+
+	def parse_book(self, msg: Mapping[str, Any], *, top_n: int | None = 10) -> OrderBook:
+		ts, symbol, seq, bids, asks = self.fields(msg)
+		return OrderBook(
+			ts=ts,
+			venue=self.venue,
+			symbol=symbol,
+			bids=_price_levels(*parse_levels(bids, top_n)),
+			asks=_price_levels(*parse_levels(asks, top_n)),
+			seq=seq,
+		)
+
+	def parse_bytes(self, raw: bytes | str, *, top_n: int | None = 10) -> OrderBook:
+		return self.parse_book(orjson.loads(raw), top_n=top_n)
+
+	def parse_bytes_compact(self, raw: bytes | str, *, top_n: int | None = 10) -> CompactBook:
+		return self.parse_compact(orjson.loads(raw), top_n=top_n)
+
+
+class BybitParser(VenueParser):
+	"""v5 ``orderbook.{depth}.{symbol}`` push: ``{"ts", "data": {"s", "b", "a", "u", "seq"}}``."""
+
+	venue = "bybit"
+
+	def fields(self, msg: Mapping[str, Any]) -> BookFields:
+		_require_snapshot(self.venue, msg, "type")
+		data = msg["data"]
+		return to_int(msg["ts"]), str(data["s"]), to_int(data.get("u", 0)), data.get("b"), data.get("a")
+
+
+class BitgetParser(VenueParser):
+	"""v2 ``books``/``books{n}`` push: ``{"arg": {"instId"}, "data": [{"bids", "asks", "ts", "seq"}]}``."""
+
+	venue = "bitget"
+
+	def fields(self, msg: Mapping[str, Any]) -> BookFields:
+		_require_snapshot(self.venue, msg, "action")
+		data = msg["data"][0]
+		return to_int(data["ts"]), str(msg["arg"]["instId"]), to_int(data.get("seq", 0)), data.get("bids"), data.get("asks")
+
+
+class OkxParser(VenueParser):
+	"""v5 ``books``/``books5`` push: ``{"arg": {"instId"}, "data": [{"bids", "asks", "ts", "seqId"}]}``.
+
+	Levels are ``[price, size, liquidated orders, orders]``; instIds like
+	``BTC-USDT-SWAP`` map to ``BTCUSDT``. ``books5`` pushes carry no ``action``
+	and are always snapshots.
+	"""
+
+	venue = "okx"
+
+	def fields(self, msg: Mapping[str, Any]) -> BookFields:
+		_require_snapshot(self.venue, msg, "action")
+		data = msg["data"][0]
+		symbol = okx_symbol(str(msg["arg"]["instId"]))
+		return to_int(data["ts"]), symbol, to_int(data.get("seqId", 0)), data.get("bids"), data.get("asks")
+
+
+def _require_snapshot(venue: str, msg: Mapping[str, Any], field: str) -> None:
+	kind = msg.get(field, "snapshot")
+	if kind != "snapshot":
+		raise ValueError(f"{venue} {field}={kind!r} is an incremental update, not a book; apply it with BookEngine")
+
+
+def okx_symbol(inst_id: str) -> str:
+	return "".join(inst_id.removesuffix("-SWAP").split("-"))
+
+
+def parse_levels(levels: object, top_n: int | None) -> tuple[FloatArray, FloatArray]:
+	"""Prices and sizes of ``[price, size, ...]`` levels, keeping the first ``top_n`` valid ones."""
+	if isinstance(levels, list):
+		fast = _fast_levels(levels if top_n is None else levels[:top_n])
+		if fast is not None:
+			return fast
+	arr = np.array(_valid_levels(levels, top_n), dtype=np.float64).reshape(-1, 2)
+	return np.ascontiguousarray(arr[:, 0]), np.ascontiguousarray(arr[:, 1])
+
+
+_FAST_TYPES = frozenset((float, int, str))
+
+
+def _fast_levels(head: list[Any]) -> tuple[FloatArray, FloatArray] | None:
+	# one np.array call when every level is a same-width list of str/int/float
+	if not set(map(type, head)) <= {list} or len(set(map(len, head))) > 1:
+		return None
+	if not head:
+		return np.empty(0), np.empty(0)
+	if len(head[0]) < 2 or not set(map(type, chain.from_iterable(head))) <= _FAST_TYPES:
+		return None
+	try:
+		arr = np.array(head, dtype=np.float64)
+	except (TypeError, ValueError, OverflowError):
+		return None
+	return np.ascontiguousarray(arr[:, 0]), np.ascontiguousarray(arr[:, 1])
+
+
+def _valid_levels(levels: object, top_n: int | None) -> list[tuple[float, float]]:
+	out: list[tuple[float, float]] = []
+	if isinstance(levels, Sequence) and not isinstance(levels, str | bytes):
+		for item in levels:
+			if not isinstance(item, Sequence) or isinstance(item, str | bytes) or len(item) < 2:
+				continue
+			try:
+				out.append((to_float(item[0]), to_float(item[1])))
+			except Exception:
+				continue
+			if top_n is not None and len(out) >= top_n:
+				break
+	return out
+
+
+def _price_levels(px: FloatArray, qty: FloatArray) -> list[PriceLevel]:
+	return [PriceLevel(price=p, qty=q) for p, q in zip(px.tolist(), qty.tolist(), strict=True)]
+
+
+_PARSERS: dict[str, VenueParser] = {}
+
+
+def register_parser(parser: VenueParser) -> VenueParser:
+	if not parser.venue:
+		raise ValueError("parser has no venue")
+	_PARSERS[parser.venue] = parser
+	return parser
+
+
+def get_parser(venue: str) -> VenueParser:
+	try:
+		return _PARSERS[venue]
+	except KeyError:
+		raise KeyError(f"no book parser registered for venue {venue!r}; have {sorted(_PARSERS)}") from None
+
+
+def registered_venues() -> list[str]:
+	return sorted(_PARSERS)
+
+
+for _parser in (BybitParser(), BitgetParser(), OkxParser()):
+	register_parser(_parser)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
+from types import TracebackType
+from typing import Any, Generic, Literal, TypeVar
+
+import orjson
+import websockets
+from pydantic import BaseModel
+
+from capstan import metrics
+from capstan.config import VenueConfig
+from capstan.schemas import Funding, IndexMark, OpenInterest, OrderBook
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+OverflowPolicy = Literal["drop_oldest", "conflate_latest"]
+
+DEFAULT_QUEUE_SIZE = 1024
+
+
+class AsyncVenueAdapter:
+	def books(self, symbol: str) -> AsyncIterator[OrderBook]:
+		raise NotImplementedError
+
+	def oi(self, symbol: str) -> AsyncIterator[OpenInterest]:
+		raise NotImplementedError
+
+	def funding(self, symbol: str) -> AsyncIterator[Funding]:
+		raise NotImplementedError
+
+	def indexmark(self, symbol: str) -> AsyncIterator[IndexMark]:
+		raise NotImplementedError
+
+
+class BoundedQueue(Generic[T]):
+	"""Single-consumer queue whose producer never blocks.
+
+	When full, ``drop_oldest`` discards the oldest item and ``conflate_latest``
+	collapses the backlog to the newest item. Discarded items are counted in
+	``ws_dropped_total`` / ``ws_conflated_total``.
+	"""
+
+	def __init__(self, maxsize: int, policy: OverflowPolicy, *, venue: str, stream: str) -> None:
+		if maxsize < 1:
+			raise ValueError("maxsize must be >= 1")
+		self.maxsize = maxsize
+		self.policy = policy
+		self.venue = venue
+		self.stream = stream
+		self._items: deque[T] = deque()
+		self._ready = asyncio.Event()
+		self._closed = False
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+	def put_nowait(self, item: T) -> None:
+		if self._closed:
+			return
+		if len(self._items) >= self.maxsize:
+			if self.policy == "drop_oldest":
+				self._items.popleft()
+				metrics.inc("ws_dropped_total", self.venue, self.stream)
+			else:
+				metrics.inc("ws_conflated_total", self.venue, self.stream, len(self._items))
+				self._items.clear()
+		self._items.append(item)
+		self._ready.set()
+
+	def close(self) -> None:
+		self._closed = True
+		self._ready.set()
+
+	async def get(self) -> T | None:
+		while not self._items:
+			if self._closed:
+				return None
+			self._ready.clear()
+			await self._ready.wait()
+		return self._items.popleft()
+
+
+class WebsocketAdapter(AsyncVenueAdapter):
+	"""Multiplexes every subscribed (stream, symbol) over one websocket.
+
+	Messages are ``{"topic": "<stream>.<symbol>", "data": {...}}`` with ``data``
+	in the schema layout; venue-native protocols override
+	``subscribe_message``/``unsubscribe_message``/``decode``. Each consumer gets
+	its own ``BoundedQueue``, so a slow consumer drops or conflates its own
+	backlog instead of stalling the socket. At most ``ws_subs`` topics can be
+	subscribed at once.
+	"""
+
+	def __init__(
+		self,
+		venue: str,
+		url: str,
+		*,
+		ws_subs: int,
+		queue_size: int = DEFAULT_QUEUE_SIZE,
+		policy: OverflowPolicy = "drop_oldest",
+	) -> None:
+		self.venue = venue
+		self.url = url
+		self.ws_subs = ws_subs
+		self.queue_size = queue_size
+		self.policy = policy
+		self.logger = logging.getLogger(f"capstan.adapters.ws.{venue}")
+		self._ws: Any = None
+		self._reader: asyncio.Task[None] | None = None
+		self._queues: dict[str, set[BoundedQueue[dict[str, Any]]]] = {}
+
+	@classmethod
+	def from_config(cls, venue: VenueConfig, *, url: str | None = None, **kwargs: Any) -> WebsocketAdapter:
+		return cls(venue.name, url or venue.ws_base, ws_subs=venue.rate_limits.ws_subs, **kwargs)
+
+	async def __aenter__(self) -> WebsocketAdapter:
+		await self.connect()
+		return self
+
+	async def __aexit__(
+		self,
+		exc_type: type[BaseException] | None,
+		exc: BaseException | None,
+		tb: TracebackType | None,
+	) -> None:
+		await self.close()
+
+	async def connect(self) -> None:
+		self._ws = await websockets.connect(self.url)
+		self._reader = asyncio.create_task(self._read_loop())
+
+	async def close(self) -> None:
+		if self._reader is not None:
+			self._reader.cancel()
+			try:
+				await self._reader
+			except asyncio.CancelledError:
+				pass
+			self._reader = None
+		if self._ws is not None:
+			await self._ws.close()
+			self._ws = None
+		self._close_queues()
+
+	def books(self, symbol: str) -> AsyncIterator[OrderBook]:
+		return self._stream("books", symbol, OrderBook)
+
+	def oi(self, symbol: str) -> AsyncIterator[OpenInterest]:
+		return self._stream("oi", symbol, OpenInterest)
+
+	def funding(self, symbol: str) -> AsyncIterator[Funding]:
+		return self._stream("funding", symbol, Funding)
+
+	def indexmark(self, symbol: str) -> AsyncIterator[IndexMark]:
+		return self._stream("index", symbol, IndexMark)
+
+	def subscribe_message(self, topic: str) -> bytes:
+		return orjson.dumps({"op": "subscribe", "args": [topic]})
+
+	def unsubscribe_message(self, topic: str) -> bytes:
+		return orjson.dumps({"op": "unsubscribe", "args": [topic]})
+
+	def decode(self, message: str | bytes) -> tuple[str, dict[str, Any]] | None:
+		msg = orjson.loads(message)
+		if not isinstance(msg, dict):
+			return None
+		topic = msg.get("topic")
+		data = msg.get("data")
+		if not isinstance(topic, str) or not isinstance(data, dict):
+			return None
+		return topic, data
+
+	async def _stream(self, stream: str, symbol: str, model: type[M]) -> AsyncIterator[M]:
+		topic = f"{stream}.{symbol}"
+		queue: BoundedQueue[dict[str, Any]] = BoundedQueue(self.queue_size, self.policy, venue=self.venue, stream=stream)
+		await self._subscribe(topic, queue)
+		try:
+			while True:
+				rec = await queue.get()
+				if rec is None:
+					return
+				yield model(**rec)
+		finally:
+			await self._unsubscribe(topic, queue)
+
+	async def _subscribe(self, topic: str, queue: BoundedQueue[dict[str, Any]]) -> None:
+		if self._ws is None:
+			raise RuntimeError("adapter is not connected")
+		consumers = self._queues.get(topic)
+		if consumers is None:
+			if len(self._queues) >= self.ws_subs:
+				raise ValueError(f"{self.venue}: ws_subs limit of {self.ws_subs} topics reached")
+			consumers = self._queues[topic] = set()
+			await self._ws.send(self.subscribe_message(topic))
+		consumers.add(queue)
+
+	async def _unsubscribe(self, topic: str, queue: BoundedQueue[dict[str, Any]]) -> None:
+		queue.close()
+		consumers = self._queues.get(topic)
+		if consumers is None:
+			return
+		consumers.discard(queue)
+		if not consumers:
+			del self._queues[topic]
+			if self._ws is not None:
+				try:
+					await self._ws.send(self.unsubscribe_message(topic))
+				except websockets.ConnectionClosed:
+					pass
+
+	async def _read_loop(self) -> None:
+		try:
+			async for message in self._ws:
+				try:
+					decoded = self.decode(message)
+				except orjson.JSONDecodeError as exc:
+					self.logger.warning("skip invalid ws message: %s", exc)
+					metrics.inc("records_skipped_total", self.venue, "ws")
+					continue
+				if decoded is None:
+					continue
+				topic, data = decoded
+				consumers = self._queues.get(topic)
+				if not consumers:
+					continue
+				metrics.inc("records_read_total", self.venue, topic.split(".", 1)[0])
+				for queue in consumers:
+					queue.put_nowait(data)
+		except websockets.ConnectionClosed as exc:
+			self.logger.warning("websocket closed: %s", exc)
+		finally:
+			self._close_queues()
+
+	def _close_queues(self) -> None:
+		for consumers in self._queues.values():
+			for queue in consumers:
+				queue.close()
+
+
+def ws_adapters(venues: Mapping[str, VenueConfig], **kwargs: Any) -> dict[str, WebsocketAdapter]:
+	return {name: WebsocketAdapter.from_config(cfg, **kwargs) for name, cfg in venues.items()}
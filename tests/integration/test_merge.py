@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+
+from capstan.merge import AsOfJoin, adapter_streams, asof_join, merge_streams
+from capstan.venue_adapters import BitgetRO, BybitRO
+
+
+def test_merge_emits_global_ts_order() -> None:
+	streams = adapter_streams({"bybit": BybitRO(), "bitget": BitgetRO()}, ["BTCUSDT"], ["books", "index", "oi", "funding"])
+	events = list(merge_streams(streams))
+	assert [e.ts for _, e in events] == sorted(e.ts for _, e in events)
+	assert {key for key, _ in events} == set(streams)
+	# ties keep stream order: bybit books before bitget books at ts=1000
+	first_books = [key for key, e in events if e.ts == 1000 and key[2] == "books"]
+	assert first_books == [("bybit", "BTCUSDT", "books"), ("bitget", "BTCUSDT", "books")]
+
+
+class _Event:
+	def __init__(self, ts: int) -> None:
+		self.ts = ts
+
+
+def _endless(start: int):
+	ts = start
+	while True:
+		yield _Event(ts)
+		ts += 10
+
+
+def test_merge_is_lazy() -> None:
+	merged = merge_streams({"a": _endless(0), "b": _endless(5)})
+	assert [next(merged) for _ in range(4)][-1][0] == "b"
+	assert next(merged)[1].ts == 20
+
+
+def test_asof_join_latest_book_per_venue() -> None:
+	streams = adapter_streams({"bybit": BybitRO(), "bitget": BitgetRO()}, ["BTCUSDT"])
+	out = dict(asof_join(streams, [999, 1000, 1250, 5000]))
+	assert out[999] == {}
+	assert {k[0]: ob.ts for k, ob in out[1000].items()} == {"bybit": 1000, "bitget": 1000}
+	assert {k[0]: ob.seq for k, ob in out[1250].items()} == {"bybit": 2, "bitget": 2}
+	assert {k[0]: ob.ts for k, ob in out[5000].items()} == {"bybit": 1400, "bitget": 1400}
+
+
+def test_asof_rejects_backwards_time() -> None:
+	join = AsOfJoin(merge_streams(adapter_streams({"bybit": BybitRO()}, ["BTCUSDT"])))
+	join.at(1100)
+	with pytest.raises(ValueError):
+		join.at(1000)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from capstan import latency, metrics
+from capstan.metrics_exporter import start_exporter
+
+
+def test_metrics_endpoint_exposes_all_kinds() -> None:
+	metrics.reset()
+	metrics.inc("records_read_total", "bybit", "books", 4)
+	metrics.set_gauge("ws_queue_depth", "okx", "books", 2.0)
+	metrics.observe("stage_seconds", "bybit", "decode", 0.002)
+	latency.reset()
+	latency.enable()
+	latency.record("decode", "bybit", "books", 2_000)
+	latency.disable()
+	server, thread = start_exporter(0, "127.0.0.1")
+	try:
+		body = httpx.get(f"http://127.0.0.1:{server.server_port}/metrics").text
+	finally:
+		server.shutdown()
+		thread.join()
+	samples = {(s.name, s.labels.get("venue"), s.labels.get("le")): s.value for f in text_string_to_metric_families(body) for s in f.samples}
+	assert samples[("capstan_records_read_total", "bybit", None)] == 4
+	assert samples[("capstan_ws_queue_depth", "okx", None)] == 2.0
+	assert samples[("capstan_stage_seconds_bucket", "bybit", "0.001")] == 0
+	assert samples[("capstan_stage_seconds_bucket", "bybit", "0.005")] == 1
+	assert samples[("capstan_stage_seconds_bucket", "bybit", "+Inf")] == 1
+	assert samples[("capstan_stage_seconds_count", "bybit", None)] == 1
+	assert samples[("capstan_stage_latency_samples_total", "bybit", None)] == 1
+	assert 1.9e-6 <= samples[("capstan_stage_latency_seconds", "bybit", None)] <= 2.0e-6
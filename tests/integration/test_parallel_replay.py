@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+
+from capstan.config import load_config
+from capstan.core import (
+	cancel_velocity,
+	depth_weighted_sigma,
+	lob10_imbalance,
+	sweep_detector,
+)
+from capstan.replay import ReplayShard, run_replay, shards_from_config
+from capstan.venue_adapters import FixtureRO
+
+
+def _write_books(root: Path, venue: str, symbols: list[str], n: int, seed: int) -> None:
+	rng = random.Random(seed)
+	(root / venue).mkdir(parents=True)
+	with (root / venue / "books.jsonl").open("w") as f:
+		for i in range(n):
+			for symbol in symbols:
+				mid = 100.0 + rng.uniform(-1, 1)
+				rec = {
+					"ts": 1000 + 100 * i,
+					"venue": venue,
+					"symbol": symbol,
+					"bids": [{"price": round(mid - 0.1 * (k + 1), 2), "qty": rng.uniform(0, 2)} for k in range(rng.randint(1, 12))],
+					"asks": [{"price": round(mid + 0.1 * (k + 1), 2), "qty": rng.uniform(0, 2)} for k in range(rng.randint(1, 12))],
+					"seq": i + 1,
+				}
+				f.write(json.dumps(rec) + "\n")
+
+
+def test_parallel_replay_matches_serial_and_scalar(tmp_path: Path) -> None:
+	symbols = ["BTCUSDT", "ETHUSDT"]
+	for seed, venue in enumerate(("bybit", "bitget")):
+		_write_books(tmp_path, venue, symbols, 120, seed)
+	config = {"venues": ["bybit", "bitget", "okx"], "pairs": symbols}
+	shards = shards_from_config(config, tmp_path)
+	assert {(s.venue, s.symbol) for s in shards} == {(v, s) for v in ("bybit", "bitget") for s in symbols}
+
+	parallel = run_replay(shards, max_workers=2, chunk_size=7)
+	serial = run_replay(shards, max_workers=0)
+	assert parallel.keys() == serial.keys()
+	for key, result in parallel.items():
+		assert len(result) == 120
+		for name, values in result.columns.items():
+			np.testing.assert_array_equal(values, serial[key].columns[name])
+
+	books = list(FixtureRO(tmp_path / "bybit", "capstan.adapters.bybit").books("ETHUSDT"))
+	cols = parallel[("bybit", "ETHUSDT")].columns
+	for i, ob in enumerate(books):
+		bids = [(lv.price, lv.qty) for lv in ob.bids]
+		asks = [(lv.price, lv.qty) for lv in ob.asks]
+		assert cols["ts"][i] == ob.ts
+		assert cols["sigma"][i] == depth_weighted_sigma(bids, asks)
+		assert cols["imbalance"][i] == lob10_imbalance(bids, asks)
+		if i:
+			prev = books[i - 1]
+			pb = [(lv.price, lv.qty) for lv in prev.bids]
+			pa = [(lv.price, lv.qty) for lv in prev.asks]
+			assert bool(cols["sweep"][i]) == sweep_detector(pb, bids, pa, asks)
+			assert cols["cancel_velocity_bids"][i] == cancel_velocity(pb, bids)
+			assert cols["cancel_velocity_asks"][i] == cancel_velocity(pa, asks)
+
+
+def test_replay_fixture_universe() -> None:
+	shards = shards_from_config(load_config(), Path("tests/fixtures"))
+	assert {s.venue for s in shards} == {"bybit", "bitget"}
+	results = run_replay(shards, max_workers=0)
+	assert len(results[("bybit", "BTCUSDT")]) == 3
+	assert len(results[("bybit", "ETHUSDT")]) == 0
+	assert run_replay([ReplayShard("bybit", "BTCUSDT", Path("tests/fixtures/bybit"))], max_workers=1).keys() == {("bybit", "BTCUSDT")}
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from capstan.parquet_store import ParquetRO, convert_jsonl_to_parquet
+from capstan.venue_adapters import BitgetRO, BybitRO
+
+DAY_MS = 86_400_000
+
+
+@pytest.mark.parametrize("venue,fixture", [("bybit", BybitRO), ("bitget", BitgetRO)])
+def test_parquet_roundtrip_matches_fixture_adapter(tmp_path: Path, venue: str, fixture: type) -> None:
+	written = convert_jsonl_to_parquet(Path("tests/fixtures") / venue, tmp_path, depth=5)
+	assert written["books"] > 0
+	src = fixture()
+	pq = ParquetRO(tmp_path, venue)
+	assert list(pq.books("BTCUSDT")) == list(src.books("BTCUSDT"))
+	assert list(pq.oi("BTCUSDT")) == list(src.oi("BTCUSDT"))
+	assert list(pq.funding("BTCUSDT")) == list(src.funding("BTCUSDT"))
+	assert list(pq.indexmark("BTCUSDT")) == list(src.indexmark("BTCUSDT"))
+	assert [b.to_orderbook() for b in pq.compact_books("BTCUSDT")] == list(src.books("BTCUSDT"))
+	assert list(pq.books("ETHUSDT")) == []
+
+
+def test_partitions_and_range_queries(tmp_path: Path) -> None:
+	src = tmp_path / "jsonl"
+	src.mkdir()
+	with (src / "books.jsonl").open("w") as f:
+		for day in (2, 0, 1):
+			for symbol in ("BTCUSDT", "ETHUSDT"):
+				rec = {
+					"ts": day * DAY_MS + 5,
+					"venue": "okx",
+					"symbol": symbol,
+					"bids": [{"price": 100.0 - i, "qty": 1.0} for i in range(30)],
+					"asks": [{"price": 101.0 + i, "qty": 1.0} for i in range(3)],
+					"seq": day,
+				}
+				f.write(json.dumps(rec) + "\n")
+		f.write("{broken\n")
+	dest = tmp_path / "pq"
+	assert convert_jsonl_to_parquet(src, dest, depth=20) == {"books": 6}
+	dates = sorted(p.name for p in (dest / "books" / "venue=okx" / "symbol=BTCUSDT").iterdir())
+	assert dates == ["date=1970-01-01", "date=1970-01-02", "date=1970-01-03"]
+	pq = ParquetRO(dest, "okx")
+	assert [ob.seq for ob in pq.books("BTCUSDT")] == [0, 1, 2]
+	assert [ob.seq for ob in pq.books("BTCUSDT", start_ts=DAY_MS, end_ts=2 * DAY_MS + 5)] == [1]
+	ob = next(pq.books("ETHUSDT"))
+	assert len(ob.bids) == 20 and len(ob.asks) == 3
+	assert list(ParquetRO(dest, "bybit").books("BTCUSDT")) == []
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import orjson
+import pytest
+
+from capstan.config import load_venues
+from capstan.normalizer import normalize_orderbook, normalize_orderbook_compact
+from capstan.venue_parsers import (
+	get_parser,
+	okx_symbol,
+	parse_levels,
+	registered_venues,
+)
+
+FIXTURES = Path("tests/fixtures")
+
+
+def _fixture_books(venue: str) -> list[dict[str, Any]]:
+	with (FIXTURES / venue / "books.jsonl").open() as f:
+		return [json.loads(line) for line in f if line.strip()]
+
+
+def _levels(rec: dict[str, Any], side: str, extra: tuple[str, ...] = ()) -> list[list[str]]:
+	return [[str(lv["price"]), str(lv["qty"]), *extra] for lv in rec[side]]
+
+
+def _native(venue: str, rec: dict[str, Any]) -> dict[str, Any]:
+	if venue == "bybit":
+		data = {"s": rec["symbol"], "b": _levels(rec, "bids"), "a": _levels(rec, "asks"), "u": rec["seq"], "seq": 99}
+		return {"topic": f"orderbook.50.{rec['symbol']}", "type": "snapshot", "ts": rec["ts"], "data": data}
+	if venue == "bitget":
+		data = {"bids": _levels(rec, "bids"), "asks": _levels(rec, "asks"), "checksum": 0, "seq": rec["seq"], "ts": str(rec["ts"])}
+		return {"action": "snapshot", "arg": {"instType": "USDT-FUTURES", "channel": "books15", "instId": rec["symbol"]}, "data": [data]}
+	data = {"bids": _levels(rec, "bids", ("0", "3")), "asks": _levels(rec, "asks", ("0", "3")), "ts": str(rec["ts"]), "seqId": rec["seq"]}
+	return {"arg": {"channel": "books", "instId": rec["symbol"][:-4] + "-USDT-SWAP"}, "data": [data]}
+
+
+@pytest.mark.parametrize("venue", ["bybit", "bitget"])
+def test_native_parsers_match_normalizer_on_fixtures(venue: str) -> None:
+	parser = get_parser(venue)
+	for rec in _fixture_books(venue):
+		msg = _native(venue, rec)
+		assert parser.parse_book(msg) == normalize_orderbook(rec)
+		assert parser.parse_bytes(orjson.dumps(msg)) == normalize_orderbook(rec)
+		assert parser.parse_compact(msg, top_n=None) == normalize_orderbook_compact(rec, top_n=None)
+
+
+def test_okx_four_column_levels() -> None:
+	rec = {**_fixture_books("bybit")[0], "venue": "okx"}
+	rec["bids"] = [{"price": 100.0 - 0.1 * i, "qty": 1.0 + i} for i in range(15)]
+	parser = get_parser("okx")
+	msg = _native("okx", rec)
+	assert parser.parse_book(msg) == normalize_orderbook(rec)
+	assert parser.parse_compact(msg).bids() == [(lv["price"], lv["qty"]) for lv in rec["bids"][:10]]
+	assert okx_symbol("BTC-USDT-SWAP") == "BTCUSDT" and okx_symbol("ETH-USDT") == "ETHUSDT"
+
+
+def test_bad_levels_are_skipped_like_normalizer() -> None:
+	levels = [["x", "1"], ["100.0", "2"], [True, "1"], ["99.5"], "junk", [99.0, 3], ["98.0", None], *[[str(97 - i), "1"] for i in range(10)]]
+	px, qty = parse_levels(levels, 10)
+	as_dicts = [{"price": lv[0], "qty": lv[1]} for lv in levels if isinstance(lv, list) and len(lv) == 2]
+	expected = normalize_orderbook_compact({"ts": 1, "venue": "v", "symbol": "s", "bids": as_dicts, "asks": []})
+	assert px.tolist() == expected.bid_px.tolist()
+	assert qty.tolist() == expected.bid_qty.tolist()
+	assert parse_levels(None, 10)[0].shape == (0,)
+
+
+def test_registry_is_keyed_by_configured_venues() -> None:
+	venues = load_venues()
+	assert set(registered_venues()) <= set(venues)
+	with pytest.raises(KeyError, match="no book parser"):
+		get_parser("nope")
+
+
+@pytest.mark.parametrize(("venue", "field", "kind"), [("bybit", "type", "delta"), ("bitget", "action", "update"), ("okx", "action", "update")])
+def test_parsers_reject_incremental_updates(venue: str, field: str, kind: str) -> None:
+	msg = {**_native(venue, _fixture_books("bybit")[0]), field: kind}
+	parser = get_parser(venue)
+	with pytest.raises(ValueError, match="incremental update"):
+		parser.parse_book(msg)
+	with pytest.raises(ValueError, match="incremental update"):
+		parser.parse_bytes_compact(orjson.dumps(msg))
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+import websockets
+
+from capstan import metrics
+from capstan.config import load_venues
+from capstan.venue_adapters import BybitRO
+from capstan.ws_adapter import BoundedQueue, WebsocketAdapter
+
+FILES = {"books": "books.jsonl", "oi": "oi.jsonl", "funding": "funding.jsonl", "index": "index.jsonl"}
+
+
+def _fixture_records(root: Path, stream: str, symbol: str) -> list[dict[str, Any]]:
+	with (root / FILES[stream]).open() as f:
+		recs = [json.loads(line) for line in f if line.strip()]
+	return sorted((r for r in recs if r["symbol"] == symbol), key=lambda r: r["ts"])
+
+
+@asynccontextmanager
+async def _replay_server(root: Path, *, repeat: int = 1, gate: asyncio.Event | None = None) -> AsyncIterator[str]:
+	"""Stand-in venue: replays fixture jsonl records for each subscribed topic, then closes."""
+	subscribed: list[str] = []
+
+	async def handler(ws: Any) -> None:
+		async for raw in ws:
+			msg = json.loads(raw)
+			if msg["op"] != "subscribe":
+				continue
+			await ws.send(json.dumps({"op": "subscribe", "success": True}))
+			subscribed.extend(msg["args"])
+			if gate is not None:
+				await gate.wait()
+			for topic in msg["args"]:
+				stream, symbol = topic.split(".", 1)
+				for _ in range(repeat):
+					for rec in _fixture_records(root, stream, symbol):
+						await ws.send(json.dumps({"topic": topic, "data": rec}))
+			if len(subscribed) >= 4 or gate is not None:
+				await ws.close()
+				return
+
+	async with websockets.serve(handler, "127.0.0.1", 0) as server:
+		port = next(iter(server.sockets)).getsockname()[1]
+		yield f"ws://127.0.0.1:{port}"
+
+
+def _run(coro_fn: Callable[[], Awaitable[None]]) -> None:
+	asyncio.run(asyncio.wait_for(coro_fn(), timeout=10))
+
+
+def test_ws_adapter_replays_fixture_streams() -> None:
+	root = Path("tests/fixtures/bybit")
+	venue = load_venues()["bybit"]
+
+	async def main() -> None:
+		async with _replay_server(root) as url:
+			async with WebsocketAdapter.from_config(venue, url=url) as adapter:
+				async def take(it: AsyncIterator[Any], n: int) -> list[Any]:
+					out = []
+					async for item in it:
+						out.append(item)
+						if len(out) == n:
+							break
+					return out
+
+				fixture = BybitRO(root=root)
+				want = {
+					"books": list(fixture.books("BTCUSDT")),
+					"oi": list(fixture.oi("BTCUSDT")),
+					"funding": list(fixture.funding("BTCUSDT")),
+					"index": list(fixture.indexmark("BTCUSDT")),
+				}
+				got = await asyncio.gather(
+					take(adapter.books("BTCUSDT"), len(want["books"])),
+					take(adapter.oi("BTCUSDT"), len(want["oi"])),
+					take(adapter.funding("BTCUSDT"), len(want["funding"])),
+					take(adapter.indexmark("BTCUSDT"), len(want["index"])),
+				)
+				assert got == list(want.values())
+
+	_run(main)
+
+
+def test_ws_adapter_conflates_slow_consumer() -> None:
+	metrics.reset()
+	root = Path("tests/fixtures/bybit")
+
+	async def main() -> None:
+		gate = asyncio.Event()
+		async with _replay_server(root, repeat=50, gate=gate) as url:
+			async with WebsocketAdapter("bybit", url, ws_subs=2, queue_size=1, policy="conflate_latest") as adapter:
+				it = adapter.books("BTCUSDT")
+				first = asyncio.ensure_future(it.__anext__())
+				await asyncio.sleep(0.05)
+				gate.set()
+				await asyncio.sleep(0.2)
+				got = [await first]
+				async for ob in it:
+					got.append(ob)
+				assert len(got) < 50 * 3
+				assert got[-1].ts == max(ob.ts for ob in BybitRO(root=root).books("BTCUSDT"))
+
+	_run(main)
+	assert metrics.get("ws_conflated_total", "bybit", "books") > 0
+
+
+def test_ws_subs_limit_enforced() -> None:
+	async def main() -> None:
+		gate = asyncio.Event()
+		async with _replay_server(Path("tests/fixtures/bybit"), gate=gate) as url:
+			async with WebsocketAdapter("bybit", url, ws_subs=1) as adapter:
+				books = adapter.books("BTCUSDT")
+				pending = asyncio.ensure_future(books.__anext__())
+				await asyncio.sleep(0.05)
+				with pytest.raises(ValueError):
+					await adapter.oi("BTCUSDT").__anext__()
+				gate.set()
+				assert (await pending).symbol == "BTCUSDT"
+				await books.aclose()
+
+	_run(main)
+
+
+def test_bounded_queue_drop_oldest() -> None:
+	async def main() -> None:
+		q: BoundedQueue[int] = BoundedQueue(2, "drop_oldest", venue="v", stream="books")
+		for i in range(5):
+			q.put_nowait(i)
+		q.close()
+		assert [await q.get(), await q.get(), await q.get()] == [3, 4, None]
+
+	metrics.reset()
+	_run(main)
+	assert metrics.get("ws_dropped_total", "v", "books") == 3
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from capstan.batch import (
+	BookStack,
+	book_signals,
+	cancel_velocity_batch,
+	depth_weighted_sigma_batch,
+	lob10_imbalance_batch,
+	sweep_detector_batch,
+)
+from capstan.compact import CompactBook
+from capstan.core import (
+	cancel_velocity,
+	depth_weighted_sigma,
+	lob10_imbalance,
+	sweep_detector,
+)
+
+
+def _books(n: int, seed: int = 3) -> list[CompactBook]:
+	rng = random.Random(seed)
+	out = []
+	mid = 100.0
+	for i in range(n):
+		mid += rng.uniform(-0.3, 0.3)
+		nb = rng.randint(0, 14)
+		na = rng.randint(0, 14)
+		bids = [(round(mid - 0.05 - 0.1 * k, 1), rng.choice([0.0, rng.uniform(0.1, 3.0)])) for k in range(nb)]
+		asks = [(round(mid + 0.05 + 0.1 * k, 1), rng.uniform(0.1, 3.0)) for k in range(na)]
+		if bids and rng.random() < 0.3:
+			bids.append(bids[0])
+		if asks and rng.random() < 0.3:
+			asks.insert(1, (asks[0][0] + 5e-10, 1.0))
+		out.append(CompactBook.from_levels(1000 + 100 * i, "v", "S", i, bids, asks))
+	return out
+
+
+def test_batch_matches_scalar() -> None:
+	books = _books(300)
+	stack = BookStack.from_books(books)
+	sigma = depth_weighted_sigma_batch(stack.bid_px, stack.bid_qty, stack.ask_px, stack.ask_qty, top_n=5)
+	imb = lob10_imbalance_batch(stack.bid_px, stack.bid_qty, stack.ask_px, stack.ask_qty)
+	for i, b in enumerate(books):
+		assert sigma[i] == depth_weighted_sigma(b.bids(), b.asks(), top_n=5)
+		assert imb[i] == lob10_imbalance(b.bids(), b.asks())
+
+
+def test_pairwise_batch_matches_scalar() -> None:
+	books = _books(300, seed=11)
+	stack = BookStack.from_books(books)
+	prev, curr = slice(0, -1), slice(1, None)
+	for top_n in (None, 4):
+		cv_bids = cancel_velocity_batch(
+			stack.bid_px[prev], stack.bid_qty[prev], stack.bid_px[curr], stack.bid_qty[curr], top_n=top_n
+		)
+		cv_asks = cancel_velocity_batch(
+			stack.ask_px[prev], stack.ask_qty[prev], stack.ask_px[curr], stack.ask_qty[curr], top_n=top_n
+		)
+		for i in range(len(books) - 1):
+			assert cv_bids[i] == cancel_velocity(books[i].bids(), books[i + 1].bids(), top_n=top_n)
+			assert cv_asks[i] == cancel_velocity(books[i].asks(), books[i + 1].asks(), top_n=top_n)
+	sw = sweep_detector_batch(stack.bid_px[prev], stack.bid_px[curr], stack.ask_px[prev], stack.ask_px[curr], threshold_bps=5.0)
+	for i in range(len(books) - 1):
+		a, b = books[i], books[i + 1]
+		assert bool(sw[i]) == sweep_detector(a.bids(), b.bids(), a.asks(), b.asks(), threshold_bps=5.0)
+
+
+def test_book_signals_shapes() -> None:
+	stack = BookStack.from_books(_books(20), depth=10)
+	out = book_signals(stack)
+	assert set(out) == {"sigma", "imbalance", "cancel_velocity_bids", "cancel_velocity_asks", "sweep"}
+	assert all(v.shape == (20,) for v in out.values())
+	assert out["cancel_velocity_bids"][0] == 0.0 and not out["sweep"][0]
+	assert np.all((out["cancel_velocity_asks"] >= 0.0) & (out["cancel_velocity_asks"] <= 1.0))
+
+
+def test_cancel_velocity_zero_width_levels() -> None:
+	empty = [CompactBook(1000 + i, "bybit", "BTCUSDT", i, np.empty(0), np.empty(0), 0) for i in range(3)]
+	out = book_signals(BookStack.from_books(empty))
+	assert not out["cancel_velocity_bids"].any() and not out["cancel_velocity_asks"].any()
+
+	stack = BookStack.from_books(_books(10), depth=10)
+	prev, curr = slice(0, -1), slice(1, None)
+	args = (stack.bid_px[prev], stack.bid_qty[prev], stack.bid_px[curr], stack.bid_qty[curr])
+	np.testing.assert_array_equal(cancel_velocity_batch(*args, top_n=0), np.zeros(9))
+	gone = cancel_velocity_batch(stack.bid_px[prev], stack.bid_qty[prev], np.empty((9, 0)), np.empty((9, 0)))
+	expected = [cancel_velocity(b.bids(), []) for b in _books(10)[:-1]]
+	assert gone.tolist() == expected
+
+
+def test_cancel_velocity_deep_ladders(monkeypatch: pytest.MonkeyPatch) -> None:
+	rng = random.Random(5)
+	books = []
+	for i in range(40):
+		nb = rng.randint(150, 200)
+		bids = [(round(100.0 - 0.01 * k, 2), rng.choice([0.0, rng.uniform(0.1, 3.0)])) for k in range(nb) if rng.random() < 0.9]
+		asks = [(round(100.01 + 0.01 * k, 2), rng.uniform(0.1, 3.0)) for k in range(200) if rng.random() < 0.9]
+		books.append(CompactBook.from_levels(1000 + i, "v", "S", i, bids, asks))
+	stack = BookStack.from_books(books)
+	assert stack.bid_px.shape[1] > 150
+	prev, curr = slice(0, -1), slice(1, None)
+	for top_n in (None, 20):
+		cv = cancel_velocity_batch(
+			stack.bid_px[prev], stack.bid_qty[prev], stack.bid_px[curr], stack.bid_qty[curr], top_n=top_n
+		)
+		expected = [cancel_velocity(books[i].bids(), books[i + 1].bids(), top_n=top_n) for i in range(len(books) - 1)]
+		assert cv.tolist() == expected
+
+	monkeypatch.setattr("capstan.batch.CANCEL_BLOCK_ELEMENTS", 1000)
+	blocked = cancel_velocity_batch(
+		stack.ask_px[prev], stack.ask_qty[prev], stack.ask_px[curr], stack.ask_qty[curr], top_n=20
+	)
+	assert blocked.tolist() == [cancel_velocity(books[i].asks(), books[i + 1].asks(), top_n=20) for i in range(len(books) - 1)]
+
+
+def test_depth_weighted_sigma_bit_identical_on_wide_books() -> None:
+	rng = random.Random(0)
+	books = []
+	for i in range(5000):
+		mid = rng.uniform(1000.0, 60000.0)
+		bids = [(mid - rng.uniform(0.0, 5.0) * k - 0.01, rng.uniform(0.0, 5.0)) for k in range(1, 12)]
+		asks = [(mid + rng.uniform(0.0, 5.0) * k + 0.01, rng.uniform(0.0, 5.0)) for k in range(1, 12)]
+		books.append(CompactBook.from_levels(i, "v", "S", i, bids, asks))
+	stack = BookStack.from_books(books)
+	sigma = depth_weighted_sigma_batch(stack.bid_px, stack.bid_qty, stack.ask_px, stack.ask_qty)
+	assert sigma.tolist() == [depth_weighted_sigma(b.bids(), b.asks()) for b in books]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from capstan.batch import cancel_velocity_books, cancel_velocity_sorted
+from capstan.compact import CompactBook
+from capstan.core import cancel_velocity
+
+
+def _ladder(rng: random.Random, n: int, start: float, step: float) -> list[tuple[float, float]]:
+	levels = []
+	for k in range(n):
+		price = round(start + step * k, 2)
+		if rng.random() < 0.2:
+			price += rng.choice([-1, 1]) * rng.uniform(0.0, 2e-9)
+		levels.append((price, rng.choice([0.0, rng.uniform(0.0, 5.0)])))
+	if rng.random() < 0.5:
+		levels.insert(rng.randint(0, n), levels[rng.randint(0, n - 1)])
+	if rng.random() < 0.5:
+		p = levels[0][0]
+		levels[1:1] = [(p + 3e-10, 1.0), (p - 4e-10, 2.0)]
+	return levels
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_sorted_matches_scalar(seed: int) -> None:
+	rng = random.Random(seed)
+	prev = _ladder(rng, rng.randint(1, 250), 100.0, -0.01)
+	curr = _ladder(rng, rng.randint(1, 250), 100.0 + rng.choice([0.0, 0.01]), -0.01)
+	for top_n in (None, 10):
+		for tol in (1e-9, 0.0, 0.004):
+			want = cancel_velocity(prev, curr, top_n=top_n, price_tolerance=tol)
+			got = cancel_velocity_sorted(
+				np.array([p for p, _ in prev]),
+				np.array([q for _, q in prev]),
+				np.array([p for p, _ in curr]),
+				np.array([q for _, q in curr]),
+				top_n=top_n,
+				price_tolerance=tol,
+			)
+			assert got == want
+
+
+def test_empty_sides() -> None:
+	empty = np.zeros(0)
+	one = np.array([100.0])
+	assert cancel_velocity_sorted(empty, empty, one, one) == cancel_velocity([], [(100.0, 100.0)]) == 0.0
+	assert cancel_velocity_sorted(one, one, empty, empty) == cancel_velocity([(100.0, 100.0)], []) == 1.0
+
+
+def test_compact_books_diff() -> None:
+	rng = random.Random(5)
+	bids_a, asks_a = _ladder(rng, 40, 99.9, -0.1), _ladder(rng, 40, 100.0, 0.1)
+	bids_b, asks_b = _ladder(rng, 40, 99.9, -0.1), _ladder(rng, 40, 100.1, 0.1)
+	a = CompactBook.from_levels(1, "v", "S", 1, [(p, q) for p, q in bids_a if p > 0], asks_a)
+	b = CompactBook.from_levels(2, "v", "S", 2, [(p, q) for p, q in bids_b if p > 0], asks_b)
+	assert cancel_velocity_books(a, b, side="bids") == cancel_velocity(a.bids(), b.bids())
+	assert cancel_velocity_books(a, b, side="asks", top_n=5) == cancel_velocity(a.asks(), b.asks(), top_n=5)
+	with pytest.raises(ValueError):
+		cancel_velocity_books(a, b, side="mid")
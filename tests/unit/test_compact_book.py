@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from capstan.compact import CompactBook
+from capstan.core import depth_weighted_sigma, lob10_imbalance
+from capstan.normalizer import normalize_orderbook, normalize_orderbook_compact
+from capstan.schemas import OrderBook, PriceLevel
+from capstan.venue_adapters import BitgetRO, BybitRO
+
+
+def _ob(levels: int = 20) -> OrderBook:
+	return OrderBook(
+		ts=1000,
+		venue="bybit",
+		symbol="BTCUSDT",
+		bids=[PriceLevel(price=100.0 - 0.1 * i, qty=1.0 + i / 7) for i in range(levels)],
+		asks=[PriceLevel(price=100.1 + 0.1 * i, qty=0.5 + i / 3) for i in range(levels - 1)],
+		seq=7,
+	)
+
+
+def test_roundtrip_is_lossless() -> None:
+	ob = _ob()
+	book = CompactBook.from_orderbook(ob)
+	assert book.n_bids == 20 and book.ask_px.shape == (19,)
+	assert book.to_orderbook() == ob
+	assert book.bids() == [(lv.price, lv.qty) for lv in ob.bids]
+
+
+def test_compact_is_smaller() -> None:
+	ob = _ob()
+	ob_size = sys.getsizeof(ob) + sum(sys.getsizeof(lv) + sys.getsizeof(lv.__dict__) for lv in (*ob.bids, *ob.asks))
+	book = CompactBook.from_orderbook(ob)
+	compact_size = sys.getsizeof(book) + sys.getsizeof(book.prices) + sys.getsizeof(book.qtys)
+	assert compact_size * 3 < ob_size
+
+
+def test_signals_match_on_compact_levels() -> None:
+	ob = _ob()
+	book = CompactBook.from_orderbook(ob)
+	bids = [(lv.price, lv.qty) for lv in ob.bids]
+	asks = [(lv.price, lv.qty) for lv in ob.asks]
+	assert lob10_imbalance(book.bids(), book.asks()) == lob10_imbalance(bids, asks)
+	assert depth_weighted_sigma(book.bids(), book.asks()) == depth_weighted_sigma(bids, asks)
+
+
+def test_rejects_invalid_levels() -> None:
+	with pytest.raises(ValueError):
+		CompactBook.from_levels(1, "bybit", "BTCUSDT", 1, [(100.0, -1.0)], [])
+	with pytest.raises(ValueError):
+		CompactBook.from_levels(1, "bybit", "BTCUSDT", 1, [], [(0.0, 1.0)])
+
+
+def test_adapters_emit_compact_books() -> None:
+	for adapter in (BybitRO(), BitgetRO()):
+		books = list(adapter.books("BTCUSDT"))
+		compact = list(adapter.compact_books("BTCUSDT"))
+		assert [c.to_orderbook() for c in compact] == books
+
+
+def test_normalizer_compact_matches() -> None:
+	raw = {
+		"ts": 1,
+		"venue": "bybit",
+		"symbol": "BTCUSDT",
+		"bids": [{"price": "100", "qty": "1"}, {"price": "bad", "qty": 1}, {"price": 99.9, "qty": 2}],
+		"asks": [{"price": 100.1, "qty": 1}],
+		"seq": 3,
+	}
+	assert normalize_orderbook_compact(raw).to_orderbook() == normalize_orderbook(raw)
+	assert normalize_orderbook_compact(raw, top_n=1).n_bids == 1
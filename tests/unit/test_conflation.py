@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from capstan import metrics
+from capstan.compact import CompactBook
+from capstan.conflation import BookConflator, conflate_books, dedup_books, ladder_key
+from capstan.schemas import OrderBook, PriceLevel
+
+
+def _ob(ts: int, bid_qty: float = 1.0, symbol: str = "BTCUSDT", deep_qty: float = 1.0) -> OrderBook:
+	bids = [PriceLevel(price=100.0 - i, qty=bid_qty if i == 0 else deep_qty) for i in range(12)]
+	asks = [PriceLevel(price=101.0 + i, qty=2.0) for i in range(12)]
+	return OrderBook(ts=ts, venue="bybit", symbol=symbol, bids=bids, asks=asks, seq=ts)
+
+
+def test_dedup_drops_repeats_per_symbol() -> None:
+	metrics.reset()
+	books = [
+		_ob(1),
+		_ob(2),
+		_ob(3, symbol="ETHUSDT"),
+		_ob(4, bid_qty=3.0),
+		_ob(5, bid_qty=3.0, deep_qty=9.0),
+		_ob(6),
+	]
+	books[4] = books[4].model_copy(update={"bids": books[3].bids[:10] + books[4].bids[10:]})
+	kept = list(dedup_books(books))
+	assert [b.ts for b in kept] == [1, 3, 4, 6]
+	assert metrics.get("books_deduped_total", "bybit", "books") == 2
+	assert len(list(dedup_books(books, top_n=None))) == 5
+
+
+def test_dedup_compact_matches_orderbook() -> None:
+	books = [_ob(1), _ob(2), _ob(3, bid_qty=2.0)]
+	compact = [CompactBook.from_orderbook(b) for b in books]
+	assert [b.ts for b in dedup_books(compact)] == [b.ts for b in dedup_books(books)] == [1, 3]
+	assert ladder_key(compact[0]) == ladder_key(compact[1]) != ladder_key(compact[2])
+
+
+def test_conflate_keeps_latest_per_bucket() -> None:
+	metrics.reset()
+	ts = [0, 40, 99, 100, 250, 260, 299]
+	books = [_ob(t) for t in ts] + [_ob(120, symbol="ETHUSDT")]
+	books.sort(key=lambda b: b.ts)
+	out = list(conflate_books(books, interval_ms=100))
+	assert [(b.symbol, b.ts) for b in out] == [("BTCUSDT", 99), ("BTCUSDT", 100), ("ETHUSDT", 120), ("BTCUSDT", 299)]
+	assert metrics.get("books_conflated_total", "bybit", "books") == 4
+
+
+def test_conflator_push_and_flush() -> None:
+	c: BookConflator[OrderBook] = BookConflator(1000)
+	assert c.push(_ob(10)) == []
+	assert c.push(_ob(20)) == []
+	assert [b.ts for b in c.push(_ob(1500))] == [20]
+	assert [b.ts for b in c.flush()] == [1500]
+	assert c.flush() == []
+
+
+def test_conflator_releases_quiet_keys() -> None:
+	c: BookConflator[OrderBook] = BookConflator(100)
+	assert c.push(_ob(10, symbol="ETHUSDT")) == []
+	assert c.push(_ob(50)) == []
+	assert c.tick(99) == []
+	assert [(b.symbol, b.ts) for b in c.tick(100)] == [("ETHUSDT", 10), ("BTCUSDT", 50)]
+	assert c.push(_ob(120, symbol="ETHUSDT")) == []
+	assert [(b.symbol, b.ts) for b in c.push(_ob(230))] == [("ETHUSDT", 120)]
+	assert c.tick(299) == []
+	assert [b.ts for b in c.tick(10_000)] == [230]
+	assert c.flush() == []
+
+
+def test_conflate_orders_output_across_keys() -> None:
+	books = [_ob(t, symbol=s) for t, s in [(5, "A"), (30, "B"), (60, "C"), (95, "A"), (140, "C"), (180, "B"), (410, "A")]]
+	out = list(conflate_books(books, interval_ms=100))
+	assert [(b.symbol, b.ts) for b in out] == [("B", 30), ("C", 60), ("A", 95), ("C", 140), ("B", 180), ("A", 410)]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from capstan import metrics
+from capstan.jsonl import iter_lines, iter_objects
+
+LOG = logging.getLogger("capstan.adapters.test")
+
+
+def test_iter_lines_offsets_across_blocks(tmp_path: Path) -> None:
+	data = b'{"ts": 1}\r\n\n{"ts": 22}\n{"ts": 333}'
+	path = tmp_path / "x.jsonl"
+	path.write_bytes(data)
+	for block_size in (1, 3, 7, 1 << 20):
+		lines = [(no, off, bytes(line)) for no, off, line in iter_lines(path, block_size=block_size)]
+		assert [no for no, _, _ in lines] == [1, 2, 3, 4]
+		for _, off, line in lines:
+			assert data[off : off + len(line)] == line
+		assert lines[-1][2] == b'{"ts": 333}'
+
+
+def test_iter_objects_skips_invalid_and_blank(tmp_path: Path) -> None:
+	metrics.reset()
+	path = tmp_path / "x.jsonl"
+	path.write_bytes(b'{"ts": 1}\n   \n[1, 2]\n{bad\n{"ts": 2}\n')
+	out = list(iter_objects(path, LOG, venue="v", stream="books", block_size=4))
+	assert [rec["ts"] for _, rec in out] == [1, 2]
+	assert [off for off, _ in out] == [0, 26]
+	assert metrics.get("records_skipped_total", "v", "books") == 2
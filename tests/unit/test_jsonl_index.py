@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+from pathlib import Path
+
+from capstan import metrics
+from capstan.jsonl_index import JsonlIndex
+from capstan.venue_adapters import BybitRO
+
+LOG = logging.getLogger("capstan.adapters.test")
+
+
+def _book(ts: int, symbol: str) -> dict[str, object]:
+	return {
+		"ts": ts,
+		"venue": "bybit",
+		"symbol": symbol,
+		"bids": [{"price": 100.0, "qty": 1.0}],
+		"asks": [{"price": 100.1, "qty": 1.0}],
+		"seq": ts,
+	}
+
+
+def _write_books(root: Path) -> Path:
+	root.mkdir(parents=True, exist_ok=True)
+	path = root / "books.jsonl"
+	with path.open("w") as f:
+		for ts in (300, 100, 200, 400):
+			f.write(json.dumps(_book(ts, "BTCUSDT")) + "\n")
+			f.write(json.dumps(_book(ts, "ETHUSDT")) + "\n")
+		f.write("not json\n")
+	return path
+
+
+def test_index_lookup_by_symbol_and_range(tmp_path: Path) -> None:
+	path = _write_books(tmp_path)
+	index = JsonlIndex.build(path, LOG, venue="bybit", stream="books")
+	assert set(index.symbols) == {"BTCUSDT", "ETHUSDT"}
+	assert [r["ts"] for r in index.iter_records("BTCUSDT")] == [100, 200, 300, 400]
+	assert [r["ts"] for r in index.iter_records("ETHUSDT", 200, 400)] == [200, 300]
+	assert list(index.iter_records("SOLUSDT")) == []
+
+
+def test_sidecar_reused_until_file_changes(tmp_path: Path) -> None:
+	path = _write_books(tmp_path)
+	JsonlIndex.load_or_build(path, LOG, venue="bybit", stream="books")
+	assert JsonlIndex.sidecar(path).exists()
+	assert JsonlIndex.load(path) is not None
+	with path.open("a") as f:
+		f.write(json.dumps(_book(500, "BTCUSDT")) + "\n")
+	assert JsonlIndex.load(path) is None
+
+
+def test_adapter_range_query_and_rebuild(tmp_path: Path) -> None:
+	metrics.reset()
+	root = tmp_path / "bybit"
+	path = _write_books(root)
+	adapter = BybitRO(root=root)
+	assert [ob.ts for ob in adapter.books("BTCUSDT", start_ts=200)] == [200, 300, 400]
+	assert [ob.ts for ob in adapter.books("BTCUSDT", end_ts=300)] == [100, 200]
+	assert metrics.get("records_skipped_total", "bybit", "books") == 1
+	with path.open("a") as f:
+		f.write(json.dumps(_book(500, "BTCUSDT")) + "\n")
+	assert [ob.ts for ob in adapter.books("BTCUSDT", start_ts=450)] == [500]
+
+
+def test_loaded_index_reports_skipped_lines(tmp_path: Path) -> None:
+	metrics.reset()
+	root = tmp_path / "bybit"
+	path = _write_books(root)
+	with path.open("a") as f:
+		f.write(json.dumps({**_book(600, "BTCUSDT"), "ts": "late"}) + "\n")
+	assert len(list(BybitRO(root=root).books("BTCUSDT"))) == 4
+	assert metrics.get("records_skipped_total", "bybit", "books") == 2
+	assert JsonlIndex.load(path) is not None
+	assert len(list(BybitRO(root=root).books("BTCUSDT"))) == 4
+	assert metrics.get("records_skipped_total", "bybit", "books") == 4
+
+
+def test_adapter_index_matches_scan(tmp_path: Path) -> None:
+	root = tmp_path / "bybit"
+	shutil.copytree(Path("tests/fixtures/bybit"), root)
+	for symbol in ("BTCUSDT", "ETHUSDT"):
+		indexed = [ob.ts for ob in BybitRO(root=root).books(symbol)]
+		scanned = [ob.ts for ob in BybitRO(root=root, use_index=False).books(symbol)]
+		assert indexed == scanned
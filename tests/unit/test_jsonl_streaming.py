@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from capstan import metrics
+from capstan.venue_adapters import BybitRO, _iter_sorted_jsonl
+
+LOG = logging.getLogger("capstan.adapters.test")
+
+
+def _write(path: Path, ts_values: list[int]) -> Path:
+	with path.open("w") as f:
+		for i, ts in enumerate(ts_values):
+			f.write(json.dumps({"ts": ts, "symbol": "BTCUSDT", "n": i}) + "\n")
+	return path
+
+
+def test_reorder_window_sorts_local_disorder(tmp_path: Path) -> None:
+	path = _write(tmp_path / "books.jsonl", [1, 3, 2, 5, 4, 4, 6])
+	out = list(_iter_sorted_jsonl(path, LOG, venue="v", stream="books", reorder_window=2))
+	assert [r["ts"] for r in out] == [1, 2, 3, 4, 4, 5, 6]
+	# equal ts keep file order
+	assert [r["n"] for r in out if r["ts"] == 4] == [4, 5]
+
+
+def test_reorder_window_skips_late_records(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+	metrics.reset()
+	path = _write(tmp_path / "books.jsonl", [10, 11, 12, 13, 1, 2, 14])
+	with caplog.at_level(logging.WARNING, logger=LOG.name):
+		out = list(_iter_sorted_jsonl(path, LOG, venue="v", stream="books", reorder_window=1))
+	assert [r["ts"] for r in out] == [10, 11, 12, 13, 14]
+	assert metrics.get("records_late_total", "v", "books") == 2
+	assert metrics.get("records_read_total", "v", "books") == 5
+	assert len(caplog.records) == 1 and "skipped 2 late records" in caplog.text
+
+
+def test_external_sort_keeps_chunk_sorted_files(tmp_path: Path) -> None:
+	metrics.reset()
+	ts_values = [*range(0, 50), *range(10, 60), *range(5, 30)]
+	path = _write(tmp_path / "books.jsonl", ts_values)
+	out = list(_iter_sorted_jsonl(path, LOG, venue="v", stream="books", reorder_window=None, run_size=20))
+	assert [r["ts"] for r in out] == sorted(ts_values)
+	assert metrics.get("records_late_total", "v", "books") == 0
+
+
+def test_default_yields_before_eof(tmp_path: Path) -> None:
+	path = _write(tmp_path / "books.jsonl", list(range(10_000)))
+	it = _iter_sorted_jsonl(path, LOG, venue="v", stream="books")
+	assert next(it)["ts"] == 0
+	it.close()
+
+
+def test_external_sort_spills_and_merges(tmp_path: Path) -> None:
+	ts_values = [(i * 37) % 101 for i in range(101)] + [50, 50]
+	path = _write(tmp_path / "books.jsonl", ts_values)
+	out = list(
+		_iter_sorted_jsonl(path, LOG, venue="v", stream="books", reorder_window=None, run_size=10)
+	)
+	assert [r["ts"] for r in out] == sorted(ts_values)
+	fifties = [r["n"] for r in out if r["ts"] == 50]
+	assert fifties == sorted(fifties)
+
+
+def test_adapter_external_sort_matches_default() -> None:
+	default = [ob.ts for ob in BybitRO().books("BTCUSDT")]
+	external = [ob.ts for ob in BybitRO(reorder_window=None, run_size=1, use_index=False).books("BTCUSDT")]
+	assert default == external
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from capstan import metrics
+from capstan.compact import CompactBook
+from capstan.core import lob10_imbalance
+from capstan.l2book import BookEngine
+
+
+def _msg(kind: str, seq: int, bids: list[list[float]], asks: list[list[float]]) -> dict[str, object]:
+	return {"type": kind, "venue": "bybit", "symbol": "BTCUSDT", "ts": 1000 + seq, "seq": seq, "bids": bids, "asks": asks}
+
+
+def test_deltas_update_sorted_ladders() -> None:
+	engine = BookEngine()
+	engine.apply(_msg("snapshot", 1, [[100.0, 1.0], [99.0, 2.0]], [[101.0, 1.0], [102.0, 2.0]]))
+	book = engine.apply(_msg("delta", 2, [[99.5, 3.0], [100.0, 0.0]], [[100.5, 4.0], [102.0, 5.0]]))
+	assert list(book.bids()) == [(99.5, 3.0), (99.0, 2.0)]
+	assert list(book.asks()) == [(100.5, 4.0), (101.0, 1.0), (102.0, 5.0)]
+	ob = book.snapshot(top_n=2)
+	assert ob.seq == 2 and ob.ts == 1002
+	assert [(lv.price, lv.qty) for lv in ob.asks] == [(100.5, 4.0), (101.0, 1.0)]
+	assert book.snapshot(top_n=2) is ob
+	assert book.compact() == CompactBook.from_orderbook(book.snapshot())
+
+
+def test_random_deltas_match_reference() -> None:
+	rng = random.Random(1)
+	engine = BookEngine()
+	ref_bids: dict[float, float] = {}
+	ref_asks: dict[float, float] = {}
+	engine.apply(_msg("snapshot", 0, [], []))
+	for seq in range(1, 2000):
+		bids = [[round(rng.uniform(90, 100), 1), rng.choice([0.0, rng.uniform(0.1, 5)])] for _ in range(3)]
+		asks = [[round(rng.uniform(100.1, 110), 1), rng.choice([0.0, rng.uniform(0.1, 5)])] for _ in range(3)]
+		for ref, levels in ((ref_bids, bids), (ref_asks, asks)):
+			for p, q in levels:
+				if q <= 0.0:
+					ref.pop(p, None)
+				else:
+					ref[p] = q
+		book = engine.apply(_msg("delta", seq, bids, asks))
+	assert list(book.bids()) == sorted(ref_bids.items(), reverse=True)
+	assert list(book.asks()) == sorted(ref_asks.items())
+
+
+def test_seq_gap_triggers_resync() -> None:
+	metrics.reset()
+	calls: list[tuple[str, str, int, int]] = []
+	engine = BookEngine(on_resync=lambda *args: calls.append(args))
+	engine.apply(_msg("snapshot", 10, [[100.0, 1.0]], [[101.0, 1.0]]))
+	engine.apply(_msg("delta", 10, [[100.0, 9.0]], []))
+	engine.apply(_msg("delta", 13, [[100.0, 2.0]], []))
+	book = engine.apply(_msg("delta", 14, [[100.0, 3.0]], []))
+	assert calls == [("bybit", "BTCUSDT", 11, 13)]
+	assert not book.synced and list(book.bids()) == [(100.0, 1.0)]
+	assert metrics.get("seq_gaps_total", "bybit", "books") == 1
+	assert metrics.get("deltas_stale_total", "bybit", "books") == 1
+	book = engine.apply(_msg("snapshot", 20, [[100.0, 5.0]], [[101.0, 1.0]]))
+	assert engine.apply(_msg("delta", 21, [[100.0, 6.0]], [])).bids()[0] == (100.0, 6.0)
+
+
+def test_delta_before_snapshot_requests_resync_once() -> None:
+	metrics.reset()
+	calls: list[tuple[str, str, int, int]] = []
+	engine = BookEngine(on_resync=lambda *args: calls.append(args))
+	for seq in (5, 6, 7):
+		book = engine.apply(_msg("delta", seq, [[100.0, 1.0]], []))
+	assert calls == [("bybit", "BTCUSDT", -1, 5)]
+	assert not book.synced and len(book.bids()) == 0
+	assert metrics.get("deltas_unsynced_total", "bybit", "books") == 3
+	engine.apply(_msg("snapshot", 7, [[100.0, 1.0]], [[101.0, 1.0]]))
+	engine.apply(_msg("delta", 9, [], []))
+	engine.apply(_msg("delta", 10, [], []))
+	assert calls[1:] == [("bybit", "BTCUSDT", 8, 9)]
+	assert metrics.get("deltas_unsynced_total", "bybit", "books") == 4
+
+
+def test_top_n_view_is_live_and_guarded() -> None:
+	engine = BookEngine()
+	book = engine.apply(_msg("snapshot", 1, [[100.0 - i, 1.0 + i] for i in range(20)], [[101.0 + i, 1.0] for i in range(20)]))
+	view = book.bids(top_n=10)
+	assert len(view) == 10 and view[-1] == (91.0, 10.0) and view[:2] == [(100.0, 1.0), (99.0, 2.0)]
+	assert lob10_imbalance(view, book.asks(10)) == lob10_imbalance(list(view), list(book.asks(10)))
+	engine.apply(_msg("delta", 2, [[100.0, 0.0]], []))
+	with pytest.raises(RuntimeError):
+		view[0]
+
+
+def test_deep_ladder_matches_reference() -> None:
+	rng = random.Random(7)
+	engine = BookEngine()
+	ref: dict[float, float] = {}
+	engine.apply(_msg("snapshot", 0, [], []))
+	for seq in range(1, 3000):
+		levels = [[round(rng.uniform(1.0, 100.0), 2), rng.choice([0.0, 1.0, rng.uniform(0.1, 5)])] for _ in range(5)]
+		for p, q in levels:
+			if q <= 0.0:
+				ref.pop(p, None)
+			else:
+				ref[p] = q
+		book = engine.apply(_msg("delta", seq, levels, []))
+	expected = sorted(ref.items(), reverse=True)
+	assert len(expected) > 1000
+	assert list(book.bids()) == expected
+	view = book.bids()
+	assert view[500] == expected[500] and view[-1] == expected[-1] and view[300:310] == expected[300:310]
+	assert view[::-97] == expected[::-97]
+
+
+def test_bad_level_leaves_book_unchanged() -> None:
+	engine = BookEngine()
+	book = engine.apply(_msg("snapshot", 1, [[100.0, 1.0], [99.0, 2.0]], [[101.0, 1.0]]))
+	for bad in ([[98.0, 1.0], [0.0, 1.0]], [[98.0, 1.0], ["x", 1.0]], [[98.0, 1.0], [97.0, float("nan")]]):
+		with pytest.raises(ValueError):
+			engine.apply(_msg("delta", 2, [[100.0, 0.0]], [[101.0, 5.0]]) | {"bids": [[100.0, 0.0], *bad]})
+		assert list(book.bids()) == [(100.0, 1.0), (99.0, 2.0)] and list(book.asks()) == [(101.0, 1.0)]
+		assert book.seq == 1 and book.synced
+	with pytest.raises(ValueError):
+		engine.apply(_msg("snapshot", 5, [[100.0, 1.0]], [[-1.0, 1.0]]))
+	assert book.seq == 1 and list(book.bids()) == [(100.0, 1.0), (99.0, 2.0)]
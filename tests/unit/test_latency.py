@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from collections.abc import Iterator
+
+import pytest
+
+from capstan import core, latency
+from capstan.core import lob10_imbalance, make_llca_features
+from capstan.normalizer import normalize_orderbook
+from capstan.venue_adapters import BybitRO
+
+
+@pytest.fixture
+def enabled() -> Iterator[None]:
+	latency.reset()
+	latency.enable()
+	yield
+	latency.disable()
+	latency.reset()
+
+
+def test_histogram_quantiles_within_precision() -> None:
+	hist = latency.LatencyHistogram()
+	for ns in range(1, 100_001):
+		hist.record(ns)
+	assert hist.count == 100_000 and hist.max == 100_000
+	for q in (0.5, 0.9, 0.99):
+		assert hist.quantile(q) == pytest.approx(q * 100_000, rel=1 / 64)
+	assert hist.quantile(1.0) == 100_000
+	assert latency.LatencyHistogram().quantile(0.5) == 0
+
+
+def test_disabled_records_nothing() -> None:
+	latency.disable()
+	latency.reset()
+	items = [1, 2]
+	assert latency.timed_iter("decode", "v", "books", items) is not None
+	list(BybitRO().books("BTCUSDT"))
+	lob10_imbalance([(1.0, 1.0)], [(2.0, 1.0)])
+	assert latency.histograms() == {}
+	assert latency.format_report().startswith("no latency samples")
+
+
+def test_disabled_at_import_leaves_functions_unwrapped() -> None:
+	assert not hasattr(core.oi_delta, "__wrapped__")
+	assert not hasattr(normalize_orderbook, "__wrapped__")
+
+
+def test_pipeline_stages_are_recorded(enabled: None) -> None:
+	books = list(BybitRO().books("BTCUSDT"))
+	make_llca_features(books, books, 80.0, 90.0)
+	assert ("signal_ready", "bybit", "books") not in latency.histograms()
+	make_llca_features(books, books, 80.0, 90.0, live=True)
+	hists = latency.histograms()
+	assert hists[("decode", "bybit", "books")].count == len(books)
+	assert hists[("adapter", "bybit", "books")].count == len(books)
+	assert hists[("signal_ready", "bybit", "books")].count == 2
+	rows = latency.report()
+	assert {"stage", "venue", "stream", "count", "p99_us", "max_us"} <= set(rows[0])
+	assert "adapter" in latency.format_report(rows)
+
+
+def test_timed_functions_recorded_when_enabled_at_import() -> None:
+	script = """
+from capstan import latency
+from capstan.core import lob10_imbalance, oi_delta
+from capstan.normalizer import normalize_orderbook
+normalize_orderbook({"ts": 1, "venue": "okx", "symbol": "BTCUSDT", "bids": [], "asks": [], "seq": 0})
+lob10_imbalance([(1.0, 1.0)], [(2.0, 1.0)])
+latency.disable()
+oi_delta(1.0, 2.0, 1.0)
+hists = latency.histograms()
+assert hists[("normalize", "okx", "books")].count == 1
+assert hists[("signal", "all", "lob10_imbalance")].count == 1
+assert ("signal", "all", "oi_delta") not in hists
+"""
+	env = {**os.environ, "CAPSTAN_LATENCY": "1", "PYTHONPATH": os.pathsep.join(sys.path)}
+	subprocess.run([sys.executable, "-c", script], env=env, check=True)
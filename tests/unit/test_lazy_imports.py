@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import capstan
+
+SRC = str(Path(capstan.__file__).resolve().parent.parent)
+HEAVY = ("pydantic", "numpy", "pandas", "duckdb", "fastapi", "websockets", "prometheus_client", "orjson")
+
+
+def _run(code: str) -> None:
+	subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {SRC!r})\n{code}"], check=True)
+
+
+@pytest.mark.parametrize("module", ["capstan", "capstan.core", "capstan.streaming", "capstan.metrics", "capstan.latency"])
+def test_light_entry_points_skip_heavy_dependencies(module: str) -> None:
+	_run(f"import {module}\nloaded = [m for m in {HEAVY!r} if m in sys.modules]\nassert not loaded, loaded")
+
+
+def test_submodules_load_on_attribute_access() -> None:
+	_run(
+		"import capstan\n"
+		"assert 'capstan.batch' not in sys.modules\n"
+		"assert capstan.batch.BookStack.__name__ == 'BookStack'\n"
+		"assert 'numpy' in sys.modules and 'batch' in dir(capstan)\n"
+	)
+	with pytest.raises(AttributeError):
+		capstan.nope  # noqa: B018
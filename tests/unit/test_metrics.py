@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from capstan import metrics
+
+
+def test_counters_aggregate_across_threads() -> None:
+	metrics.reset()
+	barrier = threading.Barrier(8)
+
+	def work() -> None:
+		barrier.wait()
+		for _ in range(10_000):
+			metrics.inc("records_read_total", "bybit", "books")
+		metrics.inc("records_read_total", "bybit", "oi", 3)
+
+	threads = [threading.Thread(target=work) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert metrics.get("records_read_total", "bybit", "books") == 80_000
+	assert metrics.counters()[("records_read_total", "bybit", "oi")] == 24
+	assert metrics.get("records_read_total", "okx", "books") == 0
+
+
+def test_gauges_and_histograms() -> None:
+	metrics.reset()
+	metrics.set_gauge("queue_depth", "bybit", "books", 3)
+	metrics.set_gauge("queue_depth", "bybit", "books", 5)
+	assert metrics.get_gauge("queue_depth", "bybit", "books") == 5
+	assert metrics.get_histogram("decode_seconds", "bybit", "books") is None
+
+	metrics.set_buckets("decode_seconds", [1.0, 0.1])
+	t = threading.Thread(target=metrics.observe, args=("decode_seconds", "bybit", "books", 0.5))
+	t.start()
+	t.join()
+	for value in (0.05, 0.1, 7.0):
+		metrics.observe("decode_seconds", "bybit", "books", value)
+	hist = metrics.get_histogram("decode_seconds", "bybit", "books")
+	assert hist is not None
+	assert hist.buckets == (0.1, 1.0)
+	assert hist.counts == [2, 1, 1]
+	assert hist.count == 4 and hist.sum == pytest.approx(7.65)
+
+	metrics.reset()
+	assert metrics.get_gauge("queue_depth", "bybit", "books") is None
+	assert metrics.histograms() == {}
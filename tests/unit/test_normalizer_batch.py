@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from capstan import metrics
+from capstan.normalizer import normalize_orderbook_compact, normalize_orderbooks_batch
+
+
+def _raw(i: int, bids: Any, asks: Any, **extra: Any) -> dict[str, Any]:
+	return {"ts": 1000 + i, "venue": "okx", "symbol": "BTCUSDT", "seq": str(i), "bids": bids, "asks": asks, **extra}
+
+
+def _levels(n: int, base: float, step: float, fmt: Any = float) -> list[dict[str, Any]]:
+	return [{"price": fmt(round(base + step * k, 2)), "qty": fmt(1.0 + k)} for k in range(n)]
+
+
+RAWS = [
+	_raw(0, _levels(12, 100.0, -0.1), _levels(12, 100.1, 0.1)),
+	_raw(1, _levels(12, 100.0, -0.1, str), _levels(3, 100.1, 0.1, str)),
+	_raw(2, [{"price": 100, "qty": 2}], [{"price": "100.5", "qty": 1.5}]),
+	_raw(3, [{"price": "x", "qty": 1.0}, *_levels(11, 99.0, -0.1)], _levels(2, 101.0, 0.1)),
+	_raw(4, [{"price": 99.0}, [98.0, 1.0], "junk", *_levels(11, 97.0, -0.1)], []),
+	_raw(5, [{"price": True, "qty": 1.0}, *_levels(2, 99.0, -0.1)], None),
+	_raw(6, _levels(1, 99.0, 0.0), {"price": 1.0}),
+]
+
+
+def test_batch_matches_per_record() -> None:
+	books = normalize_orderbooks_batch(RAWS)
+	assert books == [normalize_orderbook_compact(r) for r in RAWS]
+	assert [b.n_bids for b in books] == [10, 10, 1, 10, 10, 2, 1]
+	assert books[1].bids()[0] == (100.0, 1.0) and books[4].asks() == []
+	assert normalize_orderbooks_batch(RAWS, top_n=None) == [normalize_orderbook_compact(r, top_n=None) for r in RAWS]
+
+
+def test_fast_path_shares_buffers() -> None:
+	books = normalize_orderbooks_batch(RAWS[:3])
+	assert books[0].prices.base is not None and books[0].prices.base is books[2].prices.base
+	assert books[0].prices.flags.c_contiguous
+
+
+def test_invalid_books_raise_or_skip() -> None:
+	bad = [RAWS[0], _raw(1, [{"price": -1.0, "qty": 1.0}], []), {"venue": "okx", "symbol": "BTCUSDT"}, RAWS[2]]
+	with pytest.raises(ValueError):
+		normalize_orderbooks_batch(bad[:2])
+	with pytest.raises(KeyError):
+		normalize_orderbooks_batch(bad[2:])
+	metrics.reset()
+	books = normalize_orderbooks_batch(bad, skip_invalid=True)
+	assert [b.ts for b in books] == [1000, 1002]
+	assert metrics.get("records_skipped_total", "okx", "books") == 2
+	assert normalize_orderbooks_batch([]) == []
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from capstan.compact import CompactBook
+from capstan.scanner import OpportunityScanner
+
+FEES = {"bybit": 7.0, "bitget": 8.0, "okx": 5.0, "gate": 10.0}
+
+
+def _book(ts: int, venue: str, symbol: str, mid: float) -> CompactBook:
+	return CompactBook.from_levels(ts, venue, symbol, ts, [(mid - 0.01, 1.0)], [(mid + 0.01, 1.0)])
+
+
+def _reference(updates: list[CompactBook], halflife: float) -> dict[str, dict[tuple[str, str], float]]:
+	# scalar EWMA per ordered pair, updated whenever either leg updates
+	alpha = 1.0 - 0.5 ** (1.0 / halflife)
+	mids: dict[tuple[str, str], float] = {}
+	stats: dict[tuple[str, str, str], tuple[int, float, float]] = {}
+	for b in updates:
+		mids[(b.symbol, b.venue)] = 0.5 * (float(b.prices[0]) + float(b.prices[b.n_bids]))
+		for other in FEES:
+			if other == b.venue or (b.symbol, other) not in mids:
+				continue
+			s = mids[(b.symbol, b.venue)] - mids[(b.symbol, other)]
+			n, mean, var = stats.get((b.symbol, b.venue, other), (0, 0.0, 0.0))
+			if n:
+				diff = s - mean
+				var = (1.0 - alpha) * (var + diff * alpha * diff)
+				mean += alpha * diff
+			else:
+				mean = s
+			stats[(b.symbol, b.venue, other)] = (n + 1, mean, var)
+			stats[(b.symbol, other, b.venue)] = (n + 1, -mean, var)
+	out: dict[str, dict[tuple[str, str], float]] = {}
+	for (symbol, i, j), (n, _mean, var) in stats.items():
+		if n < 2:
+			continue
+		mi, mj = mids[(symbol, i)], mids[(symbol, j)]
+		cost = (FEES[i] + FEES[j]) * 1e-4 * 0.5 * (mi + mj)
+		out.setdefault(symbol, {})[(i, j)] = (mi - mj - cost) / math.sqrt(var) if var > 0.0 else 0.0
+	return out
+
+
+def test_incremental_matrix_matches_scalar_reference() -> None:
+	rng = random.Random(3)
+	updates = []
+	for t in range(400):
+		symbol = rng.choice(["BTCUSDT", "ETHUSDT"])
+		base = 100.0 if symbol == "BTCUSDT" else 10.0
+		updates.append(_book(t, rng.choice(list(FEES)), symbol, base * (1.0 + rng.gauss(0.0, 2e-3))))
+	scanner = OpportunityScanner(FEES, halflife=16.0)
+	for b in updates:
+		assert scanner.update(b)
+	ref = _reference(updates, 16.0)
+	venues = scanner.venues
+	for symbol, pairs in ref.items():
+		z = scanner.matrix(symbol)
+		assert np.isnan(np.diag(z)).all()
+		for (i, j), expected in pairs.items():
+			assert z[venues.index(i), venues.index(j)] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+		assert np.count_nonzero(~np.isnan(z)) == len(pairs)
+
+	top = scanner.top(5)
+	assert len(top) == 5
+	assert [o.z for o in top] == sorted((o.z for o in top), reverse=True)
+	best = max(((s, p, z) for s, pairs in ref.items() for p, z in pairs.items()), key=lambda x: x[2])
+	assert (top[0].symbol, top[0].sell_venue, top[0].buy_venue) == (best[0], *best[1])
+	assert top[0].z == pytest.approx(best[2])
+
+
+def test_fees_and_stale_books() -> None:
+	scanner = OpportunityScanner({"bybit": 7.0, "okx": 5.0}, halflife=4.0)
+	scanner.update(_book(0, "bybit", "BTCUSDT", 100.0))
+	scanner.update(_book(0, "okx", "BTCUSDT", 100.0))
+	assert scanner.top(3) == []
+	scanner.update(_book(1, "bybit", "BTCUSDT", 100.5))
+	(opp,) = scanner.top(3)
+	assert (opp.sell_venue, opp.buy_venue) == ("bybit", "okx")
+	assert opp.spread == pytest.approx(0.5)
+	assert opp.fee_cost == pytest.approx(12e-4 * 100.25)
+	assert not scanner.update(_book(0, "bybit", "BTCUSDT", 90.0))
+	assert scanner.book("bybit", "BTCUSDT").ts == 1  # type: ignore[union-attr]
+	with pytest.raises(KeyError):
+		scanner.update(_book(2, "kraken", "BTCUSDT", 100.0))
+
+
+def test_max_age_drops_stale_venues() -> None:
+	scanner = OpportunityScanner({"bybit": 0.0, "okx": 0.0, "gate": 0.0}, halflife=4.0, max_age_ms=100)
+	for t, mids in ((0, (100.0, 99.0, 98.0)), (10, (100.2, 99.1, 98.0))):
+		for venue, mid in zip(("bybit", "okx", "gate"), mids, strict=True):
+			scanner.update(_book(t, venue, "BTCUSDT", mid))
+	assert {(o.sell_venue, o.buy_venue) for o in scanner.top(10)} == {("bybit", "okx"), ("bybit", "gate"), ("okx", "gate")}
+	before = scanner.matrix("BTCUSDT")
+	# gate goes quiet; bybit and okx keep quoting
+	scanner.update(_book(200, "bybit", "BTCUSDT", 100.4))
+	scanner.update(_book(200, "okx", "BTCUSDT", 99.0))
+	z = scanner.matrix("BTCUSDT")
+	assert np.isnan(z[0, 2]) and np.isnan(z[2, 0]) and np.isnan(z[1, 2])
+	assert z[0, 1] != before[0, 1]
+	assert {(o.sell_venue, o.buy_venue) for o in scanner.top(10)} == {("bybit", "okx")}
+	assert scanner.top(10, now_ms=400) == []
+	scanner.update(_book(210, "gate", "BTCUSDT", 98.0))
+	assert np.isfinite(scanner.matrix("BTCUSDT")[0, 2])
+
+
+def test_from_config_uses_configured_venues() -> None:
+	scanner = OpportunityScanner.from_config()
+	assert scanner.venues == ["bybit", "bitget", "kucoin", "gate", "mexc", "okx"]
+	assert scanner.matrix("BTCUSDT").shape == (6, 6)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from capstan import metrics
+from capstan.compact import CompactBook
+from capstan.core import depth_weighted_sigma, lob10_imbalance, make_llca_features
+from capstan.schemas import OrderBook, PriceLevel
+from capstan.signal_cache import BookSignalCache, book_quantities
+
+
+def _ob(ts: int, venue: str = "bybit", symbol: str = "BTCUSDT", shift: float = 0.0) -> OrderBook:
+	return OrderBook(
+		ts=ts,
+		venue=venue,
+		symbol=symbol,
+		bids=[PriceLevel(price=100.0 + shift - 0.1 * i, qty=1.0 + (ts % 7) * 0.3 + i) for i in range(12)],
+		asks=[PriceLevel(price=100.2 + shift + 0.1 * i, qty=2.0 + (ts % 5) * 0.1) for i in range(12)],
+		seq=ts,
+	)
+
+
+def test_quantities_match_core() -> None:
+	ob = _ob(3)
+	q = book_quantities(ob)
+	bids = [(lv.price, lv.qty) for lv in ob.bids]
+	asks = [(lv.price, lv.qty) for lv in ob.asks]
+	assert q.mid == 0.5 * (100.0 + 100.2) and q.spread == 100.2 - 100.0
+	assert q.imbalance == lob10_imbalance(bids, asks)
+	assert q.sigma == depth_weighted_sigma(bids, asks)
+	assert book_quantities(CompactBook.from_orderbook(ob)) == q
+
+
+def test_llca_with_cache_is_identical_and_hits() -> None:
+	metrics.reset()
+	books_a = [_ob(t) for t in range(0, 4000, 100)]
+	books_b = [_ob(t, venue="bitget", shift=0.01 * (t % 3)) for t in range(0, 4000, 100)]
+	books_c = [_ob(t, venue="okx", shift=0.02 * (t % 5)) for t in range(0, 4000, 100)]
+	cache = BookSignalCache(window=32)
+	for end in range(2, len(books_a) + 1):
+		start = max(0, end - 20)
+		wa = books_a[start:end]
+		for other in (books_b, books_c):
+			wo = other[start:end]
+			assert make_llca_features(wa, wo, 80.0, 90.0, cache=cache) == make_llca_features(wa, wo, 80.0, 90.0)
+	# per tick the second pair reuses venue a's window mids and last book
+	ticks = len(books_a) - 1
+	assert (cache.hits, cache.misses) == (2 * ticks, 6 * ticks)
+	assert metrics.get("signal_cache_hits_total", "bybit", "books") == cache.hits
+
+
+def test_window_mids_match_books() -> None:
+	books = [_ob(t) for t in range(10)]
+	cache = BookSignalCache()
+	mids = cache.mids(books)
+	assert mids == [book_quantities(b).mid for b in books]
+	assert cache.mids([CompactBook.from_orderbook(b) for b in books]) is mids
+	assert cache.mids(books[1:]) == mids[1:] and cache.misses == 2
+	assert cache.mids([]) == []
+
+
+def test_eviction_is_least_recently_used() -> None:
+	cache = BookSignalCache(window=3)
+	for t in (0, 1, 2, 0, 3):
+		cache.get(_ob(t))
+	assert cache.misses == 4 and cache.hits == 1
+	cache.get(_ob(0))
+	cache.get(_ob(1))
+	assert cache.hits == 2 and cache.misses == 5
+
+
+def test_eviction_is_per_symbol() -> None:
+	cache = BookSignalCache(window=2)
+	for t in range(5):
+		cache.get(_ob(t))
+	cache.get(_ob(0, symbol="ETHUSDT"))
+	assert len(cache) == 3
+	cache.get(_ob(4))
+	cache.get(_ob(0, symbol="ETHUSDT"))
+	assert cache.hits == 2
+	cache.get(_ob(2))
+	assert cache.misses == 7
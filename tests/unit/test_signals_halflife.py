@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from capstan.core import half_life_pred
+import numpy as np
+import pytest
+
+from capstan.batch import half_life_pred_batch
+from capstan.config import load_config, load_half_life
+from capstan.core import DEFAULT_HALF_LIFE, HalfLifeCoefficients, half_life_pred
 
 
 def test_halflife_z_increases_decreases_thalf() -> None:
@@ -21,3 +26,26 @@ def test_halflife_thin_depth_increases_thalf() -> None:
     deep = {"z": 1.0, "depth": 5.0, "health": 90.0}
     thin = {"z": 1.0, "depth": 0.5, "health": 90.0}
     assert half_life_pred(thin) > half_life_pred(deep)
+
+
+def test_halflife_batch_matches_scalar() -> None:
+    rng = np.random.default_rng(5)
+    x = np.column_stack(
+        [rng.normal(0.0, 3.0, 500), rng.uniform(-1.0, 20.0, 500), rng.uniform(-10.0, 120.0, 500)]
+    )
+    nan = float("nan")
+    x = np.vstack([x, [[nan, 1.0, 50.0], [1.0, nan, 50.0], [1.0, 1.0, nan], [nan, nan, nan]]])
+    coefs = HalfLifeCoefficients(base=4.0, z_weight=0.5, depth_weight=1.5)
+    for c in (DEFAULT_HALF_LIFE, coefs):
+        expected = [half_life_pred({"z": z, "depth": d, "health": h}, c) for z, d, h in x.tolist()]
+        assert half_life_pred_batch(x, c).tolist() == expected
+    with pytest.raises(ValueError):
+        half_life_pred_batch(x[:, :2])
+
+
+def test_halflife_coefficients_from_config() -> None:
+    assert load_half_life(load_config()) == DEFAULT_HALF_LIFE
+    assert load_half_life({}) == DEFAULT_HALF_LIFE
+    assert load_half_life({"half_life": {"base": 2}}).base == 2.0
+    with pytest.raises(ValueError):
+        load_half_life({"half_life": {"bias": 1.0}})
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from capstan.batch import hfh_features_series
+from capstan.core import make_hfh_features
+from capstan.schemas import Funding
+from capstan.streaming import HFHFeatureStream
+
+
+def _funding(rng: random.Random, n: int, venue: str, symbol: str) -> list[Funding]:
+	return [
+		Funding(ts=1000 * i, venue=venue, symbol=symbol, next_ts=1000 * i + 8, est_rate=rng.uniform(-0.003, 0.003))
+		for i in range(n)
+	]
+
+
+@pytest.mark.parametrize("window", [1, 3, 5, 12])
+def test_stream_matches_make_hfh_features(window: int) -> None:
+	rng = random.Random(window)
+	series = {key: _funding(rng, 60, *key) for key in (("bybit", "BTCUSDT"), ("bitget", "BTCUSDT"), ("bybit", "ETHUSDT"))}
+	stream = HFHFeatureStream(window)
+	for i in range(60):
+		for recs in series.values():
+			drift = rng.uniform(-0.01, 0.01)
+			got = stream.update(recs[i], vol_est=0.02, mark_spot_drift=drift)
+			want = make_hfh_features(recs[max(0, i - window + 1) : i + 1], vol_est=0.02, mark_spot_drift=drift)
+			assert got == want
+	assert stream.features("okx", "BTCUSDT", 0.02, 0.0) == make_hfh_features([], 0.02, 0.0)
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 9])
+def test_series_matches_make_hfh_features(window: int) -> None:
+	rng = random.Random(100 + window)
+	recs = _funding(rng, 80, "bybit", "BTCUSDT")
+	drift = np.array([rng.uniform(-0.02, 0.02) for _ in recs])
+	out = hfh_features_series(np.array([f.est_rate for f in recs]), window, 0.02, drift)
+	for i in range(len(recs)):
+		want = make_hfh_features(recs[max(0, i - window + 1) : i + 1], vol_est=0.02, mark_spot_drift=float(drift[i]))
+		assert out["E_funding_T"][i] == want["E_funding_T"]
+		assert out["sigma_T"][i] == want["sigma_T"]
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from capstan.core import make_llca_features
+from capstan.schemas import OrderBook, PriceLevel
+from capstan.streaming import LLCAFeatureStream
+
+
+def _ob(rng: random.Random, ts: int, mid: float) -> OrderBook:
+	levels = rng.randint(0, 12)
+	return OrderBook(
+		ts=ts,
+		venue="v",
+		symbol="S",
+		bids=[PriceLevel(price=mid - 0.05 - 0.1 * k, qty=rng.uniform(0.0, 3.0)) for k in range(levels)],
+		asks=[PriceLevel(price=mid + 0.05 + 0.1 * k, qty=rng.uniform(0.0, 3.0)) for k in range(rng.randint(1, 12))],
+		seq=ts,
+	)
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 50])
+def test_stream_matches_batch_features(window: int) -> None:
+	rng = random.Random(window)
+	stream = LLCAFeatureStream(window)
+	books_a: list[OrderBook] = []
+	books_b: list[OrderBook] = []
+	mid = 100.0
+	ts = 1000
+	for _ in range(300):
+		ts += rng.randint(50, 300)
+		mid += rng.uniform(-0.2, 0.2)
+		books_a.append(_ob(rng, ts, mid + rng.uniform(-0.1, 0.1)))
+		books_b.append(_ob(rng, ts + rng.randint(0, 20), mid))
+		got = stream.update(books_a[-1], books_b[-1], health_a=90.0, health_b=70.0)
+		want = make_llca_features(books_a[-window:], books_b[-window:], 90.0, 70.0)
+		assert got.keys() == want.keys()
+		for key in want:
+			assert got[key] == pytest.approx(want[key], rel=1e-9, abs=1e-9), key
+	assert len(stream) == window
+
+
+def test_stream_rejects_empty_window() -> None:
+	with pytest.raises(ValueError):
+		LLCAFeatureStream(0)
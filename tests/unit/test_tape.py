@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from capstan.compact import CompactBook
+from capstan.normalizer import normalize_orderbook
+from capstan.schemas import OrderBook, PriceLevel
+from capstan.tape import TapeRO, TapeWriter, write_tape
+from capstan.venue_adapters import BybitRO
+
+
+def _ob(ts: int, symbol: str = "BTCUSDT", levels: int = 3) -> OrderBook:
+	return OrderBook(
+		ts=ts,
+		venue="okx",
+		symbol=symbol,
+		bids=[PriceLevel(price=100.0 - i, qty=1.0 + i) for i in range(levels)],
+		asks=[PriceLevel(price=101.0 + i, qty=0.5 + i) for i in range(levels - 1)],
+		seq=ts // 10,
+	)
+
+
+def test_roundtrip_from_fixture_adapter(tmp_path: Path) -> None:
+	src = list(BybitRO().books("BTCUSDT"))
+	path = tmp_path / "bybit.tape"
+	assert write_tape(path, "bybit", src, depth=5) == len(src)
+	tape = TapeRO(path)
+	assert len(tape) == len(src) and tape.symbols == ["BTCUSDT"]
+	assert list(tape.books("BTCUSDT")) == src
+	assert list(tape.books("ETHUSDT")) == []
+
+
+def test_records_are_memmap_views(tmp_path: Path) -> None:
+	path = tmp_path / "t.tape"
+	write_tape(path, "okx", [_ob(10), _ob(20)])
+	tape = TapeRO(path)
+	assert isinstance(tape.records, np.memmap)
+	book = tape.record(1)
+	assert np.shares_memory(book.prices, tape.records)
+	assert book == CompactBook.from_orderbook(_ob(20))
+
+
+def test_ts_search_and_symbol_filter(tmp_path: Path) -> None:
+	path = tmp_path / "t.tape"
+	with TapeWriter(path, "okx", depth=2) as w:
+		for ts in range(0, 100, 10):
+			w.write(_ob(ts, "BTCUSDT" if ts % 20 else "ETHUSDT"))
+		w.write(normalize_orderbook({"ts": 100, "venue": "okx", "symbol": "BTCUSDT", "seq": 1, "bids": [{"price": 99.0, "qty": 1.0}], "asks": []}))
+	tape = TapeRO(path)
+	assert tape.symbols == ["ETHUSDT", "BTCUSDT"]
+	assert tape.index_at(35) == 4 and tape.index_at(1000) == len(tape)
+	assert [b.ts for b in tape.compact_books("BTCUSDT", 20, 80)] == [30, 50, 70]
+	assert [b.ts for b in tape.compact_books("ETHUSDT", start_ts=60)] == [60, 80]
+	deep = tape.record(0)
+	assert len(deep.bids()) == 2 and len(deep.asks()) == 2
+	last = tape.record(len(tape) - 1)
+	assert last.bids() == [(99.0, 1.0)] and last.asks() == []
+
+
+def test_writer_rejects_out_of_order_and_foreign_venue(tmp_path: Path) -> None:
+	path = tmp_path / "t.tape"
+	with pytest.raises(ValueError, match="backwards"), TapeWriter(path, "okx") as w:
+		w.write(_ob(20))
+		w.write(_ob(10))
+	assert not path.exists() and not list(tmp_path.iterdir())
+	with pytest.raises(ValueError, match="venue"), TapeWriter(path, "bybit") as w:
+		w.write(_ob(10))
+
+
+def test_reader_rejects_partial_tape(tmp_path: Path) -> None:
+	path = tmp_path / "t.tape"
+	write_tape(path, "okx", [])
+	assert len(TapeRO(path)) == 0
+	path.write_bytes(b"\x00" * 64)
+	with pytest.raises(ValueError, match="not a capstan tape"):
+		TapeRO(path)
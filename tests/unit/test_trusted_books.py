@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from capstan import metrics
+from capstan.compact import CompactBook
+from capstan.normalizer import normalize_orderbook_compact, normalize_orderbooks_batch
+from capstan.validation import SampledValidator
+from capstan.venue_adapters import BybitRO
+
+
+def _raw(ts: int, bid_qty: float = 1.0) -> dict[str, object]:
+	return {
+		"ts": ts,
+		"venue": "bybit",
+		"symbol": "BTCUSDT",
+		"bids": [{"price": 100.0, "qty": bid_qty}],
+		"asks": [{"price": 100.1, "qty": 1.0}],
+		"seq": ts,
+	}
+
+
+def test_trusted_adapter_matches_validated() -> None:
+	checked = [CompactBook.from_orderbook(ob) for ob in BybitRO().books("BTCUSDT")]
+	trusted = list(BybitRO(trusted=True).compact_books("BTCUSDT"))
+	assert trusted == checked
+
+
+def test_trusted_adapter_skips_invalid_books(tmp_path: Path) -> None:
+	metrics.reset()
+	with (tmp_path / "books.jsonl").open("w") as f:
+		f.write(json.dumps(_raw(1000)) + "\n")
+		f.write(json.dumps(_raw(1100, bid_qty=-1.0)) + "\n")
+		f.write(json.dumps(_raw(1200)) + "\n")
+	books = list(BybitRO(root=tmp_path, trusted=True, validate_every=1).compact_books("BTCUSDT"))
+	assert [ob.ts for ob in books] == [1000, 1200]
+	assert metrics.get("records_skipped_total", "bybit", "books") == 1
+	assert metrics.get("records_validated_total", "bybit", "books") == 2
+	assert metrics.get("validation_violations_total", "bybit", "books") == 0
+
+
+def test_sampled_validator_checks_one_in_n() -> None:
+	metrics.reset()
+	validator = SampledValidator(every=3)
+	bad = CompactBook(1000, "bybit", "BTCUSDT", 1, np.array([100.0, 100.1]), np.array([-1.0, 1.0]), 1)
+	for _ in range(7):
+		validator.check(bad, "bybit", "books")
+	assert metrics.get("records_validated_total", "bybit", "books") == 3
+	assert metrics.get("validation_violations_total", "bybit", "books") == 3
+
+
+def test_trusted_batch_matches_per_record() -> None:
+	metrics.reset()
+	raws = [_raw(1000 + ts) for ts in range(5)]
+	books = normalize_orderbooks_batch(raws, validator=SampledValidator(every=2))
+	assert books == [normalize_orderbook_compact(r) for r in raws]
+	assert metrics.get("records_validated_total", "bybit", "books") == 3